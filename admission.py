@@ -0,0 +1,107 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+ADMITTED = "admitted"
+QUEUED = "queued"
+REJECTED = "rejected"
+
+
+class AdmissionGate:
+    """Caps requests working against the database at once.
+
+    Up to limit requests run; up to max_queue more wait for a slot for at most
+    queue_timeout seconds. Anything beyond that is turned away at once instead of
+    queueing inside the connection pool until POOL_TIMEOUT.
+    """
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+
+    def acquire(self) -> str:
+        """ADMITTED, QUEUED (admitted after waiting) or REJECTED; release() unless REJECTED."""
+        outcome = ADMITTED
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.max_queue:
+                    return REJECTED
+                self.waiting += 1
+            try:
+                admitted = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            if not admitted:
+                return REJECTED
+            outcome = QUEUED
+        with self._lock:
+            self.in_flight += 1
+        return outcome
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+            }
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets: rate tokens per second, holding at most burst."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100_000, clock=time.monotonic) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> (tokens, updated_at), least recently used first
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key) -> tuple[bool, int]:
+        """(allowed, seconds until a token is available when not)."""
+        with self._lock:
+            now = self.clock()
+            tokens, updated_at = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._forget_oldest_buckets(now)
+        if allowed:
+            return True, 0
+        return False, max(1, math.ceil((1 - tokens) / self.rate))
+
+    def _forget_oldest_buckets(self, now: float) -> None:
+        # a bucket idle long enough to refill is the same as no bucket; the buckets are in
+        # LRU order, so this stops at the first busy one instead of scanning every key
+        refill_seconds = self.burst / self.rate
+        while self._buckets:
+            _, updated_at = next(iter(self._buckets.values()))
+            if now - updated_at < refill_seconds:
+                break
+            self._buckets.popitem(last=False)
+        # still over with every bucket busy: drop the least recently used
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"rate": self.rate, "burst": self.burst, "tracked_keys": len(self._buckets)}
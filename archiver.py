@@ -0,0 +1,99 @@
+import argparse
+import json
+import signal
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from database import build_engine
+from models import utcnow
+from repository.task_repository import TaskRepository
+from settings import Settings
+
+
+@dataclass
+class ArchiveRun:
+    started_at: str
+    completed_before: str
+    seconds: float = 0.0
+    batches: int = 0
+    tasks: int = 0
+    slowest_batch_seconds: float = 0.0
+    error: str | None = None
+
+
+class TaskArchiver:
+    """Moves completed tasks older than older_than_days into tasks_archive.
+
+    Each batch is one INSERT INTO tasks_archive ... SELECT and one DELETE over at most
+    batch_size ids taken from ix_tasks_completed_updated_at, committed before the next,
+    so a run holds row locks on one batch at a time and its WAL comes in small pieces.
+    Pass the application's repository to drop archived tasks from its cache.
+    """
+
+    def __init__(self, session, repository=None, older_than_days: int = 90, batch_size: int = 1000,
+                 max_batches: int | None = None, clock=utcnow) -> None:
+        self.session = session
+        self.repository = repository or TaskRepository(session)
+        self.older_than_days = older_than_days
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.clock = clock
+
+    def run_once(self) -> ArchiveRun:
+        # one cutoff per run, so tasks completed while it runs wait for the next one
+        completed_before = self.clock() - timedelta(days=self.older_than_days)
+        run = ArchiveRun(
+            started_at=datetime.now(timezone.utc).isoformat(), completed_before=completed_before.isoformat()
+        )
+        started = time.perf_counter()
+        try:
+            while self.max_batches is None or run.batches < self.max_batches:
+                batch_started = time.perf_counter()
+                try:
+                    task_ids = self.repository.archive_completed_tasks_db(completed_before, self.batch_size)
+                    self.session.commit()
+                finally:
+                    self.session.remove()
+                if not task_ids:
+                    break
+                run.batches += 1
+                run.tasks += len(task_ids)
+                run.slowest_batch_seconds = max(run.slowest_batch_seconds, time.perf_counter() - batch_started)
+                if len(task_ids) < self.batch_size:
+                    break
+        except Exception as error:
+            run.error = f"{type(error).__name__}: {error}"
+        run.seconds = time.perf_counter() - started
+        return run
+
+
+def main(argv=None) -> None:
+    """Separate worker: python -m archiver [--once]"""
+    settings = Settings.from_env()
+    parser = argparse.ArgumentParser(description="Archive old completed tasks in bounded batches.")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit.")
+    parser.add_argument("--interval", type=float, default=3600.0)
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    session = scoped_session(sessionmaker(build_engine(settings), expire_on_commit=False))
+    archiver = TaskArchiver(session, older_than_days=args.older_than_days, batch_size=args.batch_size)
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    try:
+        while not stopping.is_set():
+            print(json.dumps(asdict(archiver.run_once())), flush=True)
+            if args.once:
+                break
+            stopping.wait(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""asyncio entry point (Quart on AsyncSession), frozen at the user, task CRUD, bulk create,
+paginated list and stats routes.
+
+It shares serializers, statement builders and input validation with the Flask app, so
+those routes accept and reject the same requests. Everything added since stays in the
+WSGI app only: list ETags/304, single-task reads and the task cache, import/export,
+search, batch PATCH /tasks, archived reads, replica routing, admission control, metrics
+and the sweeper/archiver jobs. Serve those through wsgi:application (gunicorn.conf.py).
+"""
+import asyncio
+
+from quart import Blueprint, Quart, Response, current_app, request, jsonify
+from sqlalchemy.ext.asyncio import async_scoped_session, async_sessionmaker
+
+from database import build_async_engine, pool_stats
+from models import Base
+from repository.async_task_repository import AsyncTaskRepository
+from repository.async_task_stats_repository import AsyncTaskStatsRepository
+from repository.async_user_repository import AsyncUserRepository
+from serializers import (
+    MAX_BULK_TASKS,
+    MAX_PAGE_SIZE,
+    parse_due_date,
+    stream_json_array_async,
+    task_changes_from_json,
+    task_filters_from_args,
+    task_to_dict,
+    version_from_if_match,
+)
+from services.async_task_service import AsyncTaskService
+from services.async_user_service import AsyncUserService
+from services.task_service import TaskNotFoundError, TaskVersionConflictError
+from services.user_cache import KnownUserCache
+from settings import Settings
+
+
+class AppQuart(Quart):
+    def __init__(
+            self,
+            import_name,
+            settings: Settings,
+            static_url_path=None,
+            static_folder="static",
+            static_host=None,
+            host_matching=False,
+            subdomain_matching=False,
+            template_folder="templates",
+            instance_path=None,
+            instance_relative_config=False,
+            root_path=None,
+    ) -> None:
+        super().__init__(
+            import_name,
+            static_url_path,
+            static_folder,
+            static_host,
+            host_matching,
+            subdomain_matching,
+            template_folder,
+            instance_path,
+            instance_relative_config,
+            root_path,
+        )
+
+        self._settings = settings
+
+        # database
+        self.engine = build_async_engine(settings)
+
+        # one AsyncSession per asyncio task, i.e. per request
+        self._session = async_scoped_session(
+            async_sessionmaker(self.engine, expire_on_commit=False),
+            scopefunc=asyncio.current_task,
+        )
+
+        self.after_request(self._finish_transaction)
+        self.teardown_appcontext(self._remove_session)
+
+    async def _finish_transaction(self, response):
+        session = self._session()
+        if session.in_transaction():
+            if response.status_code < 400:
+                await session.commit()
+            else:
+                await session.rollback()
+        return response
+
+    async def _remove_session(self, exception=None) -> None:
+        await self._session.remove()
+
+    async def create_schema(self) -> None:
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    def run(self, *args, **kwargs) -> None:
+        async def prepare() -> None:
+            await self.create_schema()
+            # connections are bound to this loop, the server starts its own
+            await self.engine.dispose()
+
+        asyncio.run(prepare())
+        super().run(*args, **kwargs)
+
+
+api = Blueprint("api", __name__)
+
+
+def create_asgi_app(settings: Settings) -> AppQuart:
+    app = AppQuart(__name__, settings=settings)
+
+    stats_repo = AsyncTaskStatsRepository(app._session)
+    task_repo = AsyncTaskRepository(app._session, stats_repo)
+    user_repo = AsyncUserRepository(app._session)
+    app.user_cache = None
+    if settings.KNOWN_USER_CACHE_SIZE:
+        app.user_cache = KnownUserCache(maxsize=settings.KNOWN_USER_CACHE_SIZE, ttl=settings.KNOWN_USER_CACHE_TTL)
+    app.task_service = AsyncTaskService(task_repo, user_repo, app.user_cache, stats_repo)
+    app.user_service = AsyncUserService(user_repo, app.user_cache)
+
+    app.register_blueprint(api)
+    return app
+
+
+@api.post("/user")
+async def create_user():
+    data = await request.get_json()
+    user = await current_app.user_service.create_user(
+        username=data['username'],
+        role=data['role'],
+    )
+    return jsonify({"user_id": user.id, "success": True}), 201
+
+
+@api.patch("/user/<int:user_id>")
+async def update_user(user_id):
+    data = await request.get_json()
+    try:
+        user = await current_app.user_service.get_user(user_id)
+        if user.username != data["username"]:
+            user.username = data["username"]
+        if user.role != data["role"]:
+            user.role = data["role"]
+        await current_app.user_service.update_user(user_id, user)
+        return jsonify({"success": True}), 202
+    except ValueError as error:
+        return jsonify({"error": str(error), "success": False}), 404
+
+
+@api.delete("/user/<int:user_id>")
+async def delete_user(user_id):
+    try:
+        await current_app.user_service.delete_user(user_id)
+        return jsonify({"success": True}), 200
+    except ValueError as error:
+        return jsonify({"error": str(error), "success": False}), 404
+
+
+@api.post("/tasks")
+async def create_task():
+    data = await request.get_json()
+    try:
+        task = await current_app.task_service.create_task(
+            name=data["task_name"],
+            user_id=data["user_id"],
+            status=data.get("status", "pending"),
+            due_date=parse_due_date(data["due_date"]),
+            priority=data.get("priority", "medium"),
+        )
+        return jsonify({"task_id": task.task_id, "task_name": task.task_name, "success": True}), 201
+    except ValueError as error:
+        return jsonify({"error": str(error), "success": False}), 400
+
+
+@api.post("/tasks/bulk")
+async def create_tasks_bulk():
+    data = await request.get_json(silent=True)
+    items = data.get("tasks") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return jsonify({"error": "Body must contain a tasks list.", "success": False}), 400
+    if len(items) > MAX_BULK_TASKS:
+        return jsonify({"error": f"At most {MAX_BULK_TASKS} tasks per request.", "success": False}), 400
+    try:
+        task_ids = await current_app.task_service.create_tasks_bulk(
+            user_id=data["user_id"],
+            tasks=[
+                {
+                    "task_name": task["task_name"],
+                    "status": task.get("status", "pending"),
+                    "due_date": parse_due_date(task["due_date"]),
+                    "priority": task.get("priority", "medium"),
+                }
+                for task in items
+            ],
+        )
+        return jsonify({"task_ids": task_ids, "success": True}), 201
+    except ValueError as error:
+        return jsonify({"error": str(error), "success": False}), 400
+    except (KeyError, TypeError) as error:
+        return jsonify({"error": f"Invalid task: {error}.", "success": False}), 400
+
+
+async def _stream_tasks(app, tasks):
+    # the body is sent from another task than the handler, so it owns (and closes) its own session
+    try:
+        async for chunk in stream_json_array_async(tasks):
+            yield chunk
+    finally:
+        await app._session.remove()
+
+
+@api.get("/tasks/<int:user_id>")
+async def get_all_tasks(user_id):
+    limit = request.args.get("limit", type=int)
+    after = request.args.get("after", type=int)
+    try:
+        filters = task_filters_from_args(request.args)
+        if limit is None:
+            tasks = await current_app.task_service.iter_tasks_for_user(user_id=user_id, **filters)
+            body = _stream_tasks(current_app._get_current_object(), tasks)
+            return Response(body, mimetype="application/json"), 200
+
+        limit = min(max(limit, 1), MAX_PAGE_SIZE)
+        tasks = await current_app.task_service.get_tasks_page(user_id=user_id, limit=limit, after=after, **filters)
+        next_after = tasks[-1].task_id if len(tasks) == limit else None
+        return jsonify({"tasks": [task_to_dict(task) for task in tasks], "next_after": next_after, "success": True}), 200
+    except ValueError as error:
+        return jsonify({"error": str(error), "success": False}), 400
+
+
+@api.get("/users/<int:user_id>/stats")
+async def get_task_stats(user_id):
+    try:
+        stats = await current_app.task_service.get_task_stats(user_id)
+        return jsonify({"user_id": user_id, **stats, "success": True}), 200
+    except ValueError as error:
+        return jsonify({"error": str(error), "success": False}), 404
+
+
+@api.patch("/tasks/<int:task_id>")
+async def update_task(task_id):
+    try:
+        changes, version = task_changes_from_json(await request.get_json())
+        if version is None:
+            version = version_from_if_match(request.if_match)
+    except (KeyError, TypeError, ValueError) as error:
+        return jsonify({"error": f"Invalid update: {error}.", "success": False}), 400
+    try:
+        task = await current_app.task_service.update_task_fields(task_id, changes, version)
+        return jsonify({"task": task_to_dict(task), "success": True}), 202
+    except TaskVersionConflictError as error:
+        return jsonify({"error": str(error), "success": False}), 409
+    except TaskNotFoundError as error:
+        return jsonify({"error": str(error), "success": False}), 404
+    except ValueError as error:
+        return jsonify({"error": str(error), "success": False}), 400
+
+
+@api.delete("/tasks/<int:task_id>")
+async def delete_task(task_id):
+    user_id = request.args.get("user_id", type=int)
+    try:
+        await current_app.task_service.delete_task(task_id, user_id)
+        return jsonify({"success": True}), 202
+    except ValueError as error:
+        return jsonify({"error": str(error), "success": False}), 400
+
+
+@api.get("/pool/stats")
+async def get_pool_stats():
+    return jsonify(pool_stats(current_app.engine.sync_engine)), 200
+
+
+app = create_asgi_app(Settings.from_env())
+
+
+if __name__ == "__main__":
+    app.run(port=8080)
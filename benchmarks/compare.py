@@ -0,0 +1,63 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Exits with status 1 when any scenario's p95 latency grew, or its throughput
+dropped, by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def _key(result: dict) -> tuple:
+    return result["backend"], result["tasks_per_user"], result["concurrency"], result["name"]
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list[dict]:
+    before = {_key(result): result for result in baseline["results"]}
+    rows = []
+    for result in candidate["results"]:
+        previous = before.get(_key(result))
+        if previous is None:
+            continue
+        p95_change = (result["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] if previous["p95_ms"] else 0.0
+        throughput_change = (
+            (result["throughput_ops_s"] - previous["throughput_ops_s"]) / previous["throughput_ops_s"]
+            if previous["throughput_ops_s"]
+            else 0.0
+        )
+        rows.append({
+            "key": _key(result),
+            "p95_before": previous["p95_ms"],
+            "p95_after": result["p95_ms"],
+            "p95_change": p95_change,
+            "throughput_change": throughput_change,
+            "regression": p95_change > threshold or throughput_change < -threshold,
+        })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative change, default 10%%")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as baseline, open(args.candidate) as candidate:
+        rows = compare(json.load(baseline), json.load(candidate), args.threshold)
+
+    for row in rows:
+        backend, size, concurrency, name = row["key"]
+        marker = "REGRESSION" if row["regression"] else ""
+        print(
+            f"{backend:>10} {size:>8} c={concurrency:<3} {name:<45} "
+            f"p95 {row['p95_before']:.2f} -> {row['p95_after']:.2f}ms ({row['p95_change']:+.1%}) "
+            f"throughput {row['throughput_change']:+.1%} {marker}"
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+"""Latency and throughput benchmarks for every route and service method.
+
+Runs against real databases: a temporary SQLite file always, and PostgreSQL
+when BENCH_POSTGRES_URL (or --postgres-url) points at a reachable server.
+Results are written as JSON so runs from different commits can be compared
+with benchmarks/compare.py.
+
+    python -m benchmarks.run_benchmarks --tasks-per-user 1000,100000 --concurrency 1,8
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+import sqlalchemy
+from sqlalchemy import text
+
+from app import create_app
+from models import Base, Task, User
+from repository.task_stats_repository import TaskStatsRepository
+from settings import Settings
+
+SEED_BATCH_SIZE = 5000
+
+
+@dataclass
+class Scenario:
+    name: str
+    kind: str  # "route" or "service"
+    operation: object  # callable taking the operation index
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list[float], wall_seconds: float, errors: int) -> dict:
+    ordered = sorted(latencies)
+    operations = len(ordered)
+    return {
+        "ops": operations,
+        "errors": errors,
+        "throughput_ops_s": round(operations / wall_seconds, 2) if wall_seconds else 0.0,
+        "mean_ms": round(sum(ordered) / operations * 1000, 3) if operations else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+
+def measure(operation, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(index):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            ok = operation(index) is not False
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def in_transaction(app, function):
+    """Run a service call the way a request does: one commit, then release the session."""
+    session = app._session()
+    try:
+        result = function()
+        session.commit()
+        return result
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        app._session.remove()
+
+
+def seed(app, tasks_per_user: int, spare: int) -> dict:
+    """Create the measured user with its tasks, plus rows that destructive scenarios consume."""
+    session = app._session()
+    user = User(username="bench", role="user")
+    scratch = User(username="bench-scratch", role="user")
+    session.add_all([user, scratch])
+    session.flush()
+    statuses = ("pending", "in-progress", "completed")
+    priorities = ("low", "medium", "high")
+    for offset in range(0, tasks_per_user, SEED_BATCH_SIZE):
+        rows = [
+            {
+                "task_name": f"task {number}",
+                "user_id": user.id,
+                "status": statuses[number % 3],
+                "priority": priorities[number % 3],
+                "due_date": date(2026, 1, 1 + number % 28),
+            }
+            for number in range(offset, min(offset + SEED_BATCH_SIZE, tasks_per_user))
+        ]
+        session.execute(sqlalchemy.insert(Task), rows)
+        session.commit()
+    spare_tasks = session.scalars(
+        sqlalchemy.insert(Task).returning(Task.task_id),
+        [{"task_name": "spare", "user_id": scratch.id, "due_date": date(2026, 1, 1)} for _ in range(spare)],
+    ).all()
+    spare_users = session.scalars(
+        sqlalchemy.insert(User).returning(User.id),
+        [{"username": "spare", "role": "user"} for _ in range(spare)],
+    ).all()
+    # the rows above bypass TaskRepository, so count them once
+    TaskStatsRepository(session).rebuild_db()
+    first_task_id = session.scalar(sqlalchemy.select(sqlalchemy.func.min(Task.task_id)).where(Task.user_id == user.id))
+    session.commit()
+    app._session.remove()
+    return {
+        "user_id": user.id,
+        "scratch_user_id": scratch.id,
+        "task_id": first_task_id,
+        "spare_tasks": spare_tasks,
+        "spare_users": spare_users,
+    }
+
+
+def _consumer(ids: list[int]):
+    iterator = iter(ids)
+    lock = threading.Lock()
+
+    def take():
+        with lock:
+            return next(iterator)
+
+    return take
+
+
+def build_scenarios(app, data: dict) -> list[Scenario]:
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        return local.client
+
+    def route(method, path_for, json_for=None, expected=(200, 201, 202), data=None, headers_for=None):
+        def operation(index):
+            response = client().open(
+                path_for(index), method=method, json=json_for(index) if json_for else None, data=data,
+                headers=headers_for() if headers_for else None,
+            )
+            response.get_data()
+            return response.status_code in expected
+
+        return operation
+
+    user_id = data["user_id"]
+    task_id = data["task_id"]
+    scratch_user_id = data["scratch_user_id"]
+    take_task_for_route = _consumer(data["spare_tasks"][0::2])
+    take_task_for_service = _consumer(data["spare_tasks"][1::2])
+    take_user_for_route = _consumer(data["spare_users"][0::2])
+    take_user_for_service = _consumer(data["spare_users"][1::2])
+    tasks = app.task_service
+    users = app.user_service
+    new_task = {"task_name": "bench", "due_date": "2026-06-01"}
+    import_body = "".join(
+        json.dumps({**new_task, "user_id": scratch_user_id}) + "\n" for _ in range(1000)
+    ).encode()
+
+    etags = {}
+
+    def if_none_match():
+        # taken when the scenario starts, after the writes of earlier scenarios
+        if "list" not in etags:
+            etags["list"] = app.test_client().get(f"/tasks/{user_id}?limit=100").headers["ETag"]
+        return {"If-None-Match": etags["list"]}
+
+    return [
+        # routes
+        Scenario("POST /user", "route", route("POST", lambda i: "/user", lambda i: {"username": "u", "role": "user"})),
+        Scenario("PATCH /user/<id>", "route", route(
+            "PATCH", lambda i: f"/user/{scratch_user_id}", lambda i: {"username": f"s{i}", "role": "user"})),
+        Scenario("DELETE /user/<id>", "route", route("DELETE", lambda i: f"/user/{take_user_for_route()}")),
+        Scenario("POST /tasks", "route", route(
+            "POST", lambda i: "/tasks", lambda i: {**new_task, "user_id": scratch_user_id})),
+        Scenario("POST /tasks/bulk", "route", route(
+            "POST", lambda i: "/tasks/bulk", lambda i: {"user_id": scratch_user_id, "tasks": [new_task] * 100})),
+        Scenario("POST /tasks/import (1000 rows)", "route", route(
+            "POST", lambda i: "/tasks/import?format=ndjson", data=import_body)),
+        Scenario("GET /tasks/<user_id>", "route", route("GET", lambda i: f"/tasks/{user_id}")),
+        Scenario("GET /tasks/<user_id>?limit=100", "route", route(
+            "GET", lambda i: f"/tasks/{user_id}?limit=100&after={task_id + i % 50}")),
+        Scenario("GET /tasks/<user_id>?limit=100 (If-None-Match)", "route", route(
+            "GET", lambda i: f"/tasks/{user_id}?limit=100", expected=(304,), headers_for=if_none_match)),
+        Scenario("GET /tasks/<user_id>?status&due_before", "route", route(
+            "GET", lambda i: f"/tasks/{user_id}?limit=100&status=pending&due_before=2026-01-15")),
+        Scenario("GET /tasks/<user_id>/search?q", "route", route(
+            "GET", lambda i: f"/tasks/{user_id}/search?q=task+{i % 100}&limit=20")),
+        Scenario("GET /tasks/<user_id>/export?format=ndjson", "route", route(
+            "GET", lambda i: f"/tasks/{user_id}/export?format=ndjson")),
+        Scenario("GET /tasks/<user_id>/export?format=csv", "route", route(
+            "GET", lambda i: f"/tasks/{user_id}/export?format=csv")),
+        Scenario("GET /users/<id>/stats", "route", route("GET", lambda i: f"/users/{user_id}/stats")),
+        Scenario("PATCH /tasks/<id>", "route", route(
+            "PATCH", lambda i: f"/tasks/{task_id}", lambda i: {"task_name": f"renamed {i}"})),
+        Scenario("PATCH /tasks (50 items)", "route", route(
+            "PATCH", lambda i: "/tasks",
+            lambda i: {"tasks": [{"task_id": task_id + n, "task_name": f"batch {i}"} for n in range(50)]})),
+        Scenario("DELETE /tasks/<id>", "route", route(
+            "DELETE", lambda i: f"/tasks/{take_task_for_route()}?user_id={scratch_user_id}")),
+        Scenario("GET /pool/stats", "route", route("GET", lambda i: "/pool/stats")),
+        Scenario("GET /cache/stats", "route", route("GET", lambda i: "/cache/stats")),
+        Scenario("GET /metrics", "route", route("GET", lambda i: "/metrics")),
+        # TaskService
+        Scenario("TaskService.create_task", "service", lambda i: in_transaction(
+            app, lambda: tasks.create_task("bench", scratch_user_id, date(2026, 6, 1)))),
+        Scenario("TaskService.create_tasks_bulk", "service", lambda i: in_transaction(
+            app, lambda: tasks.create_tasks_bulk(
+                scratch_user_id, [{"task_name": "bench", "due_date": date(2026, 6, 1)}] * 100))),
+        Scenario("TaskService.get_tasks_for_user", "service", lambda i: in_transaction(
+            app, lambda: len(tasks.get_tasks_for_user(user_id)))),
+        Scenario("TaskService.get_tasks_page", "service", lambda i: in_transaction(
+            app, lambda: len(tasks.get_tasks_page(user_id, 100, after=task_id + i % 50)))),
+        Scenario("TaskService.iter_tasks_for_user", "service", lambda i: in_transaction(
+            app, lambda: sum(1 for _ in tasks.iter_tasks_for_user(user_id)))),
+        Scenario("TaskService.get_task_stats", "service", lambda i: in_transaction(
+            app, lambda: tasks.get_task_stats(user_id))),
+        Scenario("TaskService.get_task_by_id", "service", lambda i: in_transaction(
+            app, lambda: tasks.get_task_by_id(task_id))),
+        Scenario("TaskService.update_task", "service", lambda i: in_transaction(
+            app, lambda: tasks.update_task(task_id, tasks.get_task_by_id(task_id)))),
+        Scenario("TaskService.update_task_fields", "service", lambda i: in_transaction(
+            app, lambda: tasks.update_task_fields(task_id, {"task_name": f"renamed {i}"}))),
+        Scenario("TaskService.delete_task", "service", lambda i: in_transaction(
+            app, lambda: tasks.delete_task(take_task_for_service(), scratch_user_id))),
+        # UserService
+        Scenario("UserService.create_user", "service", lambda i: in_transaction(
+            app, lambda: users.create_user("bench", "user"))),
+        Scenario("UserService.get_user", "service", lambda i: in_transaction(
+            app, lambda: users.get_user(user_id))),
+        Scenario("UserService.update_user", "service", lambda i: in_transaction(
+            app, lambda: users.update_user(scratch_user_id, users.get_user(scratch_user_id)))),
+        Scenario("UserService.delete_user", "service", lambda i: in_transaction(
+            app, lambda: users.delete_user(take_user_for_service()))),
+    ]
+
+
+def postgres_available(url: str) -> bool:
+    try:
+        engine = sqlalchemy.create_engine(url)
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        engine.dispose()
+        return True
+    except Exception:
+        return False
+
+
+def run_backend(backend: str, database_url: str, tasks_per_user: int, concurrency_levels, requests: int, only):
+    settings = Settings(DATABASE_URL=database_url, POOL_SIZE=max(concurrency_levels), MAX_OVERFLOW=0)
+    app = create_app(settings)
+    Base.metadata.drop_all(app.engine)
+    Base.metadata.create_all(app.engine)
+    spare = requests * len(concurrency_levels) * 2
+    data = seed(app, tasks_per_user, spare)
+
+    results = []
+    for scenario, concurrency in itertools.product(build_scenarios(app, data), concurrency_levels):
+        if only and not any(part in scenario.name for part in only):
+            continue
+        summary = measure(scenario.operation, requests, concurrency)
+        results.append({
+            "name": scenario.name,
+            "kind": scenario.kind,
+            "backend": backend,
+            "tasks_per_user": tasks_per_user,
+            "concurrency": concurrency,
+            **summary,
+        })
+        print(
+            f"{backend:>10} {tasks_per_user:>8} c={concurrency:<3} {scenario.name:<45} "
+            f"{summary['throughput_ops_s']:>10.1f} op/s  p50={summary['p50_ms']:.2f}ms "
+            f"p95={summary['p95_ms']:.2f}ms p99={summary['p99_ms']:.2f}ms errors={summary['errors']}"
+        )
+    app.engine.dispose()
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks-per-user", type=_int_list, default=[1000, 10000],
+                        help="comma separated data sizes, e.g. 1000,100000,1000000")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8], help="comma separated thread counts")
+    parser.add_argument("--requests", type=int, default=200, help="operations per scenario")
+    parser.add_argument("--postgres-url", default=os.environ.get("BENCH_POSTGRES_URL"),
+                        help="PostgreSQL database to benchmark as well (it is dropped and recreated)")
+    parser.add_argument("--only", action="append", help="run only scenarios whose name contains this text")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    backends = []
+    with tempfile.TemporaryDirectory() as directory:
+        backends.append(("sqlite", f"sqlite:///{os.path.join(directory, 'bench.sqlite')}"))
+        if args.postgres_url:
+            if postgres_available(args.postgres_url):
+                backends.append(("postgresql", args.postgres_url))
+            else:
+                print(f"PostgreSQL at {args.postgres_url} is not reachable, skipping it.")
+
+        results = []
+        for (backend, url), size in itertools.product(backends, args.tasks_per_user):
+            results.extend(run_backend(backend, url, size, args.concurrency, args.requests, args.only))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "requests_per_scenario": args.requests,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
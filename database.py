@@ -0,0 +1,150 @@
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a free connection."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+class MonitoredAsyncQueuePool(AsyncAdaptedQueuePool, MonitoredQueuePool):
+    """MonitoredQueuePool for asyncio engines."""
+
+
+# drivers used when an asyncio engine is built from a plain DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "psycopg"}
+# task_stats is kept with INSERT ... ON CONFLICT and task search needs a full-text index
+# (tsvector or FTS5), which only these provide
+SUPPORTED_BACKENDS = ("postgresql", "sqlite")
+
+
+def _check_backend(url) -> None:
+    # checked when the engine is built, so an unsupported database stops the app at startup
+    # instead of failing every write with an error that blames the request
+    backend = url.get_backend_name()
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(
+            f"Unsupported database backend {backend}: task statistics and search need "
+            f"{' or '.join(SUPPORTED_BACKENDS)}."
+        )
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _disable_driver_transactions(dbapi_connection, connection_record) -> None:
+    # the driver opens transactions itself, but not before a SAVEPOINT, and releasing a
+    # savepoint outside a transaction commits it; _begin_sqlite emits BEGIN instead
+    dbapi_connection.isolation_level = None
+
+
+def _begin_sqlite(connection) -> None:
+    connection.exec_driver_sql("BEGIN")
+
+
+def _configure_sqlite(engine, url) -> None:
+    event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+    # in-memory databases share one connection between the sessions of a thread, so they
+    # cannot hold a transaction each and keep the driver's behaviour
+    if not _is_memory_sqlite(url):
+        event.listen(engine, "connect", _disable_driver_transactions)
+        event.listen(engine, "begin", _begin_sqlite)
+
+
+def _engine_kwargs(settings, url, poolclass) -> dict:
+    kwargs = {"pool_pre_ping": settings.POOL_PRE_PING}
+
+    # in-memory SQLite keeps its single-connection pool, everything else gets a sized queue pool
+    if not _is_memory_sqlite(url):
+        kwargs.update(
+            poolclass=poolclass,
+            pool_size=settings.POOL_SIZE,
+            max_overflow=settings.MAX_OVERFLOW,
+            pool_timeout=settings.POOL_TIMEOUT,
+            pool_recycle=settings.POOL_RECYCLE,
+        )
+    if settings.STATEMENT_TIMEOUT_MS and url.get_backend_name() == "postgresql":
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={settings.STATEMENT_TIMEOUT_MS}"}
+    return kwargs
+
+
+def build_engine(settings, database_url=None):
+    # database_url overrides settings.DATABASE_URL, e.g. for a replica with the same pool settings
+    url = make_url(database_url or settings.DATABASE_URL)
+    _check_backend(url)
+    engine = create_engine(url, **_engine_kwargs(settings, url, MonitoredQueuePool))
+    if url.get_backend_name() == "sqlite":
+        _configure_sqlite(engine, url)
+    return engine
+
+
+def async_database_url(database_url):
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if "+" not in url.drivername and backend in ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url
+
+
+def build_async_engine(settings):
+    # imported here so the synchronous app does not need greenlet installed
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_database_url(settings.DATABASE_URL)
+    _check_backend(url)
+    engine = create_async_engine(url, **_engine_kwargs(settings, url, MonitoredAsyncQueuePool))
+    if url.get_backend_name() == "sqlite":
+        _configure_sqlite(engine.sync_engine, url)
+    return engine
+
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, MonitoredQueuePool):
+        with pool._wait_lock:
+            checkouts = pool.checkouts
+            wait_total = pool.wait_seconds_total
+            wait_max = pool.wait_seconds_max
+        stats.update(
+            checkouts=checkouts,
+            wait_seconds_total=round(wait_total, 6),
+            wait_seconds_avg=round(wait_total / checkouts, 6) if checkouts else 0.0,
+            wait_seconds_max=round(wait_max, 6),
+        )
+    return stats
@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+
+# gunicorn -c gunicorn.conf.py; create the schema first with `flask --app app init-db`
+wsgi_app = "wsgi:application"
+bind = os.environ.get("BIND", "0.0.0.0:8080")
+
+# processes x threads; every thread may hold one pooled connection, so keep
+# POOL_SIZE + MAX_OVERFLOW >= threads and workers * that below the server's max_connections
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("WEB_THREADS", 4))
+worker_class = "gthread"
+
+# build the app once in the master; workers then drop the pool they inherited.
+# An in-process sweeper (SWEEPER_INTERVAL) then runs once, in the master; without
+# preloading every worker would start its own, so prefer `python -m sweeper` there.
+preload_app = os.environ.get("PRELOAD_APP", "true").lower() in ("1", "true", "yes", "on")
+
+# SIGTERM: stop accepting, let in-flight requests finish for up to graceful_timeout
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+
+def on_starting(server):
+    from settings import Settings
+
+    settings = Settings.from_env()
+    if settings.POOL_SIZE + settings.MAX_OVERFLOW < threads:
+        server.log.warning(
+            "POOL_SIZE + MAX_OVERFLOW (%s) is below threads per worker (%s); requests will wait on the pool.",
+            settings.POOL_SIZE + settings.MAX_OVERFLOW, threads,
+        )
+
+
+def post_fork(server, worker):
+    from wsgi import application
+
+    application.after_fork()
+
+
+def worker_exit(server, worker):
+    from wsgi import application
+
+    application.shutdown()
+
+
+def on_exit(server):
+    # the master's own app, when preloaded
+    if preload_app:
+        from wsgi import application
+
+        application.shutdown()
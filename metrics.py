@@ -0,0 +1,184 @@
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+# seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+@dataclass
+class QueryStats:
+    """Statements executed, and time spent in the driver, while handling one request."""
+
+    statements: int = 0
+    commits: int = 0
+    seconds: float = 0.0
+    over_budget: bool = False
+
+
+_current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def track_queries() -> QueryStats:
+    """Attribute statements executed from now on in this context to a fresh QueryStats."""
+    stats = QueryStats()
+    _current_query_stats.set(stats)
+    return stats
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current_query_stats.get()
+
+
+def stop_tracking_queries() -> None:
+    _current_query_stats.set(None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_started_at"].pop()
+    stats = _current_query_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += time.perf_counter() - started
+
+
+def _commit(conn) -> None:
+    stats = _current_query_stats.get()
+    if stats is not None:
+        stats.commits += 1
+
+
+def _handle_error(exception_context) -> None:
+    # failed statements never reach after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
+
+
+def instrument_engine(engine) -> None:
+    """Count and time every statement the engine sends to the database."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "commit", _commit)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def server_timing(stats: QueryStats, total_seconds: float) -> str:
+    return (
+        f'db;desc="{stats.statements} statements, {stats.commits} commits";dur={stats.seconds * 1000:.3f}, '
+        f"total;dur={total_seconds * 1000:.3f}"
+    )
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple, buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    bucket = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{bucket} {count}")
+                infinity = _format_labels(self.labelnames, labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{infinity} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-2]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class RequestMetrics:
+    """Per-route request and database metrics, rendered in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self.requests = Counter("http_requests_total", "Requests handled.", ("route", "method", "status"))
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds", "Time spent handling a request.", ("route", "method")
+        )
+        self.db_seconds = Histogram(
+            "db_query_duration_seconds", "Time spent executing SQL per request.", ("route", "method")
+        )
+        self.db_statements = Histogram(
+            "db_statements_per_request", "SQL statements executed per request.", ("route", "method"),
+            buckets=STATEMENT_BUCKETS,
+        )
+        self.over_budget = Counter(
+            "db_query_budget_exceeded_total", "Requests that ran more statements than QUERY_BUDGET.", ("route", "method")
+        )
+        self.admission = Counter(
+            "http_admission_total", "Admission decisions: admitted, queued (then admitted) or rejected.",
+            ("outcome", "reason"),
+        )
+
+    def observe(self, route: str, method: str, status: int, seconds: float, stats: QueryStats) -> None:
+        self.requests.inc((route, method, str(status)))
+        self.request_seconds.observe((route, method), seconds)
+        self.db_seconds.observe((route, method), stats.seconds)
+        self.db_statements.observe((route, method), stats.statements)
+        if stats.over_budget:
+            self.over_budget.inc((route, method))
+
+    def render(self) -> str:
+        lines = []
+        for metric in (
+            self.requests, self.request_seconds, self.db_seconds, self.db_statements, self.over_budget, self.admission
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
@@ -1,17 +1,39 @@
+from datetime import datetime, timezone
+
 from sqlalchemy import (
+    DDL,
     Column,
     Integer,
     String,
     Enum,
     ForeignKey,
     Date,
+    Index,
     TIMESTAMP,
+    event,
+    func,
+    literal_column,
     text
 )
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.schema import CreateIndex
 
 Base = declarative_base()
 
+# shared so PostgreSQL creates each enum type once
+TASK_STATUS = Enum("pending", "in-progress", "completed", name="task_status")
+TASK_PRIORITY = Enum("low", "medium", "high", name="task_priority")
+
+# inline literal rather than a bound parameter, so both planners can match queries to the partial index
+OPEN_TASK_PREDICATE = text("status <> 'completed'")
+COMPLETED_TASK_PREDICATE = text("status = 'completed'")
+
+
+def utcnow() -> datetime:
+    # naive UTC, like the TIMESTAMP columns; every writer stamps updated_at from this one clock
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -21,18 +43,151 @@ class User(Base):
     role = Column(String)
     created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
 
-    tasks = relationship("Task", back_populates="user")
+    # the database removes a user's tasks (ON DELETE CASCADE); never load them just to delete
+    tasks = relationship("Task", back_populates="user", cascade="all, delete", passive_deletes=True)
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # keyset pages walk a user's tasks by task_id without sorting them first
+        Index("ix_tasks_user_task", "user_id", "task_id"),
+        Index("ix_tasks_user_status_due_date", "user_id", "status", "due_date"),
+        Index("ix_tasks_user_priority", "user_id", "priority"),
+        # covers count() and max(updated_at) per user for list ETags
+        Index("ix_tasks_user_updated_at", "user_id", "updated_at"),
+        # matches TASK_NAME_TSVECTOR, which search queries filter on
+        Index(
+            "ix_tasks_task_name_fts", text("to_tsvector('simple', task_name)"), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        # only open tasks are indexed; the overdue sweeper pages through it by (due_date, task_id)
+        Index(
+            "ix_tasks_open_due_date",
+            "due_date",
+            "task_id",
+            postgresql_where=OPEN_TASK_PREDICATE,
+            sqlite_where=OPEN_TASK_PREDICATE,
+        ),
+        # the archiver takes the oldest completed tasks first without touching open ones
+        Index(
+            "ix_tasks_completed_updated_at",
+            "updated_at",
+            postgresql_where=COMPLETED_TASK_PREDICATE,
+            sqlite_where=COMPLETED_TASK_PREDICATE,
+        ),
+    )
 
     task_id = Column(Integer, primary_key=True)
     task_name = Column(String)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
-    status = Column(Enum("pending", "in-progress", "completed", name="task_status"), server_default="pending")
+    status = Column(TASK_STATUS, server_default="pending")
     due_date = Column(Date)
-    priority = Column(Enum("low", "medium", "high", name="task_priority"), server_default="medium")
+    priority = Column(TASK_PRIORITY, server_default="medium")
+    version = Column(Integer, nullable=False, server_default=text("1"))
+    # set on ORM flushes and Core INSERT/UPDATE statements alike; COPY writes it explicitly
+    updated_at = Column(TIMESTAMP, nullable=False, default=utcnow, onupdate=utcnow,
+                        server_default=text("CURRENT_TIMESTAMP"))
 
     user = relationship("User", back_populates="tasks")
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+# full-text search over task names: a GIN expression index on PostgreSQL (see Task) and
+# an external-content FTS5 table kept in step by triggers on SQLite
+TASKS_FTS_TABLE = "tasks_fts"
+for statement in (
+    f"CREATE VIRTUAL TABLE {TASKS_FTS_TABLE} USING fts5(task_name, content='tasks', content_rowid='task_id')",
+    f"""CREATE TRIGGER tasks_fts_after_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO {TASKS_FTS_TABLE}(rowid, task_name) VALUES (new.task_id, new.task_name);
+    END""",
+    f"""CREATE TRIGGER tasks_fts_after_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO {TASKS_FTS_TABLE}({TASKS_FTS_TABLE}, rowid, task_name) VALUES ('delete', old.task_id, old.task_name);
+    END""",
+    f"""CREATE TRIGGER tasks_fts_after_update AFTER UPDATE OF task_name ON tasks BEGIN
+        INSERT INTO {TASKS_FTS_TABLE}({TASKS_FTS_TABLE}, rowid, task_name) VALUES ('delete', old.task_id, old.task_name);
+        INSERT INTO {TASKS_FTS_TABLE}(rowid, task_name) VALUES (new.task_id, new.task_name);
+    END""",
+):
+    event.listen(Task.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Task.__table__, "after_drop", DDL(f"DROP TABLE IF EXISTS {TASKS_FTS_TABLE}").execute_if(dialect="sqlite")
+)
+
+
+TASK_NAME_TSVECTOR = func.to_tsvector(literal_column("'simple'"), Task.task_name)
+
+
+class TaskArchive(Base):
+    """Completed tasks moved out of tasks by the archiver; same columns plus archived_at.
+
+    Read only through TaskRepository when a caller asks for archived tasks, and still
+    counted in task_stats.
+    """
+
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        # archived pages are keyset-paginated by task_id like live ones
+        Index("ix_tasks_archive_user_task", "user_id", "task_id"),
+    )
+
+    # ids come from tasks, never generated here
+    task_id = Column(Integer, primary_key=True, autoincrement=False)
+    task_name = Column(String)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    created_at = Column(TIMESTAMP)
+    status = Column(TASK_STATUS)
+    due_date = Column(Date)
+    priority = Column(TASK_PRIORITY)
+    version = Column(Integer, nullable=False)
+    updated_at = Column(TIMESTAMP, nullable=False)
+    archived_at = Column(TIMESTAMP, nullable=False, default=utcnow, server_default=text("CURRENT_TIMESTAMP"))
+
+
+# columns tasks and tasks_archive share, in Task's order
+ARCHIVED_TASK_COLUMNS = tuple(column.key for column in Task.__table__.columns)
+
+
+def task_partitioning_statements() -> list[str]:
+    """PostgreSQL DDL turning tasks into a table partitioned by LIST (status).
+
+    Open and completed tasks then live in separate partitions with their own indexes, so
+    open-task queries and the archiver's DELETEs never touch each other's pages. Optional
+    and one-way: run once (flask partition-tasks) in a maintenance window; it rewrites the
+    table inside one transaction. The primary key becomes (task_id, status) because a
+    partitioned table's unique constraints must include the partition key; task_id stays
+    unique because every row still takes it from the tasks sequence.
+    """
+    dialect = postgresql.dialect()
+    statements = [
+        # keep the sequence when the old table is dropped
+        "ALTER SEQUENCE tasks_task_id_seq OWNED BY NONE",
+        "ALTER TABLE tasks RENAME TO tasks_unpartitioned",
+        "CREATE TABLE tasks (LIKE tasks_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY LIST (status)",
+        "ALTER TABLE tasks ADD PRIMARY KEY (task_id, status)",
+        "ALTER TABLE tasks ADD FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE",
+        "CREATE TABLE tasks_open PARTITION OF tasks FOR VALUES IN ('pending', 'in-progress')",
+        "CREATE TABLE tasks_completed PARTITION OF tasks FOR VALUES IN ('completed')",
+        "INSERT INTO tasks SELECT * FROM tasks_unpartitioned",
+        "DROP TABLE tasks_unpartitioned",
+        "ALTER SEQUENCE tasks_task_id_seq OWNED BY tasks.task_id",
+    ]
+    # indexes on the parent are created on every partition
+    statements.extend(
+        str(CreateIndex(index).compile(dialect=dialect))
+        for index in sorted(Task.__table__.indexes, key=lambda index: index.name)
+    )
+    return statements
+
+
+class TaskStats(Base):
+    """Task counts per (user, status, priority), kept in step with the tasks table by TaskRepository."""
+
+    __tablename__ = "task_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(TASK_STATUS, primary_key=True)
+    priority = Column(TASK_PRIORITY, primary_key=True)
+    count = Column(Integer, nullable=False, server_default=text("0"))
@@ -0,0 +1,34 @@
+from sqlalchemy import event
+from sqlalchemy.orm import raiseload
+
+from metrics import current_query_stats
+
+
+class QueryBudgetExceededError(RuntimeError):
+    pass
+
+
+def _raise_on_unplanned_lazy_load(orm_execute_state) -> None:
+    # relationships not loaded by an explicit eager option raise instead of
+    # emitting one SELECT per row when they are touched
+    if orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+
+def install_strict_loading(session_factory) -> None:
+    """Make every lazy relationship load in sessions from session_factory raise."""
+    event.listen(session_factory, "do_orm_execute", _raise_on_unplanned_lazy_load)
+
+
+def enforce_query_budget(engine, budget: int, strict: bool = False) -> None:
+    """Flag requests that execute more than budget statements; raise instead when strict."""
+
+    def check_budget(conn, cursor, statement, parameters, context, executemany) -> None:
+        stats = current_query_stats()
+        if stats is None or stats.statements < budget:
+            return
+        stats.over_budget = True
+        if strict:
+            raise QueryBudgetExceededError(f"Request exceeded its budget of {budget} SQL statements.")
+
+    event.listen(engine, "before_cursor_execute", check_budget)
@@ -0,0 +1,120 @@
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+# (router, session) reads of the current request go to; a None session means the primary.
+# Keyed by router because the value outlives the request in a worker thread.
+_request_read_session: ContextVar[tuple | None] = ContextVar("request_read_session", default=None)
+# (router, users the current request wrote to), pinned once its transaction commits
+_request_writes: ContextVar[tuple | None] = ContextVar("request_writes", default=None)
+# (router, {user_id: expires_at}) pins the client brought along, plus the ones this request adds
+_request_client_pins: ContextVar[tuple | None] = ContextVar("request_client_pins", default=None)
+
+
+class ReadRouter:
+    """Sends repository reads to a replica session and everything else to the primary.
+
+    Only requests that cannot write read from a replica; their reads go to the primary
+    anyway for a user who wrote within the last pin_seconds, so they see their own writes.
+    Pins are kept in this process and also handed to the client (client_pins), which
+    brings them back to whichever process serves its next request. Expiry times are
+    wall-clock seconds so every process reads them alike.
+    """
+
+    def __init__(self, primary, replicas=(), pin_seconds: float = 5.0, clock=time.time) -> None:
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.pin_seconds = pin_seconds
+        self.clock = clock
+        self._next_replica = itertools.cycle(self.replicas) if self.replicas else None
+        self._pins = {}
+        self._lock = threading.Lock()
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def begin_request(self, read_only: bool, client_pins: dict | None = None) -> None:
+        """client_pins: {user_id: expires_at} as returned by client_pins() on an earlier request."""
+        session = None
+        if read_only and self.replicas:
+            with self._lock:
+                # one replica per request, so its reads see one consistent lag
+                session = next(self._next_replica)
+        _request_read_session.set((self, session))
+        _request_writes.set((self, set()))
+        now = self.clock()
+        _request_client_pins.set(
+            (self, {user_id: expires_at for user_id, expires_at in (client_pins or {}).items() if expires_at > now})
+        )
+
+    def _current(self, variable: ContextVar):
+        value = variable.get()
+        if value is None or value[0] is not self:
+            return None
+        return value[1]
+
+    def read_session(self, user_id: int | None = None):
+        session = self._current(_request_read_session)
+        if session is None or (user_id is not None and self.is_pinned(user_id)):
+            with self._lock:
+                self.primary_reads += 1
+            return self.primary
+        with self._lock:
+            self.replica_reads += 1
+        return session
+
+    def note_write(self, *user_ids) -> None:
+        writes = self._current(_request_writes)
+        if writes is None:
+            # outside a request nothing reads from a replica
+            return
+        writes.update(user_id for user_id in user_ids if user_id is not None)
+
+    def pin_request_writes(self) -> bool:
+        """Pin the users the current request wrote to; call after its commit.
+
+        True when there were any, so client_pins() has changed.
+        """
+        writes = self._current(_request_writes)
+        if not writes:
+            return False
+        expires_at = self.clock() + self.pin_seconds
+        with self._lock:
+            for user_id in writes:
+                self._pins[user_id] = expires_at
+        client_pins = self._current(_request_client_pins)
+        if client_pins is not None:
+            client_pins.update(dict.fromkeys(writes, expires_at))
+        writes.clear()
+        return True
+
+    def client_pins(self) -> dict:
+        """{user_id: expires_at} for the client of the current request to send back."""
+        return dict(self._current(_request_client_pins) or {})
+
+    def is_pinned(self, user_id: int) -> bool:
+        client_expires_at = (self._current(_request_client_pins) or {}).get(user_id)
+        if client_expires_at is not None and client_expires_at > self.clock():
+            return True
+        with self._lock:
+            expires_at = self._pins.get(user_id)
+            if expires_at is None:
+                return False
+            if expires_at <= self.clock():
+                del self._pins[user_id]
+                return False
+            return True
+
+    def remove_sessions(self) -> None:
+        for replica in self.replicas:
+            replica.remove()
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = self.clock()
+            return {
+                "replicas": len(self.replicas),
+                "pinned_users": sum(1 for expires_at in self._pins.values() if expires_at > now),
+                "replica_reads": self.replica_reads,
+                "primary_reads": self.primary_reads,
+            }
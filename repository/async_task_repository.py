@@ -0,0 +1,125 @@
+from sqlalchemy import delete, insert, select, update
+
+from models import Task
+from repository.task_repository import task_load_options, tasks_from_page_rows, tasks_page_statement
+from repository.task_stats_repository import (
+    STATS_COLUMNS,
+    add_task_delta,
+    committed_stats_key,
+    task_stats_key_statement,
+)
+
+
+class AsyncTaskRepository:
+    def __init__(self, session, stats_repo=None) -> None:
+        self.session = session
+        self.stats_repo = stats_repo
+
+    async def _apply_stats(self, deltas: dict) -> None:
+        if deltas:
+            await self.stats_repo.apply_deltas_db(deltas)
+
+    async def create_task_db(self, task: Task) -> Task:
+        # a savepoint: a failed insert undoes itself, not the rest of the request's transaction
+        async with self.session.begin_nested():
+            self.session.add(task)
+            await self.session.flush()
+        if self.stats_repo is not None:
+            deltas = {}
+            add_task_delta(deltas, task.user_id, task.status, task.priority, 1)
+            await self._apply_stats(deltas)
+        return task
+
+    async def create_tasks_bulk(self, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        statement = insert(Task).returning(Task.task_id, sort_by_parameter_order=True)
+        async with self.session.begin_nested():
+            task_ids = (await self.session.scalars(statement, rows)).all()
+        if self.stats_repo is not None:
+            deltas = {}
+            for row in rows:
+                add_task_delta(deltas, row["user_id"], row.get("status", "pending"), row.get("priority", "medium"), 1)
+            await self._apply_stats(deltas)
+        return list(task_ids)
+
+    async def get_all_tasks_db(self, user_id: int, with_user: bool = False):
+        statement = select(Task).filter_by(user_id=user_id).options(*task_load_options(with_user))
+        return (await self.session.scalars(statement)).all()
+
+    async def get_tasks_page_db(self, user_id: int, limit: int, after: int | None = None, **filters):
+        rows = (await self.session.execute(tasks_page_statement(user_id, limit, after, **filters))).all()
+        return tasks_from_page_rows(rows)
+
+    async def iter_tasks_db(self, user_id: int, batch_size: int = 1000, after: int | None = None, **filters):
+        while True:
+            page = await self.get_tasks_page_db(user_id, batch_size, after, **filters) or []
+            for task in page:
+                yield task
+            if len(page) < batch_size:
+                return
+            after = page[-1].task_id
+
+    async def get_task_by_id_db(self, task_id: int, user_id: int | None = None, with_user: bool = False):
+        statement = select(Task).filter_by(task_id=task_id).options(*task_load_options(with_user))
+        if user_id is not None:
+            statement = statement.filter_by(user_id=user_id)
+        return (await self.session.scalars(statement)).first()
+
+    async def update_task_db(self, task: Task):
+        # no autoflush, so the previous values are still in the attribute history
+        with self.session.no_autoflush:
+            task = await self.session.merge(task)
+        if self.stats_repo is not None:
+            deltas = {}
+            add_task_delta(deltas, *committed_stats_key(task), -1)
+            add_task_delta(deltas, task.user_id, task.status, task.priority, 1)
+        await self.session.flush()
+        if self.stats_repo is not None:
+            await self._apply_stats(deltas)
+        return task
+
+    async def update_task_fields_db(self, task_id: int, changes: dict, version: int | None = None):
+        before = None
+        if self.stats_repo is not None and any(column in changes for column in STATS_COLUMNS):
+            before = (await self.session.execute(task_stats_key_statement(task_id))).first()
+
+        statement = update(Task).where(Task.task_id == task_id)
+        if version is not None:
+            statement = statement.where(Task.version == version)
+        statement = statement.values(**changes, version=Task.version + 1).returning(Task)
+        async with self.session.begin_nested():
+            task = (await self.session.scalars(statement)).first()
+        if before is not None and task is not None:
+            deltas = {}
+            add_task_delta(deltas, *before, -1)
+            add_task_delta(deltas, task.user_id, task.status, task.priority, 1)
+            await self._apply_stats(deltas)
+        return task
+
+    async def delete_task_db(self, task) -> None:
+        if self.stats_repo is not None:
+            deltas = {}
+            add_task_delta(deltas, *committed_stats_key(task), -1)
+        await self.session.delete(task)
+        await self.session.flush()
+        if self.stats_repo is not None:
+            await self._apply_stats(deltas)
+
+    async def delete_task_by_id_db(self, task_id: int, user_id: int) -> int:
+        statement = delete(Task).where(Task.task_id == task_id, Task.user_id == user_id)
+        if self.stats_repo is None:
+            result = await self.session.execute(statement, execution_options={"synchronize_session": False})
+            return result.rowcount
+
+        deleted = (
+            await self.session.execute(
+                statement.returning(Task.user_id, Task.status, Task.priority),
+                execution_options={"synchronize_session": False},
+            )
+        ).all()
+        deltas = {}
+        for row in deleted:
+            add_task_delta(deltas, *row, -1)
+        await self._apply_stats(deltas)
+        return len(deleted)
@@ -0,0 +1,34 @@
+from datetime import date
+
+from repository.task_stats_repository import (
+    overdue_count_statement,
+    rebuild_task_stats_statements,
+    task_stats_from_rows,
+    task_stats_rows,
+    task_stats_upsert,
+    user_stats_statement,
+)
+
+
+class AsyncTaskStatsRepository:
+    def __init__(self, session) -> None:
+        self.session = session
+
+    async def apply_deltas_db(self, deltas: dict) -> None:
+        rows = task_stats_rows(deltas)
+        if not rows:
+            return
+        dialect_name = self.session.get_bind().dialect.name
+        await self.session.execute(task_stats_upsert(dialect_name), rows)
+
+    async def get_user_stats_db(self, user_id: int, today: date):
+        rows = (await self.session.execute(user_stats_statement(user_id))).all()
+        if not rows:
+            return None
+        overdue = await self.session.scalar(overdue_count_statement(user_id, today))
+        return task_stats_from_rows(rows, overdue)
+
+    async def rebuild_db(self, user_id: int | None = None) -> None:
+        clear, fill = rebuild_task_stats_statements(user_id)
+        await self.session.execute(clear, execution_options={"synchronize_session": False})
+        await self.session.execute(fill)
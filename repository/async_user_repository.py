@@ -0,0 +1,40 @@
+from sqlalchemy import delete, exists, select
+from sqlalchemy.orm import selectinload
+
+from models import User
+
+
+class AsyncUserRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def create_user_db(self, user: User) -> User:
+        self.session.add(user)
+        await self.session.flush()
+        return user
+
+    async def update_user_db(self, user: User):
+        user = await self.session.merge(user)
+        await self.session.flush()
+        return user
+
+    async def get_user_by_id_db(self, user_id: int, with_tasks: bool = False):
+        statement = select(User).filter_by(id=user_id)
+        if with_tasks:
+            statement = statement.options(selectinload(User.tasks))
+        return (await self.session.scalars(statement)).first()
+
+    async def user_exists_db(self, user_id: int) -> bool:
+        return await self.session.scalar(select(exists().where(User.id == user_id)))
+
+    async def delete_user_db(self, user: User) -> None:
+        await self.session.delete(user)
+        await self.session.flush()
+
+    async def delete_user_by_id_db(self, user_id: int) -> int:
+        # a single DELETE; tasks go with it through ON DELETE CASCADE
+        result = await self.session.execute(
+            delete(User).where(User.id == user_id),
+            execution_options={"synchronize_session": False},
+        )
+        return result.rowcount
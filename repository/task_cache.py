@@ -0,0 +1,188 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from models import Task
+from repository.task_repository import TaskRepository
+
+
+class TaskCacheBackend(ABC):
+    """Storage used by CachedTaskRepository. Values are plain column dicts."""
+
+    @abstractmethod
+    def get(self, key):
+        """Return the cached value or None."""
+
+    @abstractmethod
+    def set(self, key, value) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key) -> None:
+        ...
+
+    @abstractmethod
+    def delete_where(self, predicate) -> None:
+        """Drop every entry whose value satisfies predicate(value)."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class LRUTTLCache(TaskCacheBackend):
+    def __init__(self, maxsize: int = 10_000, ttl: float = 30.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate) -> None:
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def _task_columns(task: Task) -> dict:
+    return {attribute.key: getattr(task, attribute.key) for attribute in Task.__mapper__.column_attrs}
+
+
+# Session.info key of the invalidations to repeat once the session's transaction commits
+PENDING_INVALIDATIONS = "task_cache_invalidations"
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_writes(session) -> None:
+    if session.in_nested_transaction():
+        # a released savepoint; other transactions see nothing until the outer commit
+        return
+    for invalidate in session.info.pop(PENDING_INVALIDATIONS, ()):
+        invalidate()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_invalidations(session, transaction) -> None:
+    # a rolled back transaction changed nothing, so whatever was cached meanwhile is still right
+    if transaction.parent is None:
+        session.info.pop(PENDING_INVALIDATIONS, None)
+
+
+class CachedTaskRepository(TaskRepository):
+    """TaskRepository with a read-through cache in front of get_task_by_id_db.
+
+    Writes invalidate the cached entry at once, so the writing transaction never reads
+    its old row, and again after the transaction commits, so a reader that cached the
+    old row meanwhile does not keep serving it for the whole TTL. Misses read from the
+    primary, never from a replica, so a lagging replica cannot fill the cache.
+    """
+
+    def __init__(self, session, cache: TaskCacheBackend, stats_repo=None, router=None) -> None:
+        super().__init__(session, stats_repo, router)
+        self.cache = cache
+
+    def get_task_by_id_db(self, task_id: int, user_id: int | None = None, with_user: bool = False):
+        if with_user:
+            # the cache only holds task columns
+            return super().get_task_by_id_db(task_id, user_id, with_user=True)
+        columns = self.cache.get(task_id)
+        if columns is None:
+            task = self.session.query(Task).filter_by(task_id=task_id).first()
+            if task is None:
+                return None
+            self.cache.set(task_id, _task_columns(task))
+        else:
+            # rebuild a clean detached instance and attach it without a SELECT
+            task = Task(**columns)
+            make_transient_to_detached(task)
+            task = self.session.merge(task, load=False)
+        if user_id is not None and task.user_id != user_id:
+            return None
+        return task
+
+    def _invalidate(self, invalidate) -> None:
+        invalidate()
+        self.session.info.setdefault(PENDING_INVALIDATIONS, []).append(invalidate)
+
+    def _invalidate_tasks(self, task_ids) -> None:
+        task_ids = list(task_ids)
+
+        def invalidate() -> None:
+            for task_id in task_ids:
+                self.cache.delete(task_id)
+
+        self._invalidate(invalidate)
+
+    def update_task_db(self, task: Task):
+        self._invalidate_tasks([task.task_id])
+        return super().update_task_db(task)
+
+    def update_task_fields_db(self, task_id: int, changes: dict, version: int | None = None):
+        self._invalidate_tasks([task_id])
+        return super().update_task_fields_db(task_id, changes, version)
+
+    def update_tasks_fields_db(self, updates: list[tuple]):
+        self._invalidate_tasks(task_id for task_id, _, _ in updates)
+        return super().update_tasks_fields_db(updates)
+
+    def delete_task_db(self, task) -> None:
+        self._invalidate_tasks([task.task_id])
+        return super().delete_task_db(task)
+
+    def delete_task_by_id_db(self, task_id: int, user_id: int) -> int:
+        self._invalidate_tasks([task_id])
+        return super().delete_task_by_id_db(task_id, user_id)
+
+    def forget_user_tasks(self, user_id: int) -> None:
+        self._invalidate(lambda: self.cache.delete_where(lambda columns: columns["user_id"] == user_id))
+
+    def archive_completed_tasks_db(self, completed_before, limit: int) -> list[int]:
+        task_ids = super().archive_completed_tasks_db(completed_before, limit)
+        self._invalidate_tasks(task_ids)
+        return task_ids
@@ -1,26 +1,578 @@
-from models import Task
+import csv
+import io
+import re
+from datetime import date, datetime
+from typing import NamedTuple
+
+from sqlalchemy import (
+    and_,
+    bindparam,
+    column,
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    table,
+    true,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
+
+from models import (
+    ARCHIVED_TASK_COLUMNS,
+    COMPLETED_TASK_PREDICATE,
+    OPEN_TASK_PREDICATE,
+    TASK_NAME_TSVECTOR,
+    TASKS_FTS_TABLE,
+    Task,
+    TaskArchive,
+    User,
+    utcnow,
+)
+from repository.task_stats_repository import (
+    STATS_COLUMNS,
+    add_task_delta,
+    committed_stats_key,
+    task_stats_key_statement,
+)
+
+
+TASK_UPDATED = "updated"
+TASK_NOT_FOUND = "not_found"
+TASK_VERSION_CONFLICT = "conflict"
+
+
+class TaskUpdateResult(NamedTuple):
+    """Outcome of one item of update_tasks_fields_db; version is the new one, or the current one on conflict."""
+
+    task_id: int
+    outcome: str
+    version: int | None
+
+
+class TaskRecord(NamedTuple):
+    """A task row read with Core: a plain tuple, no identity map or change tracking."""
+
+    task_id: int
+    task_name: str
+    status: str
+    due_date: date
+    priority: str
+    version: int
+
+
+# column order of the rows handed to import_tasks_db
+IMPORT_COLUMNS = ("task_name", "user_id", "status", "due_date", "priority")
+
+TASK_RECORD_COLUMNS = (Task.task_id, Task.task_name, Task.status, Task.due_date, Task.priority, Task.version)
+
+
+def task_filter_conditions(
+        model,
+        status: str | None = None,
+        priority: str | None = None,
+        due_before: date | None = None,
+        due_after: date | None = None,
+) -> list:
+    """List filters as conditions on model, Task or TaskArchive."""
+    conditions = []
+    if status is not None:
+        conditions.append(model.status == status)
+    if priority is not None:
+        conditions.append(model.priority == priority)
+    if due_before is not None:
+        conditions.append(model.due_date < due_before)
+    if due_after is not None:
+        conditions.append(model.due_date > due_after)
+    return conditions
+
+
+def tasks_with_archive_subquery(user_id: int, columns: tuple, after: int | None = None, **filters):
+    # each branch is filtered on its own, so both are range scans on the user's rows
+    branches = []
+    for model in (Task, TaskArchive):
+        branch = select(*(getattr(model, task_column.key) for task_column in columns)).where(
+            model.user_id == user_id, *task_filter_conditions(model, **filters)
+        )
+        if after is not None:
+            branch = branch.where(model.task_id > after)
+        branches.append(branch)
+    return union_all(*branches).subquery("tasks_with_archive")
+
+
+def tasks_page_statement(
+        user_id: int,
+        limit: int,
+        after: int | None = None,
+        status: str | None = None,
+        priority: str | None = None,
+        due_before: date | None = None,
+        due_after: date | None = None,
+        with_user: bool = False,
+        columns: tuple | None = None,
+        include_archived: bool = False,
+):
+    filters = {"status": status, "priority": priority, "due_before": due_before, "due_after": due_after}
+    if include_archived:
+        if columns is None:
+            raise ValueError("Archived tasks can only be listed as records, not as Task entities.")
+        tasks = tasks_with_archive_subquery(user_id, columns, after, **filters)
+        return (
+            select(User.id, *tasks.c)
+            .outerjoin(tasks, true())
+            .where(User.id == user_id)
+            .order_by(tasks.c.task_id)
+            .limit(limit)
+        )
+    # outer join from users answers "does the user exist" in the same statement.
+    # Filters sit in the join condition so they are served by the
+    # (user_id, status, due_date) and (user_id, priority) indexes.
+    conditions = [Task.user_id == User.id, *task_filter_conditions(Task, **filters)]
+    if after is not None:
+        conditions.append(Task.task_id > after)
+    # columns selects plain values instead of Task entities
+    statement = (
+        select(User.id, *(columns or (Task,)))
+        .outerjoin(Task, and_(*conditions))
+        .where(User.id == user_id)
+        .order_by(Task.task_id)
+        .limit(limit)
+    )
+    if columns is None:
+        statement = statement.options(*task_load_options(with_user))
+    return statement
+
+
+def task_load_options(with_user: bool = False) -> list:
+    # Task.user is many-to-one, so a joined eager load adds a join rather than a query per row
+    return [joinedload(Task.user)] if with_user else []
+
+
+def task_export_statement(user_id: int, include_archived: bool = False, **filters):
+    if include_archived:
+        tasks = tasks_with_archive_subquery(user_id, TASK_RECORD_COLUMNS, **filters)
+        return select(*tasks.c).order_by(tasks.c.status, tasks.c.due_date)
+    # ordered like ix_tasks_user_status_due_date so rows come straight off the index, no sort
+    statement = select(*TASK_RECORD_COLUMNS).where(Task.user_id == user_id, *task_filter_conditions(Task, **filters))
+    return statement.order_by(Task.user_id, Task.status, Task.due_date)
+
+
+def overdue_tasks_statement(today: date, limit: int, after: tuple | None = None):
+    # keyset on (due_date, task_id) over ix_tasks_open_due_date; after is the last row's pair
+    statement = select(*TASK_RECORD_COLUMNS).where(OPEN_TASK_PREDICATE, Task.due_date < today)
+    if after is not None:
+        statement = statement.where(tuple_(Task.due_date, Task.task_id) > tuple_(*after))
+    return statement.order_by(Task.due_date, Task.task_id).limit(limit)
+
+
+def archivable_tasks_statement(dialect_name: str, completed_before: datetime, limit: int):
+    """Ids of the oldest completed tasks last changed before completed_before, locked."""
+    statement = (
+        select(Task.task_id)
+        .where(COMPLETED_TASK_PREDICATE, Task.updated_at < completed_before)
+        .order_by(Task.updated_at)
+        .limit(limit)
+    )
+    if dialect_name == "postgresql":
+        # concurrent archivers take disjoint batches instead of queueing on the same rows
+        return statement.with_for_update(skip_locked=True)
+    return statement.with_for_update()
+
+
+def archive_tasks_statements(task_ids) -> tuple:
+    """INSERT INTO tasks_archive ... SELECT and the DELETE that moves the tasks out of tasks."""
+    columns = [getattr(Task, name) for name in ARCHIVED_TASK_COLUMNS]
+    copy = insert(TaskArchive).from_select(
+        [getattr(TaskArchive, name) for name in ARCHIVED_TASK_COLUMNS],
+        select(*columns).where(Task.task_id.in_(task_ids)),
+    )
+    remove = delete(Task).where(Task.task_id.in_(task_ids))
+    return copy, remove
+
+
+def tasks_for_update_statement(task_ids):
+    # locked in task_id order, so concurrent batches cannot deadlock on each other
+    return (
+        select(Task.task_id, Task.version, Task.user_id, Task.status, Task.priority)
+        .where(Task.task_id.in_(task_ids))
+        .order_by(Task.task_id)
+        .with_for_update()
+    )
+
+
+def task_fields_update_statement(columns: tuple, guarded: bool):
+    """UPDATE ... WHERE task_id = :b_task_id [AND version = :b_version], run once per parameter set."""
+    statement = update(Task).where(Task.task_id == bindparam("b_task_id"))
+    if guarded:
+        statement = statement.where(Task.version == bindparam("b_version"))
+    # SET parameters cannot share a column's name
+    return statement.values(
+        {column_name: bindparam(f"new_{column_name}") for column_name in columns}
+    ).values(version=Task.version + 1, updated_at=bindparam("new_updated_at"))
+
+
+def fts5_match_query(query: str) -> str:
+    # every word quoted, so user input can never be read as FTS5 query syntax
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def search_tasks_statement(dialect_name: str, user_id: int, query: str, limit: int, after: tuple | None = None):
+    """The user's tasks matching query, best score first; after is the last row's (score, task_id)."""
+    if dialect_name == "postgresql":
+        # GIN lookup on ix_tasks_task_name_fts
+        tsquery = func.websearch_to_tsquery(literal_column("'simple'"), query)
+        score = func.ts_rank(TASK_NAME_TSVECTOR, tsquery)
+        statement = select(*TASK_RECORD_COLUMNS, score.label("score")).where(
+            Task.user_id == user_id, TASK_NAME_TSVECTOR.op("@@")(tsquery)
+        )
+    elif dialect_name == "sqlite":
+        fts = table(TASKS_FTS_TABLE, column("rowid"))
+        fts_table = literal_column(TASKS_FTS_TABLE)
+        # bm25 is lower for better matches
+        score = -func.bm25(fts_table)
+        statement = (
+            select(*TASK_RECORD_COLUMNS, score.label("score"))
+            .join_from(Task, fts, fts.c.rowid == Task.task_id)
+            .where(Task.user_id == user_id, fts_table.op("MATCH")(fts5_match_query(query)))
+        )
+    else:
+        raise ValueError(f"Task search is not supported on {dialect_name}.")
+    if after is not None:
+        after_score, after_task_id = after
+        statement = statement.where(
+            or_(score < after_score, and_(score == after_score, Task.task_id > after_task_id))
+        )
+    return statement.order_by(score.desc(), Task.task_id).limit(limit)
+
+
+def tasks_version_statement(user_id: int):
+    # answered from ix_tasks_user_updated_at alone: updated_at is NOT NULL, so counting it
+    # counts tasks without reading task_id from the table. No row means the user does not exist
+    return (
+        select(func.count(Task.updated_at), func.max(Task.updated_at))
+        .select_from(User)
+        .outerjoin(Task, Task.user_id == User.id)
+        .where(User.id == user_id)
+        .group_by(User.id)
+    )
+
+
+def tasks_from_page_rows(rows):
+    # no rows at all means the user does not exist
+    if not rows:
+        return None
+    return [task for _, task in rows if task is not None]
+
+
+def task_records_from_page_rows(rows):
+    if not rows:
+        return None
+    return [TaskRecord._make(row[1:]) for row in rows if row[1] is not None]
 
 
 class TaskRepository:
-    def __init__(self, session) -> None:
+    def __init__(self, session, stats_repo=None, router=None) -> None:
         self.session = session
+        # when set, every write also moves the task_stats counts in the same transaction
+        self.stats_repo = stats_repo
+        # when set, reads may go to a replica (see read_routing.ReadRouter)
+        self.router = router
+
+    def _apply_stats(self, deltas: dict) -> None:
+        if deltas:
+            self.stats_repo.apply_deltas_db(deltas)
+
+    def _read_session(self, user_id: int | None = None):
+        if self.router is None:
+            return self.session
+        return self.router.read_session(user_id)
+
+    def _note_write(self, *user_ids) -> None:
+        if self.router is not None:
+            self.router.note_write(*user_ids)
+
+    def forget_user_tasks(self, user_id: int) -> None:
+        """Called once a user and, by cascade, their tasks are deleted; nothing is cached here."""
 
     def create_task_db(self, task: Task) -> Task:
-        self.session.add(task)
-        self.session.commit()
+        # a savepoint: a failed insert undoes itself, not the rest of the request's transaction
+        with self.session.begin_nested():
+            self.session.add(task)
+            self.session.flush()
+        if self.stats_repo is not None:
+            deltas = {}
+            add_task_delta(deltas, task.user_id, task.status, task.priority, 1)
+            self._apply_stats(deltas)
+        self._note_write(task.user_id)
         return task
 
-    def get_all_tasks_db(self, user_id: int):
-        return self.session.query(Task).filter_by(user_id=user_id).all()
+    def create_tasks_bulk(self, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        # one executemany INSERT ... RETURNING, ids come back in the order of rows
+        statement = insert(Task).returning(Task.task_id, sort_by_parameter_order=True)
+        with self.session.begin_nested():
+            task_ids = self.session.scalars(statement, rows).all()
+        if self.stats_repo is not None:
+            deltas = {}
+            for row in rows:
+                add_task_delta(deltas, row["user_id"], row.get("status", "pending"), row.get("priority", "medium"), 1)
+            self._apply_stats(deltas)
+        self._note_write(*{row["user_id"] for row in rows})
+        return list(task_ids)
+
+    def import_tasks_db(self, rows: list[dict]) -> int:
+        """Load validated rows as fast as the backend allows: COPY on PostgreSQL, executemany elsewhere."""
+        if not rows:
+            return 0
+        with self.session.begin_nested():
+            if self.session.get_bind().dialect.name == "postgresql":
+                self._copy_tasks(rows)
+            else:
+                self.session.execute(insert(Task), rows)
+        if self.stats_repo is not None:
+            deltas = {}
+            for row in rows:
+                add_task_delta(deltas, row["user_id"], row["status"], row["priority"], 1)
+            self._apply_stats(deltas)
+        self._note_write(*{row["user_id"] for row in rows})
+        return len(rows)
+
+    def _copy_tasks(self, rows: list[dict]) -> None:
+        # COPY runs on the DBAPI connection of the session's transaction
+        # COPY skips Python-side defaults, so updated_at comes from the same clock as other writes
+        updated_at = utcnow()
+        copy_sql = f"COPY {Task.__tablename__} ({', '.join(IMPORT_COLUMNS)}, updated_at) FROM STDIN"
+        connection = self.session.connection()
+        dbapi = connection.dialect.loaded_dbapi
+        try:
+            with connection.connection.driver_connection.cursor() as cursor:
+                if hasattr(cursor, "copy"):
+                    # psycopg 3
+                    with cursor.copy(copy_sql) as copy:
+                        for row in rows:
+                            copy.write_row([*(row[column] for column in IMPORT_COLUMNS), updated_at])
+                else:
+                    # psycopg2
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    for row in rows:
+                        writer.writerow(
+                            ["" if row[column] is None else row[column] for column in IMPORT_COLUMNS] + [updated_at]
+                        )
+                    buffer.seek(0)
+                    cursor.copy_expert(f"{copy_sql} WITH (FORMAT csv)", buffer)
+        except dbapi.IntegrityError as error:
+            # raised by the driver directly, so SQLAlchemy has not wrapped it
+            raise IntegrityError(copy_sql, None, error) from error
+
+    def get_tasks_version_db(self, user_id: int) -> tuple | None:
+        """(task count, latest updated_at) for the user's tasks, or None for an unknown user."""
+        row = self._read_session(user_id).execute(tasks_version_statement(user_id)).first()
+        return tuple(row) if row is not None else None
+
+    def search_tasks_db(self, user_id: int, query: str, limit: int, after: tuple | None = None) -> list[tuple]:
+        """(TaskRecord, score) pairs, best match first."""
+        session = self._read_session(user_id)
+        statement = search_tasks_statement(session.get_bind().dialect.name, user_id, query, limit, after)
+        return [(TaskRecord._make(row[:-1]), row[-1]) for row in session.execute(statement)]
+
+    def get_all_tasks_db(self, user_id: int, with_user: bool = False, include_archived: bool = False):
+        """The user's tasks; with include_archived, followed by their TaskArchive rows."""
+        session = self._read_session(user_id)
+        query = session.query(Task)
+        if with_user:
+            query = query.options(*task_load_options(with_user))
+        tasks = query.filter_by(user_id=user_id).all()
+        if include_archived:
+            tasks.extend(session.query(TaskArchive).filter_by(user_id=user_id).order_by(TaskArchive.task_id))
+        return tasks
+
+    def get_tasks_page_db(self, user_id: int, limit: int, after: int | None = None, **filters):
+        rows = self._read_session(user_id).execute(tasks_page_statement(user_id, limit, after, **filters)).all()
+        return tasks_from_page_rows(rows)
 
-    def get_task_by_id_db(self, task_id: int, user_id: int):
-        return self.session.query(Task).filter_by(task_id=task_id, user_id=user_id).first()
+    def iter_tasks_db(self, user_id: int, batch_size: int = 1000, after: int | None = None, **filters):
+        # keyset pagination on task_id keeps at most one batch in memory
+        while True:
+            page = self.get_tasks_page_db(user_id, batch_size, after, **filters) or []
+            yield from page
+            if len(page) < batch_size:
+                return
+            after = page[-1].task_id
+
+    def get_task_records_page_db(self, user_id: int, limit: int, after: int | None = None, **filters):
+        statement = tasks_page_statement(user_id, limit, after, columns=TASK_RECORD_COLUMNS, **filters)
+        return task_records_from_page_rows(self._read_session(user_id).execute(statement).all())
+
+    def iter_task_record_pages_db(self, user_id: int, batch_size: int = 1000, after: int | None = None, **filters):
+        # whole pages, so a serializer can encode each batch in one call
+        while True:
+            page = self.get_task_records_page_db(user_id, batch_size, after, **filters) or []
+            if page:
+                yield page
+            if len(page) < batch_size:
+                return
+            after = page[-1].task_id
+
+    def stream_task_records_db(self, user_id: int, batch_size: int = 1000, **filters):
+        """Yield TaskRecord lists of batch_size from one server-side cursor.
+
+        Nothing runs until the generator is first advanced, so a streamed response
+        opens the cursor on the session it is served from.
+        """
+        statement = task_export_statement(user_id, **filters).execution_options(
+            stream_results=True, yield_per=batch_size
+        )
+        result = self._read_session(user_id).execute(statement)
+        try:
+            for rows in result.partitions():
+                yield [TaskRecord._make(row) for row in rows]
+        finally:
+            result.close()
+
+    def get_overdue_tasks_page_db(self, today: date, limit: int, after: tuple | None = None) -> list[TaskRecord]:
+        return [TaskRecord._make(row) for row in self.session.execute(overdue_tasks_statement(today, limit, after))]
+
+    def archive_completed_tasks_db(self, completed_before: datetime, limit: int) -> list[int]:
+        """Move up to limit completed tasks last changed before completed_before into tasks_archive.
+
+        Returns the archived ids. task_stats keep counting archived tasks, so no stats move.
+        """
+        dialect_name = self.session.get_bind().dialect.name
+        task_ids = self.session.scalars(archivable_tasks_statement(dialect_name, completed_before, limit)).all()
+        if not task_ids:
+            return []
+        copy, remove = archive_tasks_statements(task_ids)
+        self.session.execute(copy)
+        self.session.execute(remove, execution_options={"synchronize_session": False})
+        return list(task_ids)
+
+    def get_task_by_id_db(self, task_id: int, user_id: int | None = None, with_user: bool = False):
+        query = self._read_session(user_id).query(Task)
+        if with_user:
+            query = query.options(*task_load_options(with_user))
+        if user_id is None:
+            return query.filter_by(task_id=task_id).first()
+        return query.filter_by(task_id=task_id, user_id=user_id).first()
 
     def update_task_db(self, task: Task):
-        task = self.session.merge(task)
-        self.session.commit()
-        return self.session.commit()
+        # no autoflush, so the previous values are still in the attribute history
+        with self.session.no_autoflush:
+            task = self.session.merge(task)
+        if self.stats_repo is not None:
+            deltas = {}
+            add_task_delta(deltas, *committed_stats_key(task), -1)
+            add_task_delta(deltas, task.user_id, task.status, task.priority, 1)
+        if self.router is not None:
+            # a moved task is a write for its previous owner too
+            self._note_write(committed_stats_key(task)[0], task.user_id)
+        self.session.flush()
+        if self.stats_repo is not None:
+            self._apply_stats(deltas)
+        return task
+
+    def update_task_fields_db(self, task_id: int, changes: dict, version: int | None = None):
+        # only changes that move the task to another summary row need its previous values
+        before = None
+        if (self.stats_repo is not None and any(column in changes for column in STATS_COLUMNS)) or (
+            self.router is not None and "user_id" in changes
+        ):
+            before = self.session.execute(task_stats_key_statement(task_id)).first()
+
+        # single UPDATE ... RETURNING; a version guard turns concurrent edits into "no row"
+        statement = update(Task).where(Task.task_id == task_id)
+        if version is not None:
+            statement = statement.where(Task.version == version)
+        statement = statement.values(**changes, version=Task.version + 1).returning(Task)
+        with self.session.begin_nested():
+            task = self.session.scalars(statement).first()
+        if before is not None and task is not None and self.stats_repo is not None:
+            deltas = {}
+            add_task_delta(deltas, *before, -1)
+            add_task_delta(deltas, task.user_id, task.status, task.priority, 1)
+            self._apply_stats(deltas)
+        if task is not None and self.router is not None:
+            self._note_write(task.user_id, before[0] if before is not None else None)
+        return task
+
+    def update_tasks_fields_db(self, updates: list[tuple]) -> list[TaskUpdateResult]:
+        """Apply (task_id, changes, version) items with one locking SELECT and one
+        executemany UPDATE per set of changed columns (and whether a version is expected).
+        Each task_id at most once."""
+        if not updates:
+            return []
+        current = {
+            row.task_id: row
+            for row in self.session.execute(tasks_for_update_statement([task_id for task_id, _, _ in updates]))
+        }
+        updated_at = utcnow()
+        results = []
+        parameters_by_columns = {}
+        deltas = {}
+        for task_id, changes, version in updates:
+            row = current.get(task_id)
+            if row is None:
+                results.append(TaskUpdateResult(task_id, TASK_NOT_FOUND, None))
+                continue
+            if version is not None and version != row.version:
+                results.append(TaskUpdateResult(task_id, TASK_VERSION_CONFLICT, row.version))
+                continue
+            parameters = {f"new_{column_name}": value for column_name, value in changes.items()}
+            parameters.update(b_task_id=task_id, new_updated_at=updated_at)
+            if version is not None:
+                parameters["b_version"] = version
+            key = (tuple(sorted(changes)), version is not None)
+            parameters_by_columns.setdefault(key, []).append(parameters)
+            results.append(TaskUpdateResult(task_id, TASK_UPDATED, row.version + 1))
+
+            after = {"user_id": row.user_id, "status": row.status, "priority": row.priority, **changes}
+            add_task_delta(deltas, row.user_id, row.status, row.priority, -1)
+            add_task_delta(deltas, after["user_id"], after["status"], after["priority"], 1)
+            self._note_write(row.user_id, after["user_id"])
+
+        connection = self.session.connection()
+        for (columns, guarded), parameters in parameters_by_columns.items():
+            result = connection.execute(task_fields_update_statement(columns, guarded), parameters)
+            # rows are locked, so a short count means a backend without FOR UPDATE (SQLite) raced
+            if guarded and connection.dialect.supports_sane_multi_rowcount and result.rowcount != len(parameters):
+                raise StaleDataError("Tasks changed while the batch update ran.")
+        if self.stats_repo is not None:
+            self._apply_stats(deltas)
+        return results
 
     def delete_task_db(self, task) -> None:
+        if self.stats_repo is not None:
+            deltas = {}
+            add_task_delta(deltas, *committed_stats_key(task), -1)
+        self._note_write(task.user_id)
         self.session.delete(task)
-        self.session.commit()
+        self.session.flush()
+        if self.stats_repo is not None:
+            self._apply_stats(deltas)
+
+    def delete_task_by_id_db(self, task_id: int, user_id: int) -> int:
+        statement = delete(Task).where(Task.task_id == task_id, Task.user_id == user_id)
+        if self.stats_repo is None:
+            result = self.session.execute(statement, execution_options={"synchronize_session": False})
+            if result.rowcount:
+                self._note_write(user_id)
+            return result.rowcount
+
+        deleted = self.session.execute(
+            statement.returning(Task.user_id, Task.status, Task.priority),
+            execution_options={"synchronize_session": False},
+        ).all()
+        deltas = {}
+        for row in deleted:
+            add_task_delta(deltas, *row, -1)
+        self._apply_stats(deltas)
+        if deleted:
+            self._note_write(user_id)
+        return len(deleted)
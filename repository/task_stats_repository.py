@@ -0,0 +1,139 @@
+from datetime import date
+
+from sqlalchemy import delete, func, insert, inspect, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import Task, TaskArchive, TaskStats, User
+
+OPEN_STATUSES = ("pending", "in-progress")
+# task columns that decide which summary row a task is counted in
+STATS_COLUMNS = ("user_id", "status", "priority")
+
+
+def add_task_delta(deltas: dict, user_id, status, priority, amount: int) -> None:
+    key = (user_id, status, priority)
+    if None in key:
+        # tasks without an owner are not counted anywhere
+        return
+    deltas[key] = deltas.get(key, 0) + amount
+
+
+def committed_stats_key(task: Task) -> tuple:
+    """The (user_id, status, priority) a persistent task had before its pending changes."""
+    attributes = inspect(task).attrs
+    key = []
+    for column in STATS_COLUMNS:
+        history = attributes[column].history
+        key.append(history.deleted[0] if history.deleted else getattr(task, column))
+    return tuple(key)
+
+
+def task_stats_key_statement(task_id: int):
+    # locks the row so the UPDATE that follows moves the count from the value read here
+    return select(Task.user_id, Task.status, Task.priority).where(Task.task_id == task_id).with_for_update()
+
+
+def task_stats_rows(deltas: dict) -> list[dict]:
+    # sorted so concurrent transactions lock summary rows in the same order
+    return [
+        {"user_id": user_id, "status": status, "priority": priority, "count": amount}
+        for (user_id, status, priority), amount in sorted(deltas.items())
+        if amount
+    ]
+
+
+def task_stats_upsert(dialect_name: str):
+    """INSERT ... ON CONFLICT DO UPDATE adding each row's count to the stored one."""
+    dialects = {"postgresql": postgresql, "sqlite": sqlite}
+    if dialect_name not in dialects:
+        raise ValueError(f"Task statistics need an upsert, which is not supported on {dialect_name}.")
+    statement = dialects[dialect_name].insert(TaskStats)
+    return statement.on_conflict_do_update(
+        index_elements=[TaskStats.user_id, TaskStats.status, TaskStats.priority],
+        set_={"count": TaskStats.count + statement.excluded["count"]},
+    )
+
+
+def user_stats_statement(user_id: int):
+    # outer join from users: no rows at all means the user does not exist
+    return (
+        select(User.id, TaskStats.status, TaskStats.priority, TaskStats.count)
+        .outerjoin(TaskStats, (TaskStats.user_id == User.id) & (TaskStats.count > 0))
+        .where(User.id == user_id)
+    )
+
+
+def overdue_count_statement(user_id: int, today: date):
+    # one range scan per open status on (user_id, status, due_date)
+    return select(func.count()).select_from(Task).where(
+        Task.user_id == user_id,
+        Task.status.in_(OPEN_STATUSES),
+        Task.due_date < today,
+    )
+
+
+def rebuild_task_stats_statements(user_id: int | None = None) -> tuple:
+    clear = delete(TaskStats)
+    # archived tasks are still the user's tasks and stay counted
+    branches = []
+    for model in (Task, TaskArchive):
+        branch = select(model.user_id, model.status, model.priority).where(model.user_id.is_not(None))
+        if user_id is not None:
+            branch = branch.where(model.user_id == user_id)
+        branches.append(branch)
+    tasks = union_all(*branches).subquery()
+    if user_id is not None:
+        clear = clear.where(TaskStats.user_id == user_id)
+    counts = select(tasks.c.user_id, tasks.c.status, tasks.c.priority, func.count()).group_by(
+        tasks.c.user_id, tasks.c.status, tasks.c.priority
+    )
+    fill = insert(TaskStats).from_select(
+        [TaskStats.user_id, TaskStats.status, TaskStats.priority, TaskStats.count], counts
+    )
+    return clear, fill
+
+
+def task_stats_from_rows(rows, overdue: int):
+    if not rows:
+        return None
+    combinations = [
+        {"status": status, "priority": priority, "count": count}
+        for _, status, priority, count in rows
+        if status is not None
+    ]
+    by_status = {}
+    by_priority = {}
+    for combination in combinations:
+        by_status[combination["status"]] = by_status.get(combination["status"], 0) + combination["count"]
+        by_priority[combination["priority"]] = by_priority.get(combination["priority"], 0) + combination["count"]
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "by_status_priority": combinations,
+        "overdue": overdue,
+    }
+
+
+class TaskStatsRepository:
+    def __init__(self, session) -> None:
+        self.session = session
+
+    def apply_deltas_db(self, deltas: dict) -> None:
+        rows = task_stats_rows(deltas)
+        if not rows:
+            return
+        dialect_name = self.session.get_bind().dialect.name
+        self.session.execute(task_stats_upsert(dialect_name), rows)
+
+    def get_user_stats_db(self, user_id: int, today: date):
+        rows = self.session.execute(user_stats_statement(user_id)).all()
+        if not rows:
+            return None
+        overdue = self.session.scalar(overdue_count_statement(user_id, today))
+        return task_stats_from_rows(rows, overdue)
+
+    def rebuild_db(self, user_id: int | None = None) -> None:
+        clear, fill = rebuild_task_stats_statements(user_id)
+        self.session.execute(clear, execution_options={"synchronize_session": False})
+        self.session.execute(fill)
@@ -1,23 +1,62 @@
+from sqlalchemy import delete, exists, select
+from sqlalchemy.orm import selectinload
+
 from models import User
 
 
 class UserRepository:
-    def __init__(self, session):
+    def __init__(self, session, router=None):
         self.session = session
+        # when set, reads may go to a replica (see read_routing.ReadRouter)
+        self.router = router
+
+    def _read_session(self, user_id: int | None = None):
+        if self.router is None:
+            return self.session
+        return self.router.read_session(user_id)
+
+    def _note_write(self, user_id: int) -> None:
+        if self.router is not None:
+            self.router.note_write(user_id)
 
     def create_user_db(self, user: User) -> User:
         self.session.add(user)
-        self.session.commit()
+        self.session.flush()
+        self._note_write(user.id)
         return user
 
     def update_user_db(self, user: User):
         user = self.session.merge(user)
-        self.session.commit()
-        return self.session.commit()
+        self.session.flush()
+        self._note_write(user.id)
+        return user
 
-    def get_user_by_id_db(self, user_id: int):
-        return self.session.query(User).filter_by(id=user_id).first()
+    def get_user_by_id_db(self, user_id: int, with_tasks: bool = False):
+        query = self._read_session(user_id).query(User).filter_by(id=user_id)
+        if with_tasks:
+            # one extra SELECT ... WHERE user_id IN (...) instead of a lazy load later
+            query = query.options(selectinload(User.tasks))
+        return query.first()
+
+    def user_exists_db(self, user_id: int) -> bool:
+        return self._read_session(user_id).scalar(select(exists().where(User.id == user_id)))
+
+    def existing_user_ids_db(self, user_ids) -> set:
+        if not user_ids:
+            return set()
+        return set(self.session.scalars(select(User.id).where(User.id.in_(user_ids))))
 
     def delete_user_db(self, user: User) -> None:
+        self._note_write(user.id)
         self.session.delete(user)
-        self.session.commit()
+        self.session.flush()
+
+    def delete_user_by_id_db(self, user_id: int) -> int:
+        # a single DELETE; tasks go with it through ON DELETE CASCADE
+        result = self.session.execute(
+            delete(User).where(User.id == user_id),
+            execution_options={"synchronize_session": False},
+        )
+        if result.rowcount:
+            self._note_write(user_id)
+        return result.rowcount
@@ -0,0 +1,215 @@
+import csv
+import hashlib
+import io
+import json
+from datetime import date
+
+try:
+    import orjson
+except ImportError:  # the standard library encoder is used instead
+    orjson = None
+
+
+MAX_PAGE_SIZE = 500
+MAX_BULK_TASKS = 5000
+IMPORT_FORMATS = ("ndjson", "csv")
+
+
+def parse_due_date(value) -> date | None:
+    # None clears a due date
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return date(value['year'], value['month'], value['day'])
+
+
+def task_filters_from_args(args, archived: bool = False) -> dict:
+    """List filters from query args; with archived, ?include_archived=true is read too."""
+    filters = {}
+    if archived and args.get("include_archived", "").lower() in ("1", "true", "yes"):
+        filters["include_archived"] = True
+    for name in ("status", "priority"):
+        if name in args:
+            filters[name] = args[name]
+    for name in ("due_before", "due_after"):
+        if name in args:
+            filters[name] = date.fromisoformat(args[name])
+    return filters
+
+
+def search_cursor(score: float, task_id: int) -> str:
+    # repr round-trips the float exactly, so the next page starts right after this row
+    return f"{score!r}:{task_id}"
+
+
+def parse_search_cursor(value: str | None) -> tuple[float, int] | None:
+    if value is None:
+        return None
+    score, separator, task_id = value.rpartition(":")
+    if not separator:
+        raise ValueError(f"Invalid search cursor: {value}.")
+    return float(score), int(task_id)
+
+
+def task_import_row(data) -> dict:
+    """Normalize one imported task; raises ValueError with a message for the reject report."""
+    if not isinstance(data, dict):
+        raise ValueError("Expected an object with task fields.")
+    try:
+        task_name = data["task_name"]
+        user_id = int(data["user_id"])
+    except KeyError as error:
+        raise ValueError(f"Missing field {error.args[0]}.") from error
+    except (TypeError, ValueError) as error:
+        raise ValueError("user_id must be an integer.") from error
+    if not task_name:
+        raise ValueError("task_name must not be empty.")
+    try:
+        due_date = parse_due_date(data["due_date"]) if data.get("due_date") else None
+    except (KeyError, TypeError) as error:
+        raise ValueError("due_date must be an ISO date.") from error
+    return {
+        "task_name": str(task_name),
+        "user_id": user_id,
+        "status": data.get("status") or "pending",
+        "due_date": due_date,
+        "priority": data.get("priority") or "medium",
+    }
+
+
+def read_task_import(stream, import_format: str):
+    """Yield (line_number, row, error) for each record of a binary NDJSON or CSV stream."""
+    if not isinstance(stream, io.BufferedIOBase):
+        # request streams are raw; reading them line by line unbuffered is very slow
+        stream = io.BufferedReader(stream, 1 << 16)
+    if import_format == "csv":
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8", newline=""))
+        records = ((reader.line_num, row) for row in reader)
+    else:
+        records = ((number, line) for number, line in enumerate(stream, 1) if line.strip())
+    for number, record in records:
+        try:
+            data = json.loads(record) if import_format == "ndjson" else record
+            yield number, task_import_row(data), None
+        except ValueError as error:
+            yield number, None, str(error)
+
+
+def task_changes_from_json(data) -> tuple[dict, int | None]:
+    """Split a PATCH body into the changed task fields and the expected version."""
+    if not isinstance(data, dict):
+        raise ValueError("Body must be a JSON object")
+    version = data.get("version")
+    # bool is an int subclass, but true is not a version
+    if version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+        raise ValueError(f"version must be an integer, got {version!r}")
+    changes = {key: value for key, value in data.items() if key != "version"}
+    if "due_date" in changes:
+        changes["due_date"] = parse_due_date(changes["due_date"])
+    return changes, version
+
+
+def version_from_if_match(if_match) -> int | None:
+    """The version an If-Match header expects; None when absent or *, which matches any version."""
+    if not if_match or if_match.star_tag:
+        return None
+    tag = next(iter(if_match), None)
+    try:
+        return int(tag)
+    except (TypeError, ValueError):
+        raise ValueError(f"If-Match must hold a task version, got {tag!r}") from None
+
+
+def task_update_from_json(item) -> tuple:
+    """One item of a batch PATCH as (task_id, changes, version, error)."""
+    if not isinstance(item, dict) or not isinstance(item.get("task_id"), int):
+        return None, {}, None, "Each update needs an integer task_id."
+    try:
+        changes, version = task_changes_from_json({key: value for key, value in item.items() if key != "task_id"})
+    except (KeyError, TypeError, ValueError) as error:
+        return item["task_id"], {}, None, f"Invalid update: {error}."
+    return item["task_id"], changes, version, None
+
+
+def task_to_dict(task) -> dict:
+    return {
+        "task_id": task.task_id,
+        "task_name": task.task_name,
+        "task_status": task.status,
+        "due_date": task.due_date.isoformat() if task.due_date else None,
+        "priority": task.priority,
+        "version": task.version,
+    }
+
+
+# keys of task_to_dict, in TaskRecord field order
+TASK_RECORD_KEYS = ("task_id", "task_name", "task_status", "due_date", "priority", "version")
+
+
+def tasks_etag(version: tuple, query_string: bytes) -> str:
+    # the query string is part of the tag: filters and pages of one version differ
+    count, updated_at = version
+    seed = f"{count}:{updated_at.isoformat() if updated_at else ''}:".encode() + query_string
+    return hashlib.blake2b(seed, digest_size=16).hexdigest()
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+
+def task_records_to_list(records) -> list[dict]:
+    return [dict(zip(TASK_RECORD_KEYS, record)) for record in records]
+
+
+def stream_json_record_pages(pages):
+    """Encode TaskRecord pages as one JSON array, one encoder call per page."""
+    yield b"["
+    first = True
+    for page in pages:
+        body = dumps(task_records_to_list(page))[1:-1]
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def stream_ndjson_record_pages(pages):
+    """One JSON object per line, one chunk per page."""
+    for page in pages:
+        yield b"\n".join(dumps(task) for task in task_records_to_list(page)) + b"\n"
+
+
+def stream_csv_record_pages(pages):
+    # the header goes out before the first query finishes
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TASK_RECORD_KEYS)
+    yield buffer.getvalue().encode()
+    for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(page)
+        yield buffer.getvalue().encode()
+
+
+EXPORT_FORMATS = {
+    "ndjson": (stream_ndjson_record_pages, "application/x-ndjson"),
+    "csv": (stream_csv_record_pages, "text/csv"),
+}
+
+
+async def stream_json_array_async(tasks):
+    yield "["
+    index = 0
+    async for task in tasks:
+        yield ("," if index else "") + json.dumps(task_to_dict(task))
+        index += 1
+    yield "]"
@@ -0,0 +1,139 @@
+from datetime import date
+
+from sqlalchemy.exc import IntegrityError
+
+from models import Task
+from services.task_service import (
+    TaskNotFoundError,
+    TaskVersionConflictError,
+    new_task_rows,
+    validate_task_changes,
+    validate_task_filters,
+)
+
+
+class AsyncTaskService:
+    """asyncio counterpart of TaskService with the same contracts.
+
+    Input checks and row building come from services.task_service, so they cannot
+    drift; it covers the feature set listed in asgi_app.
+    """
+
+    def __init__(self, repository, user_repo, user_cache=None, stats_repo=None) -> None:
+        self.repository = repository
+        self.user_repo = user_repo
+        self.user_cache = user_cache
+        self.stats_repo = stats_repo
+
+    async def _check_user_exists(self, user_id: int) -> bool:
+        if self.user_cache is not None and self.user_cache.contains(user_id):
+            return True
+        exists = await self.user_repo.user_exists_db(user_id)
+        if exists and self.user_cache is not None:
+            self.user_cache.add(user_id)
+        return exists
+
+    def _remember_user(self, user_id: int) -> None:
+        if self.user_cache is not None:
+            self.user_cache.add(user_id)
+
+    async def _raise_for_integrity_error(self, user_id: int, error: IntegrityError):
+        if self.user_cache is not None:
+            self.user_cache.invalidate(user_id)
+        if not await self._check_user_exists(user_id):
+            raise ValueError(f"User with id={user_id} does not exist.") from error
+        raise error
+
+    async def create_task(self, name, user_id, due_date, status="pending", priority="medium"):
+        validate_task_filters(status=status, priority=priority)
+        task = Task(task_name=name, user_id=user_id, status=status, due_date=due_date, priority=priority)
+        try:
+            task = await self.repository.create_task_db(task)
+        except IntegrityError as error:
+            await self._raise_for_integrity_error(user_id, error)
+        self._remember_user(user_id)
+        return task
+
+    async def create_tasks_bulk(self, user_id, tasks: list[dict]) -> list[int]:
+        rows = new_task_rows(user_id, tasks)
+        try:
+            task_ids = await self.repository.create_tasks_bulk(rows)
+        except IntegrityError as error:
+            await self._raise_for_integrity_error(user_id, error)
+        self._remember_user(user_id)
+        return task_ids
+
+    async def get_tasks_for_user(self, user_id):
+        if not await self._check_user_exists(user_id):
+            raise ValueError(f"User with id={user_id} does not exist.")
+
+        return await self.repository.get_all_tasks_db(user_id)
+
+    async def get_tasks_page(self, user_id, limit, after=None, **filters):
+        validate_task_filters(**filters)
+        tasks = await self.repository.get_tasks_page_db(user_id, limit, after, **filters)
+        if tasks is None:
+            raise ValueError(f"User with id={user_id} does not exist.")
+        return tasks
+
+    async def iter_tasks_for_user(self, user_id, batch_size=1000, **filters):
+        # the first page is fetched eagerly so a missing user fails before streaming starts
+        first_page = await self.get_tasks_page(user_id, batch_size, **filters)
+        return self._iter_remaining(user_id, batch_size, first_page, filters)
+
+    async def _iter_remaining(self, user_id, batch_size, first_page, filters):
+        for task in first_page:
+            yield task
+        if len(first_page) < batch_size:
+            return
+        async for task in self.repository.iter_tasks_db(
+                user_id, batch_size, after=first_page[-1].task_id, **filters
+        ):
+            yield task
+
+    async def get_task_stats(self, user_id, today: date | None = None) -> dict:
+        stats = await self.stats_repo.get_user_stats_db(user_id, today or date.today())
+        if stats is None:
+            raise ValueError(f"User with id={user_id} does not exist.")
+        return stats
+
+    async def rebuild_task_stats(self, user_id=None) -> None:
+        await self.stats_repo.rebuild_db(user_id)
+
+    async def get_task_by_id(self, task_id) -> Task:
+        task = await self.repository.get_task_by_id_db(task_id)
+        if not task:
+            raise ValueError(f"Task with id={task_id} does not exist.")
+        return task
+
+    async def update_task(self, task_id, updated_task: Task):
+        task = await self.repository.get_task_by_id_db(task_id)
+        if not task:
+            raise ValueError(f"Task with id={task_id} does not exist.")
+
+        updated_task.task_id = task_id
+        return await self.repository.update_task_db(updated_task)
+
+    async def update_task_fields(self, task_id, changes: dict, version=None) -> Task:
+        validate_task_changes(changes)
+
+        try:
+            task = await self.repository.update_task_fields_db(task_id, changes, version)
+        except IntegrityError as error:
+            if "user_id" not in changes:
+                raise
+            await self._raise_for_integrity_error(changes["user_id"], error)
+        if task is not None:
+            return task
+        if version is not None and await self.repository.get_task_by_id_db(task_id) is not None:
+            raise TaskVersionConflictError(f"Task with id={task_id} was modified by someone else.")
+        raise TaskNotFoundError(f"Task with id={task_id} does not exist.")
+
+    async def delete_task(self, task_id, user_id):
+        deleted = await self.repository.delete_task_by_id_db(task_id, user_id)
+        if deleted:
+            return deleted
+        # only explains the failure, so it asks the database rather than the cache
+        if not await self.user_repo.user_exists_db(user_id):
+            raise ValueError(f"User with id={user_id} does not exist.")
+        raise ValueError(f"Task with id={task_id} does not exist.")
@@ -0,0 +1,35 @@
+from models import User
+
+
+class AsyncUserService:
+    """asyncio counterpart of UserService with the same contracts."""
+
+    def __init__(self, repository, user_cache=None) -> None:
+        self.repository = repository
+        self.user_cache = user_cache
+
+    async def create_user(self, username, role):
+        user = User(username=username, role=role)
+        return await self.repository.create_user_db(user)
+
+    async def get_user(self, user_id) -> User:
+        user = await self.repository.get_user_by_id_db(user_id)
+        if not user:
+            raise ValueError(f"User with id={user_id} does not exist.")
+        return user
+
+    async def update_user(self, user_id, updated_user: User):
+        user = await self.repository.get_user_by_id_db(user_id)
+        if not user:
+            raise ValueError(f"User with id={user_id} does not exist.")
+
+        updated_user.id = user_id
+        return await self.repository.update_user_db(updated_user)
+
+    async def delete_user(self, user_id):
+        if self.user_cache is not None:
+            self.user_cache.invalidate(user_id)
+        deleted = await self.repository.delete_user_by_id_db(user_id)
+        if not deleted:
+            raise ValueError(f"User with id={user_id} does not exist.")
+        return deleted
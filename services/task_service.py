@@ -1,21 +1,156 @@
-from models import Task
+import re
+from datetime import date
+from itertools import chain, islice
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from models import TASK_PRIORITY, TASK_STATUS, Task
+from repository.task_repository import TASK_NOT_FOUND, TASK_UPDATED
+
+
+UPDATABLE_TASK_FIELDS = ("task_name", "user_id", "status", "due_date", "priority")
+TASK_STATUSES = frozenset(TASK_STATUS.enums)
+TASK_PRIORITIES = frozenset(TASK_PRIORITY.enums)
+IMPORT_BATCH_SIZE = 5000
+# the import report lists at most this many rejected lines; the count covers all of them
+MAX_REPORTED_REJECTS = 100
+
+
+class TaskNotFoundError(ValueError):
+    pass
+
+
+class TaskVersionConflictError(ValueError):
+    pass
+
+
+def validate_task_filters(status=None, priority=None, **_):
+    if status is not None and status not in TASK_STATUSES:
+        raise ValueError(f"Unknown task status: {status}.")
+    if priority is not None and priority not in TASK_PRIORITIES:
+        raise ValueError(f"Unknown task priority: {priority}.")
+
+
+def validate_task_changes(changes: dict) -> None:
+    # shared with AsyncTaskService, like new_task_rows, so both apps accept the same input
+    unknown = set(changes) - set(UPDATABLE_TASK_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot update task fields: {', '.join(sorted(unknown))}.")
+    if not changes:
+        raise ValueError("No task fields to update.")
+    if "task_name" in changes and not isinstance(changes["task_name"], str):
+        raise ValueError("Task name must be a string.")
+    validate_task_filters(**changes)
+
+
+def new_task_rows(user_id, tasks: list[dict]) -> list[dict]:
+    """Rows for create_tasks_bulk; one bad item rejects the whole batch before anything is written."""
+    rows = []
+    for index, task in enumerate(tasks):
+        row = {
+            "task_name": task["task_name"],
+            "user_id": user_id,
+            "status": task.get("status", "pending"),
+            "due_date": task["due_date"],
+            "priority": task.get("priority", "medium"),
+        }
+        try:
+            validate_task_filters(status=row["status"], priority=row["priority"])
+        except ValueError as error:
+            raise ValueError(f"Task {index}: {error}") from error
+        rows.append(row)
+    return rows
 
 
 class TaskService:
-    def __init__(self, repository, user_repo) -> None:
+    def __init__(self, repository, user_repo, user_cache=None, stats_repo=None) -> None:
         self.repository = repository
         self.user_repo = user_repo
+        self.user_cache = user_cache
+        self.stats_repo = stats_repo
 
     def _check_user_exists(self, user_id: int) -> bool:
-        user = self.user_repo.get_user_by_id_db(user_id)
-        return user is not None
+        if self.user_cache is not None and self.user_cache.contains(user_id):
+            return True
+        exists = self.user_repo.user_exists_db(user_id)
+        if exists and self.user_cache is not None:
+            self.user_cache.add(user_id)
+        return exists
 
-    def create_task(self, name, user_id, due_date, status="pending", priority="medium"):
+    def _remember_user(self, user_id: int) -> None:
+        if self.user_cache is not None:
+            self.user_cache.add(user_id)
+
+    def _raise_for_integrity_error(self, user_id: int, error: IntegrityError):
+        # the tasks.user_id foreign key is the only constraint a new task can violate
+        if self.user_cache is not None:
+            self.user_cache.invalidate(user_id)
         if not self._check_user_exists(user_id):
-            raise ValueError(f"User with id={user_id} does not exist.")
+            raise ValueError(f"User with id={user_id} does not exist.") from error
+        raise error
 
+    def create_task(self, name, user_id, due_date, status="pending", priority="medium"):
+        validate_task_filters(status=status, priority=priority)
         task = Task(task_name=name, user_id=user_id, status=status, due_date=due_date, priority=priority)
-        return self.repository.create_task_db(task)
+        try:
+            task = self.repository.create_task_db(task)
+        except IntegrityError as error:
+            self._raise_for_integrity_error(user_id, error)
+        self._remember_user(user_id)
+        return task
+
+    def create_tasks_bulk(self, user_id, tasks: list[dict]) -> list[int]:
+        rows = new_task_rows(user_id, tasks)
+        try:
+            task_ids = self.repository.create_tasks_bulk(rows)
+        except IntegrityError as error:
+            self._raise_for_integrity_error(user_id, error)
+        self._remember_user(user_id)
+        return task_ids
+
+    def import_tasks(self, records, batch_size=IMPORT_BATCH_SIZE) -> dict:
+        """Load (line_number, row, error) records from read_task_import in batches.
+
+        Owners are checked with one query per batch; rows with a parse error, an
+        unknown status/priority or a missing user are rejected, the rest are loaded.
+        """
+        report = {"imported": 0, "rejected": 0, "rejects": []}
+
+        def reject(line, error) -> None:
+            report["rejected"] += 1
+            if len(report["rejects"]) < MAX_REPORTED_REJECTS:
+                report["rejects"].append({"line": line, "error": error})
+
+        records = iter(records)
+        while batch := list(islice(records, batch_size)):
+            candidates = []
+            for line, row, error in batch:
+                if error is None:
+                    try:
+                        validate_task_filters(status=row["status"], priority=row["priority"])
+                    except ValueError as invalid:
+                        error = str(invalid)
+                if error is None:
+                    candidates.append((line, row))
+                else:
+                    reject(line, error)
+
+            known_users = self.user_repo.existing_user_ids_db({row["user_id"] for _, row in candidates})
+            rows = []
+            for line, row in candidates:
+                if row["user_id"] in known_users:
+                    rows.append(row)
+                else:
+                    reject(line, f"User with id={row['user_id']} does not exist.")
+            try:
+                report["imported"] += self.repository.import_tasks_db(rows)
+            except IntegrityError as error:
+                # a user deleted while the import ran; the whole import is rolled back
+                raise ValueError("Import aborted: a referenced user no longer exists.") from error
+            for user_id in known_users:
+                self._remember_user(user_id)
+        return report
 
     def get_tasks_for_user(self, user_id):
         if not self._check_user_exists(user_id):
@@ -23,10 +158,75 @@ class TaskService:
 
         return self.repository.get_all_tasks_db(user_id)
 
-    def get_task_by_id(self, task_id) -> Task:
-        task = self.repository.get_task_by_id_db(task_id)
+    def get_tasks_version(self, user_id) -> tuple:
+        """Changes whenever a task of the user is created, updated, moved or deleted."""
+        version = self.repository.get_tasks_version_db(user_id)
+        if version is None:
+            raise ValueError(f"User with id={user_id} does not exist.")
+        return version
+
+    def get_tasks_page(self, user_id, limit, after=None, **filters):
+        validate_task_filters(**filters)
+        tasks = self.repository.get_tasks_page_db(user_id, limit, after, **filters)
+        if tasks is None:
+            raise ValueError(f"User with id={user_id} does not exist.")
+        return tasks
+
+    def iter_tasks_for_user(self, user_id, batch_size=1000, **filters):
+        # the first page is fetched eagerly so a missing user fails before streaming starts
+        first_page = self.get_tasks_page(user_id, batch_size, **filters)
+        if len(first_page) < batch_size:
+            return iter(first_page)
+        return chain(
+            first_page,
+            self.repository.iter_tasks_db(user_id, batch_size, after=first_page[-1].task_id, **filters),
+        )
+
+    def get_task_records_page(self, user_id, limit, after=None, **filters):
+        validate_task_filters(**filters)
+        records = self.repository.get_task_records_page_db(user_id, limit, after, **filters)
+        if records is None:
+            raise ValueError(f"User with id={user_id} does not exist.")
+        return records
+
+    def iter_task_record_pages(self, user_id, batch_size=1000, **filters):
+        # same contract as iter_tasks_for_user, but yields lists of TaskRecord
+        first_page = self.get_task_records_page(user_id, batch_size, **filters)
+        if len(first_page) < batch_size:
+            return iter([first_page] if first_page else [])
+        return chain(
+            [first_page],
+            self.repository.iter_task_record_pages_db(user_id, batch_size, after=first_page[-1].task_id, **filters),
+        )
+
+    def export_task_records(self, user_id, batch_size=1000, **filters):
+        # checked up front: the export streams and cannot report a missing user later
+        validate_task_filters(**filters)
+        if not self._check_user_exists(user_id):
+            raise ValueError(f"User with id={user_id} does not exist.")
+        return self.repository.stream_task_records_db(user_id, batch_size, **filters)
+
+    def search_tasks(self, user_id, query: str, limit: int, after: tuple | None = None) -> list[tuple]:
+        if not re.search(r"\w", query or ""):
+            raise ValueError("Search query must contain at least one word.")
+        if not self._check_user_exists(user_id):
+            raise ValueError(f"User with id={user_id} does not exist.")
+        return self.repository.search_tasks_db(user_id, query, limit, after)
+
+    def get_task_stats(self, user_id, today: date | None = None) -> dict:
+        stats = self.stats_repo.get_user_stats_db(user_id, today or date.today())
+        if stats is None:
+            raise ValueError(f"User with id={user_id} does not exist.")
+        return stats
+
+    def rebuild_task_stats(self, user_id=None) -> None:
+        self.stats_repo.rebuild_db(user_id)
+
+    def get_task_by_id(self, task_id, user_id=None) -> Task:
+        # served from the task cache when the app has one; user_id limits it to that user's tasks
+        task = self.repository.get_task_by_id_db(task_id, user_id)
         if not task:
-            raise ValueError(f"Task with id={task_id} does not exist.")
+            raise TaskNotFoundError(f"Task with id={task_id} does not exist.")
         return task
 
     def update_task(self, task_id, updated_task: Task):
@@ -35,14 +235,85 @@ class TaskService:
             raise ValueError(f"Task with id={task_id} does not exist.")
 
         updated_task.task_id = task_id
-        return self.repository.update_user_db(updated_task)
+        return self.repository.update_task_db(updated_task)
+
+    def update_task_fields(self, task_id, changes: dict, version=None) -> Task:
+        validate_task_changes(changes)
+
+        try:
+            task = self.repository.update_task_fields_db(task_id, changes, version)
+        except IntegrityError as error:
+            if "user_id" not in changes:
+                raise
+            self._raise_for_integrity_error(changes["user_id"], error)
+        if task is not None:
+            return task
+        # the UPDATE matched nothing: tell a missing task apart from a stale version
+        if version is not None and self.repository.get_task_by_id_db(task_id) is not None:
+            raise TaskVersionConflictError(f"Task with id={task_id} was modified by someone else.")
+        raise TaskNotFoundError(f"Task with id={task_id} does not exist.")
+
+    def update_tasks_fields(self, updates) -> list[dict]:
+        """Apply (task_id, changes, version, error) items from task_update_from_json together.
+
+        Returns one result per item, in order. Invalid, missing and stale items are
+        reported and skipped; the others are written in the caller's transaction.
+        """
+        results = [None] * len(updates)
+        valid = []
+        seen = set()
+        for index, (task_id, changes, version, error) in enumerate(updates):
+            if error is None:
+                try:
+                    validate_task_changes(changes)
+                except ValueError as validation_error:
+                    error = str(validation_error)
+            if error is None and task_id in seen:
+                error = f"Task with id={task_id} appears more than once."
+            if error is not None:
+                results[index] = {"task_id": task_id, "success": False, "reason": "invalid", "error": error}
+                continue
+            seen.add(task_id)
+            valid.append((index, task_id, changes, version))
+
+        # a new owner that does not exist would fail the whole executemany
+        owners = {changes["user_id"] for _, _, changes, _ in valid if "user_id" in changes}
+        known_owners = self.user_repo.existing_user_ids_db(owners)
+        for index, task_id, changes, _ in valid:
+            if "user_id" in changes and changes["user_id"] not in known_owners:
+                results[index] = {
+                    "task_id": task_id, "success": False, "reason": "invalid",
+                    "error": f"User with id={changes['user_id']} does not exist.",
+                }
+        valid = [item for item in valid if results[item[0]] is None]
+
+        try:
+            outcomes = self.repository.update_tasks_fields_db(
+                [(task_id, changes, version) for _, task_id, changes, version in valid]
+            )
+        except StaleDataError as error:
+            raise TaskVersionConflictError(str(error)) from error
+        for (index, task_id, _, _), outcome in zip(valid, outcomes):
+            if outcome.outcome == TASK_UPDATED:
+                results[index] = {"task_id": task_id, "success": True, "version": outcome.version}
+            elif outcome.outcome == TASK_NOT_FOUND:
+                results[index] = {
+                    "task_id": task_id, "success": False, "reason": "not_found",
+                    "error": f"Task with id={task_id} does not exist.",
+                }
+            else:
+                results[index] = {
+                    "task_id": task_id, "success": False, "reason": "conflict", "version": outcome.version,
+                    "error": f"Task with id={task_id} was modified by someone else.",
+                }
+        return results
 
     def delete_task(self, task_id, user_id):
-        if not self._check_user_exists(user_id):
+        deleted = self.repository.delete_task_by_id_db(task_id, user_id)
+        if deleted:
+            return deleted
+        # only explains the failure, so it asks the database rather than the cache
+        if not self.user_repo.user_exists_db(user_id):
             raise ValueError(f"User with id={user_id} does not exist.")
-
-        task = self.repository.get_task_by_id_db(task_id, user_id)
-        if not task:
-            raise ValueError(f"Task with id={task_id} does not exist.")
-        return self.repository.delete_task_db(task)
+        raise ValueError(f"Task with id={task_id} does not exist.")
 
@@ -0,0 +1,39 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class KnownUserCache:
+    """Bounded TTL set of user ids that were recently seen in the database."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._expires_at = OrderedDict()
+        self._lock = threading.Lock()
+
+    def contains(self, user_id: int) -> bool:
+        with self._lock:
+            expires_at = self._expires_at.get(user_id)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._expires_at[user_id]
+                return False
+            self._expires_at.move_to_end(user_id)
+            return True
+
+    def add(self, user_id: int) -> None:
+        with self._lock:
+            self._expires_at[user_id] = time.monotonic() + self.ttl
+            self._expires_at.move_to_end(user_id)
+            while len(self._expires_at) > self.maxsize:
+                self._expires_at.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._expires_at.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._expires_at.clear()
@@ -2,21 +2,24 @@ from models import User
 
 
 class UserService:
-    def __init__(self, repository) -> None:
+    def __init__(self, repository, user_cache=None, task_repository=None) -> None:
         self.repository = repository
+        self.user_cache = user_cache
+        # told about deleted users, whose tasks the database removes by cascade
+        self.task_repository = task_repository
 
     def create_user(self, username, role):
         user = User(username=username, role=role)
         return self.repository.create_user_db(user)
 
     def get_user(self, user_id) -> User:
-        user = self.repository.get_user_by_id(user_id)
+        user = self.repository.get_user_by_id_db(user_id)
         if not user:
             raise ValueError(f"User with id={user_id} does not exist.")
         return user
 
     def update_user(self, user_id, updated_user: User):
-        user = self.repository.get_user_by_id(user_id)
+        user = self.repository.get_user_by_id_db(user_id)
         if not user:
             raise ValueError(f"User with id={user_id} does not exist.")
 
@@ -24,8 +27,11 @@ class UserService:
         return self.repository.update_user_db(updated_user)
 
     def delete_user(self, user_id):
-        user = self.repository.get_user_by_id(user_id)
-        if not user:
+        if self.user_cache is not None:
+            self.user_cache.invalidate(user_id)
+        deleted = self.repository.delete_user_by_id_db(user_id)
+        if not deleted:
             raise ValueError(f"User with id={user_id} does not exist.")
-
-        return self.repository.delete_user_db(user)
+        if self.task_repository is not None:
+            self.task_repository.forget_user_tasks(user_id)
+        return deleted
@@ -0,0 +1,175 @@
+import argparse
+import json
+import logging
+import signal
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from database import build_engine
+from repository.task_repository import TaskRepository
+from settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def log_overdue_tasks(records) -> None:
+    for record in records:
+        logger.warning("Task %s (%s) is overdue: due %s.", record.task_id, record.task_name, record.due_date)
+
+
+# what a sweep does with each batch, by SWEEPER_ACTION
+SWEEPER_ACTIONS = {"log": log_overdue_tasks}
+
+
+def sweeper_handler(action: str):
+    """The batch handler for a SWEEPER_ACTION; None for "", which only counts."""
+    if not action:
+        return None
+    if action not in SWEEPER_ACTIONS:
+        raise ValueError(f"Unknown sweeper action: {action}.")
+    return SWEEPER_ACTIONS[action]
+
+
+@dataclass
+class SweepRun:
+    started_at: str
+    seconds: float = 0.0
+    batches: int = 0
+    tasks: int = 0
+    slowest_batch_seconds: float = 0.0
+    error: str | None = None
+
+
+class OverdueSweeper:
+    """Walks open tasks due before today in short, separate transactions.
+
+    Each batch is one keyset page over ix_tasks_open_due_date handed to handler(records)
+    and committed before the next page is read, so a run never holds locks across the
+    table or scans completed tasks. Without a handler the sweeper only counts.
+    """
+
+    def __init__(self, session, handler=None, batch_size: int = 500, interval: float = 60.0,
+                 max_batches: int | None = None, clock=date.today) -> None:
+        self.session = session
+        self.repository = TaskRepository(session)
+        self.handler = handler
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_batches = max_batches
+        self.clock = clock
+        self.runs = 0
+        self.failures = 0
+        self.total_batches = 0
+        self.total_tasks = 0
+        self.total_seconds = 0.0
+        self.last_run: SweepRun | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> SweepRun:
+        today = self.clock()
+        run = SweepRun(started_at=datetime.now(timezone.utc).isoformat())
+        started = time.perf_counter()
+        after = None
+        try:
+            while self.max_batches is None or run.batches < self.max_batches:
+                batch_started = time.perf_counter()
+                try:
+                    records = self.repository.get_overdue_tasks_page_db(today, self.batch_size, after)
+                    if records and self.handler is not None:
+                        self.handler(records)
+                    self.session.commit()
+                finally:
+                    # hand the connection back between batches
+                    self.session.remove()
+                if not records:
+                    break
+                run.batches += 1
+                run.tasks += len(records)
+                run.slowest_batch_seconds = max(run.slowest_batch_seconds, time.perf_counter() - batch_started)
+                if len(records) < self.batch_size:
+                    break
+                after = (records[-1].due_date, records[-1].task_id)
+        except Exception as error:
+            run.error = f"{type(error).__name__}: {error}"
+        run.seconds = time.perf_counter() - started
+
+        with self._lock:
+            self.runs += 1
+            self.failures += run.error is not None
+            self.total_batches += run.batches
+            self.total_tasks += run.tasks
+            self.total_seconds += run.seconds
+            self.last_run = run
+        return run
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_forever, name="overdue-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run_forever(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "interval": self.interval,
+                "batch_size": self.batch_size,
+                "runs": self.runs,
+                "failures": self.failures,
+                "batches": self.total_batches,
+                "tasks": self.total_tasks,
+                "seconds": self.total_seconds,
+                "last_run": asdict(self.last_run) if self.last_run else None,
+            }
+
+
+def main(argv=None) -> None:
+    """Separate worker: python -m sweeper [--once]"""
+    settings = Settings.from_env()
+    parser = argparse.ArgumentParser(description="Sweep overdue tasks in bounded batches.")
+    parser.add_argument("--once", action="store_true", help="Run a single sweep and exit.")
+    parser.add_argument("--interval", type=float, default=settings.SWEEPER_INTERVAL or 60.0)
+    parser.add_argument("--batch-size", type=int, default=settings.SWEEPER_BATCH_SIZE)
+    parser.add_argument("--action", choices=sorted(SWEEPER_ACTIONS), default=settings.SWEEPER_ACTION or None,
+                        help="What to do with overdue tasks; without one a sweep only counts them.")
+    args = parser.parse_args(argv)
+    if args.action is None and not args.once:
+        parser.error("sweeping repeatedly needs --action (or SWEEPER_ACTION); use --once to only count")
+
+    logging.basicConfig(level=logging.INFO)
+    session = scoped_session(sessionmaker(build_engine(settings), expire_on_commit=False))
+    sweeper = OverdueSweeper(
+        session, handler=sweeper_handler(args.action), batch_size=args.batch_size, interval=args.interval
+    )
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    try:
+        while not stopping.is_set():
+            print(json.dumps(asdict(sweeper.run_once())), flush=True)
+            if args.once:
+                break
+            stopping.wait(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import date
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from database import build_async_engine
+from models import Base, Task, User
+from repository.async_task_repository import AsyncTaskRepository
+from settings import Settings
+
+
+def run_with_repo(scenario):
+    async def runner():
+        engine = build_async_engine(Settings(DATABASE_URL="sqlite://"))
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            user = User(username="john", role="admin")
+            session.add(user)
+            await session.flush()
+            result = await scenario(AsyncTaskRepository(session), user.id)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(runner())
+
+
+def make_task(user_id, name="T", status="pending"):
+    return Task(task_name=name, user_id=user_id, status=status, due_date=date(2026, 1, 1), priority="low")
+
+
+def test_create_task_db_assigns_id():
+    async def scenario(repo, user_id):
+        return (await repo.create_task_db(make_task(user_id))).task_id
+
+    assert run_with_repo(scenario) == 1
+
+
+def test_create_task_db_raises_integrity_error_for_missing_user():
+    async def scenario(repo, user_id):
+        await repo.create_task_db(make_task(user_id + 1))
+
+    with pytest.raises(IntegrityError):
+        run_with_repo(scenario)
+
+
+def test_create_tasks_bulk_returns_ids_in_order():
+    async def scenario(repo, user_id):
+        rows = [{"task_name": name, "user_id": user_id} for name in ("a", "b", "c")]
+        return await repo.create_tasks_bulk(rows)
+
+    assert run_with_repo(scenario) == [1, 2, 3]
+
+
+def test_get_tasks_page_db_returns_none_for_missing_user():
+    async def scenario(repo, user_id):
+        return await repo.get_tasks_page_db(user_id + 1, 10)
+
+    assert run_with_repo(scenario) is None
+
+
+def test_get_tasks_page_db_filters_by_status():
+    async def scenario(repo, user_id):
+        await repo.create_task_db(make_task(user_id, "a", "pending"))
+        await repo.create_task_db(make_task(user_id, "b", "completed"))
+        return [task.task_name for task in await repo.get_tasks_page_db(user_id, 10, status="completed")]
+
+    assert run_with_repo(scenario) == ["b"]
+
+
+def test_iter_tasks_db_walks_all_pages():
+    async def scenario(repo, user_id):
+        await repo.create_tasks_bulk([{"task_name": str(i), "user_id": user_id} for i in range(5)])
+        return [task.task_name async for task in repo.iter_tasks_db(user_id, batch_size=2)]
+
+    assert run_with_repo(scenario) == ["0", "1", "2", "3", "4"]
+
+
+def test_delete_task_by_id_db_returns_rowcount():
+    async def scenario(repo, user_id):
+        task = await repo.create_task_db(make_task(user_id))
+        return await repo.delete_task_by_id_db(task.task_id, user_id), await repo.get_task_by_id_db(task.task_id)
+
+    deleted, remaining = run_with_repo(scenario)
+    assert deleted == 1
+    assert remaining is None
+
+
+def test_update_task_fields_db_bumps_version_and_rejects_stale_version():
+    async def scenario(repo, user_id):
+        task = await repo.create_task_db(make_task(user_id))
+        updated = await repo.update_task_fields_db(task.task_id, {"status": "completed"}, version=1)
+        stale = await repo.update_task_fields_db(task.task_id, {"status": "pending"}, version=1)
+        return updated.version, updated.status, stale
+
+    assert run_with_repo(scenario) == (2, "completed", None)
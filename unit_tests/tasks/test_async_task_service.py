@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.exc import IntegrityError
+from models import Task
+from services.async_task_service import AsyncTaskService
+
+
+@pytest.fixture
+def mock_repo():
+    return AsyncMock()
+
+
+@pytest.fixture
+def mock_user_repo():
+    return AsyncMock()
+
+
+@pytest.fixture
+def service(mock_repo, mock_user_repo):
+    return AsyncTaskService(repository=mock_repo, user_repo=mock_user_repo)
+
+
+def test_create_task_does_not_query_user(service, mock_user_repo):
+    asyncio.run(service.create_task("T", 1, "2025-10-12"))
+    mock_user_repo.user_exists_db.assert_not_called()
+
+
+def test_create_task_raises_error_if_user_not_found(service, mock_repo, mock_user_repo):
+    mock_repo.create_task_db.side_effect = IntegrityError("INSERT", {}, Exception("fk"))
+    mock_user_repo.user_exists_db.return_value = False
+    with pytest.raises(ValueError, match="User with id=1 does not exist."):
+        asyncio.run(service.create_task("T", 1, "2025-10-12"))
+
+
+def test_get_tasks_page_raises_if_user_not_found(service, mock_repo):
+    mock_repo.get_tasks_page_db.return_value = None
+    with pytest.raises(ValueError, match="User with id=3 does not exist."):
+        asyncio.run(service.get_tasks_page(3, 20))
+
+
+def test_iter_tasks_for_user_continues_after_first_page(service, mock_repo):
+    first_page = [MagicMock(task_id=1), MagicMock(task_id=2)]
+    mock_repo.get_tasks_page_db.return_value = first_page
+
+    async def remaining(*args, **kwargs):
+        yield "t3"
+
+    mock_repo.iter_tasks_db = MagicMock(side_effect=remaining)
+
+    async def collect():
+        return [task async for task in await service.iter_tasks_for_user(4, batch_size=2)]
+
+    assert asyncio.run(collect()) == first_page + ["t3"]
+    mock_repo.iter_tasks_db.assert_called_once_with(4, 2, after=2)
+
+
+def test_update_task_raises_if_not_found(service, mock_repo):
+    mock_repo.get_task_by_id_db.return_value = None
+    with pytest.raises(ValueError, match="Task with id=4 does not exist."):
+        asyncio.run(service.update_task(4, Task(task_name="x", user_id=1)))
+
+
+def test_delete_task_raises_if_task_not_found(service, mock_repo, mock_user_repo):
+    mock_repo.delete_task_by_id_db.return_value = 0
+    mock_user_repo.user_exists_db.return_value = True
+    with pytest.raises(ValueError, match="Task with id=10 does not exist."):
+        asyncio.run(service.delete_task(10, 1))
+
+
+def test_create_tasks_bulk_validates_like_sync_service(service, mock_repo):
+    tasks = [{"task_name": "A", "due_date": None, "priority": "urgent"}]
+    with pytest.raises(ValueError, match="Task 0: Unknown task priority: urgent."):
+        asyncio.run(service.create_tasks_bulk(1, tasks))
+    mock_repo.create_tasks_bulk.assert_not_called()
@@ -0,0 +1,139 @@
+import pytest
+from datetime import date
+from unittest.mock import MagicMock, patch
+from sqlalchemy.orm import sessionmaker
+from database import build_engine
+from models import Base, Task, User
+from repository.task_cache import CachedTaskRepository, LRUTTLCache
+from settings import Settings
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # a file, so sessions get connections (and transactions) of their own
+    engine = build_engine(Settings(DATABASE_URL=f"sqlite:///{tmp_path / 'tasks.sqlite'}"))
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(engine, expire_on_commit=False)
+    with factory() as session:
+        user = User(username="john", role="admin")
+        session.add(user)
+        session.flush()
+        session.add(Task(task_name="T", user_id=user.id, due_date=date(2026, 1, 1)))
+        session.commit()
+    return factory
+
+
+def test_get_returns_none_and_counts_miss():
+    cache = LRUTTLCache()
+    assert cache.get(1) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_set_then_get_counts_hit():
+    cache = LRUTTLCache()
+    cache.set(1, {"task_id": 1})
+    assert cache.get(1) == {"task_id": 1}
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUTTLCache(maxsize=1)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    assert cache.get(1) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = LRUTTLCache(ttl=10)
+    with patch("repository.task_cache.time.monotonic", return_value=100.0):
+        cache.set(1, "a")
+    with patch("repository.task_cache.time.monotonic", return_value=111.0):
+        assert cache.get(1) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cached_repository_serves_hit_without_query(session_factory):
+    repo = CachedTaskRepository(session_factory(), LRUTTLCache())
+    repo.get_task_by_id_db(1)
+    repo.session = MagicMock(wraps=session_factory())
+    task = repo.get_task_by_id_db(1)
+    assert task.task_name == "T"
+    repo.session.query.assert_not_called()
+
+
+def test_cached_repository_filters_by_user(session_factory):
+    repo = CachedTaskRepository(session_factory(), LRUTTLCache())
+    repo.get_task_by_id_db(1)
+    assert repo.get_task_by_id_db(1, user_id=99) is None
+
+
+def test_update_task_db_invalidates_entry(session_factory):
+    repo = CachedTaskRepository(session_factory(), LRUTTLCache())
+    task = repo.get_task_by_id_db(1)
+    task.task_name = "changed"
+    repo.update_task_db(task)
+    assert repo.cache.stats()["size"] == 0
+
+
+def test_delete_task_by_id_db_invalidates_entry(session_factory):
+    repo = CachedTaskRepository(session_factory(), LRUTTLCache())
+    repo.get_task_by_id_db(1)
+    repo.delete_task_by_id_db(1, 1)
+    assert repo.cache.stats()["size"] == 0
+
+
+def test_forget_user_tasks_drops_only_that_users_entries(session_factory):
+    session = session_factory()
+    session.add(User(username="jane", role="user"))
+    session.flush()
+    session.add(Task(task_name="U", user_id=2))
+    session.commit()
+    repo = CachedTaskRepository(session, LRUTTLCache())
+    repo.get_task_by_id_db(1)
+    repo.get_task_by_id_db(2)
+
+    repo.forget_user_tasks(1)
+
+    assert repo.cache.get(1) is None
+    assert repo.cache.get(2)["task_name"] == "U"
+    session.close()
+
+
+def test_cache_miss_reads_primary_not_replica(session_factory):
+    router = MagicMock()
+    with session_factory() as session:
+        repo = CachedTaskRepository(session, LRUTTLCache(), router=router)
+
+        assert repo.get_task_by_id_db(1).task_name == "T"
+        router.read_session.assert_not_called()
+
+
+def test_writes_invalidate_again_after_commit(session_factory):
+    cache = LRUTTLCache()
+    writer = CachedTaskRepository(session_factory(), cache)
+    reader = CachedTaskRepository(session_factory(), cache)
+
+    writer.update_task_fields_db(1, {"task_name": "changed"})
+    # a concurrent miss caches the row the writer has not committed yet
+    assert reader.get_task_by_id_db(1).task_name == "T"
+    reader.session.rollback()
+    writer.session.commit()
+
+    assert cache.get(1) is None
+    assert reader.get_task_by_id_db(1).task_name == "changed"
+    writer.session.close()
+    reader.session.close()
+
+
+def test_rolled_back_writes_leave_later_entries_alone(session_factory):
+    cache = LRUTTLCache()
+    repo = CachedTaskRepository(session_factory(), cache)
+    repo.update_task_fields_db(1, {"task_name": "changed"})
+    repo.session.rollback()
+
+    repo.get_task_by_id_db(1)
+    repo.session.commit()
+
+    assert cache.get(1)["task_name"] == "T"
+    repo.session.close()
@@ -1,7 +1,9 @@
 import pytest
-from unittest.mock import MagicMock
+from datetime import date
+from unittest.mock import ANY, MagicMock
+from sqlalchemy.exc import IntegrityError
 from models import Task
-from repository.task_repository import TaskRepository
+from repository.task_repository import TASK_RECORD_COLUMNS, TaskRecord, TaskRepository, tasks_page_statement
 
 
 @pytest.fixture
@@ -20,10 +22,11 @@ def test_create_task_db_adds_task(repo, mock_session):
     mock_session.add.assert_called_once_with(task)
 
 
-def test_create_task_db_commits(repo, mock_session):
+def test_create_task_db_flushes_without_commit(repo, mock_session):
     task = Task(task_name="Test", user_id=1)
     repo.create_task_db(task)
-    mock_session.commit.assert_called_once()
+    mock_session.flush.assert_called_once()
+    mock_session.commit.assert_not_called()
 
 
 def test_create_task_db_returns_task(repo, mock_session):
@@ -32,6 +35,29 @@ def test_create_task_db_returns_task(repo, mock_session):
     assert result == task
 
 
+def test_create_tasks_bulk_executes_one_statement(repo, mock_session):
+    rows = [{"task_name": "A", "user_id": 1}, {"task_name": "B", "user_id": 1}]
+    repo.create_tasks_bulk(rows)
+    mock_session.scalars.assert_called_once()
+    assert mock_session.scalars.call_args.args[1] == rows
+
+
+def test_create_tasks_bulk_does_not_commit(repo, mock_session):
+    repo.create_tasks_bulk([{"task_name": "A", "user_id": 1}])
+    mock_session.commit.assert_not_called()
+
+
+def test_create_tasks_bulk_returns_ids(repo, mock_session):
+    mock_session.scalars.return_value.all.return_value = [7, 8]
+    result = repo.create_tasks_bulk([{"task_name": "A", "user_id": 1}, {"task_name": "B", "user_id": 1}])
+    assert result == [7, 8]
+
+
+def test_create_tasks_bulk_skips_empty_batch(repo, mock_session):
+    assert repo.create_tasks_bulk([]) == []
+    mock_session.scalars.assert_not_called()
+
+
 def test_get_all_tasks_db_queries_task(repo, mock_session):
     repo.get_all_tasks_db(1)
     mock_session.query.assert_called_once_with(Task)
@@ -50,6 +76,127 @@ def test_get_all_tasks_db_returns_all(repo, mock_session):
     assert result == ["t1", "t2"]
 
 
+def test_get_tasks_page_db_executes_one_statement(repo, mock_session):
+    repo.get_tasks_page_db(1, 50)
+    mock_session.execute.assert_called_once()
+
+
+def test_get_tasks_page_db_returns_none_for_missing_user(repo, mock_session):
+    mock_session.execute.return_value.all.return_value = []
+    assert repo.get_tasks_page_db(1, 50) is None
+
+
+def test_get_tasks_page_db_returns_empty_page_for_user_without_tasks(repo, mock_session):
+    mock_session.execute.return_value.all.return_value = [(1, None)]
+    assert repo.get_tasks_page_db(1, 50) == []
+
+
+def test_get_tasks_page_db_unwraps_tasks(repo, mock_session):
+    mock_session.execute.return_value.all.return_value = [(1, "t1"), (1, "t2")]
+    assert repo.get_tasks_page_db(1, 50) == ["t1", "t2"]
+
+
+def test_tasks_page_statement_applies_cursor_and_filters():
+    statement = tasks_page_statement(1, 50, after=10, status="pending", due_before=date(2026, 1, 1))
+    sql = str(statement)
+    assert "tasks.task_id >" in sql
+    assert "tasks.status =" in sql
+    assert "tasks.due_date <" in sql
+    assert statement._limit == 50
+
+
+def test_task_model_declares_filter_indexes():
+    indexes = {index.name: [column.name for column in index.columns] for index in Task.__table__.indexes}
+    assert indexes["ix_tasks_user_status_due_date"] == ["user_id", "status", "due_date"]
+    assert indexes["ix_tasks_user_priority"] == ["user_id", "priority"]
+
+
+def test_iter_tasks_db_passes_filters(repo, monkeypatch):
+    get_page = MagicMock(return_value=[])
+    monkeypatch.setattr(repo, "get_tasks_page_db", get_page)
+    list(repo.iter_tasks_db(1, batch_size=2, status="pending"))
+    get_page.assert_called_once_with(1, 2, None, status="pending")
+
+
+def test_iter_tasks_db_follows_keyset_cursor(repo, monkeypatch):
+    pages = [[MagicMock(task_id=1), MagicMock(task_id=2)], [MagicMock(task_id=3)]]
+    get_page = MagicMock(side_effect=pages)
+    monkeypatch.setattr(repo, "get_tasks_page_db", get_page)
+    result = [task.task_id for task in repo.iter_tasks_db(1, batch_size=2)]
+    assert result == [1, 2, 3]
+    assert get_page.call_args_list[1].args == (1, 2, 2)
+
+
+def test_get_task_records_page_db_returns_records(repo, mock_session):
+    mock_session.execute.return_value.all.return_value = [
+        (1, 7, "T", "pending", date(2026, 1, 1), "low", 1),
+        (1, 8, "U", "completed", None, "high", 2),
+    ]
+    records = repo.get_task_records_page_db(1, 50)
+    assert records == [
+        TaskRecord(7, "T", "pending", date(2026, 1, 1), "low", 1),
+        TaskRecord(8, "U", "completed", None, "high", 2),
+    ]
+
+
+def test_get_task_records_page_db_handles_missing_user_and_empty_page(repo, mock_session):
+    mock_session.execute.return_value.all.return_value = []
+    assert repo.get_task_records_page_db(1, 50) is None
+    mock_session.execute.return_value.all.return_value = [(1, None, None, None, None, None, None)]
+    assert repo.get_task_records_page_db(1, 50) == []
+
+
+def test_tasks_page_statement_selects_columns_for_records():
+    sql = str(tasks_page_statement(1, 50, columns=TASK_RECORD_COLUMNS))
+    assert sql.startswith("SELECT users.id, tasks.task_id, tasks.task_name, tasks.status")
+
+
+def test_iter_task_record_pages_db_yields_whole_pages(repo, monkeypatch):
+    pages = [[MagicMock(task_id=1), MagicMock(task_id=2)], [MagicMock(task_id=3)]]
+    get_page = MagicMock(side_effect=pages)
+    monkeypatch.setattr(repo, "get_task_records_page_db", get_page)
+    assert list(repo.iter_task_record_pages_db(1, batch_size=2)) == pages
+    assert get_page.call_args_list[1].args == (1, 2, 2)
+
+
+def test_create_task_db_rolls_back_only_its_savepoint_on_integrity_error(repo, mock_session):
+    mock_session.flush.side_effect = IntegrityError("INSERT", {}, Exception("fk"))
+    with pytest.raises(IntegrityError):
+        repo.create_task_db(Task(task_name="Test", user_id=1))
+    mock_session.begin_nested.assert_called_once()
+    mock_session.rollback.assert_not_called()
+
+
+def test_failed_writes_keep_earlier_work_of_the_transaction():
+    from sqlalchemy import create_engine, event, select
+    from sqlalchemy.orm import Session
+    from models import Base, User
+
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        repo = TaskRepository(session)
+        session.add(User(username="john", role="user"))
+        session.flush()
+        repo.create_task_db(Task(task_name="kept", user_id=1))
+
+        with pytest.raises(IntegrityError):
+            repo.create_task_db(Task(task_name="orphan", user_id=99))
+        with pytest.raises(IntegrityError):
+            repo.create_tasks_bulk([{"task_name": "orphan", "user_id": 99}])
+        with pytest.raises(IntegrityError):
+            repo.update_task_fields_db(1, {"user_id": 99})
+        session.commit()
+
+        assert session.scalars(select(Task.task_name)).all() == ["kept"]
+        assert session.get(Task, 1).user_id == 1
+
+
 def test_get_task_by_id_db_queries_task(repo, mock_session):
     repo.get_task_by_id_db(1, 2)
     mock_session.query.assert_called_once_with(Task)
@@ -61,6 +208,12 @@ def test_get_task_by_id_db_filters_correctly(repo, mock_session):
     query_mock.filter_by.assert_called_once_with(task_id=10, user_id=20)
 
 
+def test_get_task_by_id_db_without_user_filters_by_task_only(repo, mock_session):
+    query_mock = mock_session.query.return_value
+    repo.get_task_by_id_db(10)
+    query_mock.filter_by.assert_called_once_with(task_id=10)
+
+
 def test_get_task_by_id_db_returns_first(repo, mock_session):
     query_mock = mock_session.query.return_value
     query_mock.filter_by.return_value.first.return_value = "task"
@@ -74,10 +227,31 @@ def test_update_task_db_merges_task(repo, mock_session):
     mock_session.merge.assert_called_once_with(task)
 
 
-def test_update_task_db_commits(repo, mock_session):
+def test_update_task_db_flushes_without_commit(repo, mock_session):
     task = Task(task_name="Update", user_id=1)
     repo.update_task_db(task)
-    mock_session.commit.assert_called()
+    mock_session.flush.assert_called_once()
+    mock_session.commit.assert_not_called()
+
+
+def test_update_task_db_returns_merged_task(repo, mock_session):
+    mock_session.merge.return_value = "merged"
+    assert repo.update_task_db(Task(task_name="Update", user_id=1)) == "merged"
+
+
+def test_update_task_fields_db_executes_one_statement(repo, mock_session):
+    mock_session.scalars.return_value.first.return_value = "task"
+    assert repo.update_task_fields_db(1, {"status": "completed"}, version=3) == "task"
+    mock_session.scalars.assert_called_once()
+    sql = str(mock_session.scalars.call_args.args[0])
+    assert "tasks.version =" in sql
+    assert "RETURNING" in sql
+
+
+def test_update_task_fields_db_without_version_has_no_guard(repo, mock_session):
+    repo.update_task_fields_db(1, {"status": "completed"})
+    sql = str(mock_session.scalars.call_args.args[0])
+    assert "WHERE tasks.task_id = :task_id_1 RETURNING" in sql
 
 
 def test_delete_task_db_deletes_task(repo, mock_session):
@@ -86,7 +260,188 @@ def test_delete_task_db_deletes_task(repo, mock_session):
     mock_session.delete.assert_called_once_with(task)
 
 
-def test_delete_task_db_commits(repo, mock_session):
+def test_delete_task_db_flushes_without_commit(repo, mock_session):
     task = Task(task_name="Delete", user_id=1)
     repo.delete_task_db(task)
-    mock_session.commit.assert_called_once()
+    mock_session.flush.assert_called_once()
+    mock_session.commit.assert_not_called()
+
+
+def test_delete_task_by_id_db_returns_rowcount(repo, mock_session):
+    mock_session.execute.return_value.rowcount = 1
+    assert repo.delete_task_by_id_db(1, 2) == 1
+    mock_session.commit.assert_not_called()
+
+
+def test_stream_task_records_db_yields_batches_from_one_query():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from models import Base, User
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(username="john", role="user"))
+        session.flush()
+        session.add_all([Task(task_name=f"t{n}", user_id=1, status="pending", priority="low") for n in range(5)])
+        session.add(Task(task_name="done", user_id=1, status="completed", priority="low"))
+        session.commit()
+
+        pages = list(TaskRepository(session).stream_task_records_db(1, batch_size=2, status="pending"))
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert all(isinstance(record, TaskRecord) for page in pages for record in page)
+
+
+def test_get_tasks_version_db_changes_on_every_kind_of_write():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from models import Base, User
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        repo = TaskRepository(session)
+        session.add(User(username="john", role="user"))
+        session.flush()
+        versions = [repo.get_tasks_version_db(1)]
+        repo.create_tasks_bulk([{"task_name": "a", "user_id": 1}, {"task_name": "b", "user_id": 1}])
+        versions.append(repo.get_tasks_version_db(1))
+        repo.update_task_fields_db(1, {"status": "completed"})
+        versions.append(repo.get_tasks_version_db(1))
+        task = repo.get_task_by_id_db(2)
+        task.task_name = "renamed"
+        repo.update_task_db(task)
+        versions.append(repo.get_tasks_version_db(1))
+        repo.delete_task_by_id_db(1, 1)
+        versions.append(repo.get_tasks_version_db(1))
+
+        assert versions[0] == (0, None)
+        assert [version[0] for version in versions] == [0, 2, 2, 2, 1]
+        assert len(set(versions)) == len(versions)
+        assert repo.get_tasks_version_db(99) is None
+
+
+def test_tasks_version_statement_only_reads_user_updated_at_index():
+    from sqlalchemy import create_engine
+    from models import Base
+    from repository.task_repository import tasks_version_statement
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statement = tasks_version_statement(1)
+    # task_id is the rowid on SQLite but not part of the index on PostgreSQL
+    assert "count(tasks.updated_at)" in str(statement)
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    assert any("COVERING INDEX ix_tasks_user_updated_at" in row[-1] for row in plan)
+
+
+def test_task_export_statement_follows_user_status_due_date_index():
+    from repository.task_repository import task_export_statement
+
+    sql = str(task_export_statement(1, priority="high"))
+    assert "tasks.priority =" in sql
+    assert sql.endswith("ORDER BY tasks.user_id, tasks.status, tasks.due_date")
+
+
+IMPORT_ROW = {"task_name": "a", "user_id": 1, "status": "pending", "due_date": date(2026, 1, 2), "priority": "low"}
+
+
+def test_import_tasks_db_uses_executemany_outside_postgresql(repo, mock_session):
+    mock_session.get_bind.return_value.dialect.name = "sqlite"
+    assert repo.import_tasks_db([IMPORT_ROW, IMPORT_ROW]) == 2
+    assert mock_session.execute.call_args.args[1] == [IMPORT_ROW, IMPORT_ROW]
+
+
+def test_import_tasks_db_copies_rows_on_postgresql(repo, mock_session):
+    mock_session.get_bind.return_value.dialect.name = "postgresql"
+    cursor = mock_session.connection.return_value.connection.driver_connection.cursor.return_value.__enter__.return_value
+    copy = cursor.copy.return_value.__enter__.return_value
+
+    assert repo.import_tasks_db([IMPORT_ROW]) == 1
+
+    assert cursor.copy.call_args.args[0] == (
+        "COPY tasks (task_name, user_id, status, due_date, priority, updated_at) FROM STDIN"
+    )
+    copy.write_row.assert_called_once_with(["a", 1, "pending", date(2026, 1, 2), "low", ANY])
+    mock_session.execute.assert_not_called()
+
+
+def test_import_tasks_db_copies_csv_with_psycopg2(repo, mock_session):
+    mock_session.get_bind.return_value.dialect.name = "postgresql"
+    cursor = MagicMock(spec=["copy_expert", "__enter__", "__exit__"])
+    cursor.__enter__.return_value = cursor
+    mock_session.connection.return_value.connection.driver_connection.cursor.return_value = cursor
+
+    repo.import_tasks_db([{**IMPORT_ROW, "task_name": "a, b", "due_date": None}])
+
+    sql, buffer = cursor.copy_expert.call_args.args
+    assert sql.endswith("FROM STDIN WITH (FORMAT csv)")
+    assert buffer.getvalue().startswith('"a, b",1,pending,,low,')
+
+
+def test_reads_use_router_session_and_writes_note_the_user(mock_session):
+    router = MagicMock()
+    repo = TaskRepository(session=mock_session, router=router)
+
+    repo.get_all_tasks_db(1)
+    repo.create_task_db(Task(task_name="a", user_id=1))
+
+    router.read_session.assert_called_once_with(1)
+    router.read_session.return_value.query.assert_called_once_with(Task)
+    mock_session.query.assert_not_called()
+    router.note_write.assert_called_once_with(1)
+
+
+def test_search_tasks_db_ranks_pages_and_follows_writes():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from models import Base, User
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([User(username="john", role="user"), User(username="jane", role="user")])
+        session.flush()
+        names = ["buy milk", "milk milk milk", "walk dog", "milk", "oat milk"]
+        session.add_all([Task(task_name=name, user_id=1) for name in names])
+        session.add(Task(task_name="milk", user_id=2))
+        session.flush()
+        repo = TaskRepository(session)
+
+        first = repo.search_tasks_db(1, "milk", 2)
+        last_record, last_score = first[-1]
+        second = repo.search_tasks_db(1, "milk", 10, after=(last_score, last_record.task_id))
+        found = [record.task_id for record, _ in first + second]
+        assert sorted(found) == [1, 2, 4, 5]
+        scores = [score for _, score in first + second]
+        assert scores == sorted(scores, reverse=True)
+
+        repo.update_task_fields_db(3, {"task_name": "walk milk"})
+        repo.delete_task_by_id_db(4, 1)
+        assert sorted(record.task_id for record, _ in repo.search_tasks_db(1, 'milk"*(', 10)) == [1, 2, 3, 5]
+
+
+def test_search_tasks_statement_rejects_unsupported_dialect():
+    from repository.task_repository import search_tasks_statement
+
+    with pytest.raises(ValueError, match="not supported on mysql"):
+        search_tasks_statement("mysql", 1, "milk", 10)
+
+
+def test_tasks_page_statement_walks_user_task_index_without_sorting():
+    from sqlalchemy import create_engine
+    from models import Base
+    from repository.task_repository import TASK_RECORD_COLUMNS, tasks_page_statement
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statement = tasks_page_statement(1, 100, after=500, columns=TASK_RECORD_COLUMNS)
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()]
+    engine.dispose()
+    assert any("ix_tasks_user_task" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
@@ -1,7 +1,9 @@
 import pytest
 from unittest.mock import MagicMock
 from models import Task
-from services.task_service import TaskService
+from sqlalchemy.exc import IntegrityError
+from services.task_service import TaskNotFoundError, TaskService, TaskVersionConflictError
+from services.user_cache import KnownUserCache
 
 
 @pytest.fixture
@@ -20,65 +22,165 @@ def service(mock_repo, mock_user_repo):
 
 
 def test_check_user_exists_returns_true_if_user_found(service, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = "user"
+    mock_user_repo.user_exists_db.return_value = True
     assert service._check_user_exists(1) is True
 
 
 def test_check_user_exists_returns_false_if_no_user(service, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = None
+    mock_user_repo.user_exists_db.return_value = False
     assert service._check_user_exists(1) is False
 
 
-def test_create_task_calls_user_check(service, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = "user"
+def test_check_user_exists_uses_cache(mock_repo, mock_user_repo):
+    cache = KnownUserCache()
+    cache.add(1)
+    service = TaskService(repository=mock_repo, user_repo=mock_user_repo, user_cache=cache)
+    assert service._check_user_exists(1) is True
+    mock_user_repo.user_exists_db.assert_not_called()
+
+
+def test_create_task_does_not_query_user(service, mock_user_repo):
     service.create_task("Task1", 1, "2025-10-12")
-    mock_user_repo.get_user_by_id_db.assert_called_once_with(1)
+    mock_user_repo.user_exists_db.assert_not_called()
+    mock_user_repo.get_user_by_id_db.assert_not_called()
 
 
-def test_create_task_raises_error_if_user_not_found(service, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = None
+def test_create_task_raises_error_if_user_not_found(service, mock_repo, mock_user_repo):
+    mock_repo.create_task_db.side_effect = IntegrityError("INSERT", {}, Exception("fk"))
+    mock_user_repo.user_exists_db.return_value = False
     with pytest.raises(ValueError, match="User with id=1 does not exist."):
         service.create_task("Task1", 1, "2025-10-12")
 
 
-def test_create_task_calls_repo_create_task_db(service, mock_repo, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = "user"
+def test_create_task_reraises_other_integrity_errors(service, mock_repo, mock_user_repo):
+    mock_repo.create_task_db.side_effect = IntegrityError("INSERT", {}, Exception("other"))
+    mock_user_repo.user_exists_db.return_value = True
+    with pytest.raises(IntegrityError):
+        service.create_task("Task1", 1, "2025-10-12")
+
+
+def test_create_task_calls_repo_create_task_db(service, mock_repo):
     service.create_task("T", 1, "2025-10-12")
     mock_repo.create_task_db.assert_called_once()
 
 
-def test_create_task_returns_repository_result(service, mock_repo, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = "user"
+def test_create_task_returns_repository_result(service, mock_repo):
     mock_repo.create_task_db.return_value = "task"
     result = service.create_task("T", 1, "2025-10-12")
     assert result == "task"
 
 
+def test_create_tasks_bulk_does_not_query_user(service, mock_user_repo):
+    service.create_tasks_bulk(1, [{"task_name": "A", "due_date": "2025-10-12"}] * 3)
+    mock_user_repo.user_exists_db.assert_not_called()
+
+
+def test_create_tasks_bulk_raises_if_user_not_found(service, mock_user_repo, mock_repo):
+    mock_repo.create_tasks_bulk.side_effect = IntegrityError("INSERT", {}, Exception("fk"))
+    mock_user_repo.user_exists_db.return_value = False
+    with pytest.raises(ValueError, match="User with id=1 does not exist."):
+        service.create_tasks_bulk(1, [{"task_name": "A", "due_date": "2025-10-12"}])
+
+
+def test_create_tasks_bulk_fills_defaults(service, mock_repo):
+    service.create_tasks_bulk(1, [{"task_name": "A", "due_date": "2025-10-12"}])
+    rows = mock_repo.create_tasks_bulk.call_args.args[0]
+    assert rows == [{"task_name": "A", "user_id": 1, "status": "pending", "due_date": "2025-10-12", "priority": "medium"}]
+
+
+def test_create_tasks_bulk_rejects_unknown_status_with_item_index(service, mock_repo):
+    tasks = [{"task_name": "A", "due_date": "2025-10-12"}, {"task_name": "B", "due_date": None, "status": "bogus"}]
+    with pytest.raises(ValueError, match="Task 1: Unknown task status: bogus."):
+        service.create_tasks_bulk(1, tasks)
+    mock_repo.create_tasks_bulk.assert_not_called()
+
+
+def test_create_task_rejects_unknown_priority(service, mock_repo):
+    with pytest.raises(ValueError, match="Unknown task priority: urgent."):
+        service.create_task("T", 1, None, priority="urgent")
+    mock_repo.create_task_db.assert_not_called()
+
+
 def test_get_tasks_for_user_checks_user(service, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = "user"
+    mock_user_repo.user_exists_db.return_value = True
     service.get_tasks_for_user(2)
-    mock_user_repo.get_user_by_id_db.assert_called_once_with(2)
+    mock_user_repo.user_exists_db.assert_called_once_with(2)
 
 
 def test_get_tasks_for_user_raises_if_user_not_found(service, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = None
+    mock_user_repo.user_exists_db.return_value = False
     with pytest.raises(ValueError, match="User with id=2 does not exist."):
         service.get_tasks_for_user(2)
 
 
 def test_get_tasks_for_user_returns_result(service, mock_repo, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = "user"
+    mock_user_repo.user_exists_db.return_value = True
     mock_repo.get_all_tasks_db.return_value = ["t1", "t2"]
     result = service.get_tasks_for_user(3)
     assert result == ["t1", "t2"]
 
 
+def test_get_tasks_page_passes_cursor(service, mock_repo):
+    service.get_tasks_page(3, 20, after=7)
+    mock_repo.get_tasks_page_db.assert_called_once_with(3, 20, 7)
+
+
+def test_get_tasks_page_does_not_query_user(service, mock_user_repo):
+    service.get_tasks_page(3, 20)
+    mock_user_repo.user_exists_db.assert_not_called()
+
+
+def test_get_tasks_page_raises_if_user_not_found(service, mock_repo):
+    mock_repo.get_tasks_page_db.return_value = None
+    with pytest.raises(ValueError, match="User with id=3 does not exist."):
+        service.get_tasks_page(3, 20)
+
+
+def test_get_tasks_page_passes_filters(service, mock_repo):
+    service.get_tasks_page(3, 20, status="pending", priority="high")
+    mock_repo.get_tasks_page_db.assert_called_once_with(3, 20, None, status="pending", priority="high")
+
+
+def test_get_tasks_page_rejects_unknown_status(service, mock_repo):
+    with pytest.raises(ValueError, match="Unknown task status: done."):
+        service.get_tasks_page(3, 20, status="done")
+    mock_repo.get_tasks_page_db.assert_not_called()
+
+
+def test_get_tasks_page_rejects_unknown_priority(service):
+    with pytest.raises(ValueError, match="Unknown task priority: urgent."):
+        service.get_tasks_page(3, 20, priority="urgent")
+
+
+def test_iter_tasks_for_user_raises_before_streaming(service, mock_repo):
+    mock_repo.get_tasks_page_db.return_value = None
+    with pytest.raises(ValueError, match="User with id=4 does not exist."):
+        service.iter_tasks_for_user(4)
+    mock_repo.iter_tasks_db.assert_not_called()
+
+
+def test_iter_tasks_for_user_continues_after_first_page(service, mock_repo):
+    first_page = [MagicMock(task_id=1), MagicMock(task_id=2)]
+    mock_repo.get_tasks_page_db.return_value = first_page
+    mock_repo.iter_tasks_db.return_value = iter(["t3"])
+    result = list(service.iter_tasks_for_user(4, batch_size=2))
+    assert result == first_page + ["t3"]
+    mock_repo.iter_tasks_db.assert_called_once_with(4, 2, after=2)
+
+
 def test_get_task_by_id_returns_task(service, mock_repo):
     mock_repo.get_task_by_id_db.return_value = "task"
     result = service.get_task_by_id(1)
     assert result == "task"
 
 
+def test_get_task_by_id_limits_lookup_to_user(service, mock_repo):
+    mock_repo.get_task_by_id_db.return_value = None
+    with pytest.raises(TaskNotFoundError):
+        service.get_task_by_id(1, user_id=2)
+    mock_repo.get_task_by_id_db.assert_called_once_with(1, 2)
+
+
 def test_get_task_by_id_raises_if_not_found(service, mock_repo):
     mock_repo.get_task_by_id_db.return_value = None
     with pytest.raises(ValueError, match="Task with id=9 does not exist."):
@@ -101,7 +203,7 @@ def test_update_task_sets_task_id(service, mock_repo):
 
 def test_update_task_returns_repo_result(service, mock_repo):
     mock_repo.get_task_by_id_db.return_value = Task(task_name="x", user_id=1)
-    mock_repo.update_user_db.return_value = "updated"
+    mock_repo.update_task_db.return_value = "updated"
     updated = Task(task_name="y", user_id=1)
     result = service.update_task(5, updated)
     assert result == "updated"
@@ -113,38 +215,224 @@ def test_update_task_raises_if_not_found(service, mock_repo):
         service.update_task(4, Task(task_name="x", user_id=1))
 
 
-def test_delete_task_checks_user(service, mock_user_repo, mock_repo):
-    mock_user_repo.get_user_by_id_db.return_value = "user"
-    mock_repo.get_task_by_id_db.return_value = Task(task_name="x", user_id=1)
+def test_update_task_fields_issues_single_update(service, mock_repo):
+    mock_repo.update_task_fields_db.return_value = "task"
+    result = service.update_task_fields(1, {"status": "completed"}, version=2)
+    assert result == "task"
+    mock_repo.update_task_fields_db.assert_called_once_with(1, {"status": "completed"}, 2)
+    mock_repo.get_task_by_id_db.assert_not_called()
+
+
+def test_update_task_fields_rejects_unknown_fields(service, mock_repo):
+    with pytest.raises(ValueError, match="Cannot update task fields: version."):
+        service.update_task_fields(1, {"version": 9})
+    mock_repo.update_task_fields_db.assert_not_called()
+
+
+def test_update_task_fields_rejects_empty_changes(service):
+    with pytest.raises(ValueError, match="No task fields to update."):
+        service.update_task_fields(1, {})
+
+
+def test_update_task_fields_rejects_unknown_status(service):
+    with pytest.raises(ValueError, match="Unknown task status: done."):
+        service.update_task_fields(1, {"status": "done"})
+
+
+def test_update_task_fields_raises_conflict_on_stale_version(service, mock_repo):
+    mock_repo.update_task_fields_db.return_value = None
+    mock_repo.get_task_by_id_db.return_value = "task"
+    with pytest.raises(TaskVersionConflictError):
+        service.update_task_fields(1, {"status": "completed"}, version=2)
+
+
+def test_update_task_fields_raises_not_found(service, mock_repo):
+    mock_repo.update_task_fields_db.return_value = None
+    mock_repo.get_task_by_id_db.return_value = None
+    with pytest.raises(TaskNotFoundError, match="Task with id=1 does not exist."):
+        service.update_task_fields(1, {"status": "completed"}, version=2)
+
+
+def test_update_task_fields_maps_missing_user(service, mock_repo, mock_user_repo):
+    mock_repo.update_task_fields_db.side_effect = IntegrityError("UPDATE", {}, Exception("fk"))
+    mock_user_repo.user_exists_db.return_value = False
+    with pytest.raises(ValueError, match="User with id=7 does not exist."):
+        service.update_task_fields(1, {"user_id": 7})
+
+
+def test_delete_task_issues_single_delete(service, mock_repo, mock_user_repo):
+    mock_repo.delete_task_by_id_db.return_value = 1
     service.delete_task(1, 2)
-    mock_user_repo.get_user_by_id_db.assert_called_once_with(2)
+    mock_repo.delete_task_by_id_db.assert_called_once_with(1, 2)
+    mock_user_repo.user_exists_db.assert_not_called()
 
 
-def test_delete_task_raises_if_user_not_found(service, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = None
+def test_delete_task_raises_if_user_not_found(service, mock_repo, mock_user_repo):
+    mock_repo.delete_task_by_id_db.return_value = 0
+    mock_user_repo.user_exists_db.return_value = False
     with pytest.raises(ValueError, match="User with id=2 does not exist."):
         service.delete_task(1, 2)
 
 
-def test_delete_task_calls_delete_task_db(service, mock_repo, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = "user"
-    task = Task(task_name="del", user_id=1)
-    mock_repo.get_task_by_id_db.return_value = task
-    service.delete_task(10, 1)
-    mock_repo.delete_task_db.assert_called_once_with(task)
+def test_delete_task_asks_database_not_cache_why_nothing_was_deleted(mock_repo, mock_user_repo):
+    cache = KnownUserCache()
+    cache.add(2)
+    service = TaskService(repository=mock_repo, user_repo=mock_user_repo, user_cache=cache)
+    mock_repo.delete_task_by_id_db.return_value = 0
+    mock_user_repo.user_exists_db.return_value = False
+    with pytest.raises(ValueError, match="User with id=2 does not exist."):
+        service.delete_task(1, 2)
 
 
-def test_delete_task_returns_result(service, mock_repo, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = "user"
-    task = Task(task_name="del", user_id=1)
-    mock_repo.get_task_by_id_db.return_value = task
-    mock_repo.delete_task_db.return_value = "deleted"
+def test_delete_task_returns_result(service, mock_repo):
+    mock_repo.delete_task_by_id_db.return_value = 1
     result = service.delete_task(10, 1)
-    assert result == "deleted"
+    assert result == 1
 
 
 def test_delete_task_raises_if_task_not_found(service, mock_repo, mock_user_repo):
-    mock_user_repo.get_user_by_id_db.return_value = "user"
-    mock_repo.get_task_by_id_db.return_value = None
+    mock_repo.delete_task_by_id_db.return_value = 0
+    mock_user_repo.user_exists_db.return_value = True
     with pytest.raises(ValueError, match="Task with id=10 does not exist."):
         service.delete_task(10, 1)
+
+
+def test_get_task_stats_returns_repository_stats(mock_repo, mock_user_repo):
+    stats_repo = MagicMock()
+    stats_repo.get_user_stats_db.return_value = {"total": 3}
+    service = TaskService(mock_repo, mock_user_repo, stats_repo=stats_repo)
+    assert service.get_task_stats(1) == {"total": 3}
+
+
+def test_get_task_stats_raises_for_missing_user(mock_repo, mock_user_repo):
+    stats_repo = MagicMock()
+    stats_repo.get_user_stats_db.return_value = None
+    service = TaskService(mock_repo, mock_user_repo, stats_repo=stats_repo)
+    with pytest.raises(ValueError):
+        service.get_task_stats(1)
+
+
+def test_get_task_records_page_raises_for_missing_user(service, mock_repo):
+    mock_repo.get_task_records_page_db.return_value = None
+    with pytest.raises(ValueError):
+        service.get_task_records_page(1, 10)
+
+
+def test_iter_task_record_pages_continues_after_full_first_page(service, mock_repo):
+    first_page = [MagicMock(task_id=1), MagicMock(task_id=2)]
+    mock_repo.get_task_records_page_db.return_value = first_page
+    mock_repo.iter_task_record_pages_db.return_value = iter([[MagicMock(task_id=3)]])
+    pages = list(service.iter_task_record_pages(1, batch_size=2))
+    assert pages[0] == first_page
+    assert len(pages) == 2
+    mock_repo.iter_task_record_pages_db.assert_called_once_with(1, 2, after=2)
+
+
+def test_export_task_records_checks_user_before_streaming(service, mock_repo, mock_user_repo):
+    mock_user_repo.user_exists_db.return_value = False
+    with pytest.raises(ValueError):
+        service.export_task_records(1)
+    mock_repo.stream_task_records_db.assert_not_called()
+
+
+def test_export_task_records_returns_repository_stream(service, mock_repo, mock_user_repo):
+    mock_user_repo.user_exists_db.return_value = True
+    assert service.export_task_records(1, status="pending") is mock_repo.stream_task_records_db.return_value
+    mock_repo.stream_task_records_db.assert_called_once_with(1, 1000, status="pending")
+
+
+def test_import_tasks_checks_users_once_per_batch_and_reports_rejects(service, mock_repo, mock_user_repo):
+    row = {"task_name": "a", "user_id": 1, "status": "pending", "due_date": None, "priority": "low"}
+    records = [
+        (1, row, None),
+        (2, {**row, "user_id": 2}, None),
+        (3, {**row, "status": "weird"}, None),
+        (4, None, "Missing field task_name."),
+        (5, row, None),
+    ]
+    mock_user_repo.existing_user_ids_db.return_value = {1}
+    mock_repo.import_tasks_db.side_effect = len
+
+    report = service.import_tasks(records, batch_size=10)
+
+    mock_user_repo.existing_user_ids_db.assert_called_once_with({1, 2})
+    mock_repo.import_tasks_db.assert_called_once_with([row, row])
+    assert report["imported"] == 2
+    assert report["rejected"] == 3
+    assert [reject["line"] for reject in report["rejects"]] == [3, 4, 2]
+
+
+def test_import_tasks_loads_in_batches(service, mock_repo, mock_user_repo):
+    row = {"task_name": "a", "user_id": 1, "status": "pending", "due_date": None, "priority": "low"}
+    mock_user_repo.existing_user_ids_db.return_value = {1}
+    mock_repo.import_tasks_db.side_effect = len
+
+    report = service.import_tasks(((line, row, None) for line in range(5)), batch_size=2)
+
+    assert mock_repo.import_tasks_db.call_count == 3
+    assert report["imported"] == 5
+
+
+def test_import_tasks_turns_integrity_error_into_value_error(service, mock_repo, mock_user_repo):
+    row = {"task_name": "a", "user_id": 1, "status": "pending", "due_date": None, "priority": "low"}
+    mock_user_repo.existing_user_ids_db.return_value = {1}
+    mock_repo.import_tasks_db.side_effect = IntegrityError("COPY", {}, Exception("fk"))
+    with pytest.raises(ValueError):
+        service.import_tasks([(1, row, None)])
+
+
+def test_search_tasks_rejects_query_without_words(service, mock_repo):
+    with pytest.raises(ValueError):
+        service.search_tasks(1, " !? ", 10)
+    mock_repo.search_tasks_db.assert_not_called()
+
+
+def test_search_tasks_checks_user_then_searches(service, mock_repo, mock_user_repo):
+    mock_user_repo.user_exists_db.return_value = True
+    service.search_tasks(1, "milk", 10, (0.5, 3))
+    mock_repo.search_tasks_db.assert_called_once_with(1, "milk", 10, (0.5, 3))
+
+
+def test_update_tasks_fields_reports_each_item(service, mock_repo, mock_user_repo):
+    from repository.task_repository import TaskUpdateResult
+
+    mock_user_repo.existing_user_ids_db.return_value = {2}
+    mock_repo.update_tasks_fields_db.return_value = [
+        TaskUpdateResult(1, "updated", 4), TaskUpdateResult(5, "not_found", None), TaskUpdateResult(6, "conflict", 3),
+    ]
+
+    results = service.update_tasks_fields([
+        (1, {"status": "completed", "user_id": 2}, None, None),
+        (1, {"status": "pending"}, None, None),
+        (2, {"color": "red"}, None, None),
+        (3, {"user_id": 9}, None, None),
+        (None, {}, None, "Each update needs an integer task_id."),
+        (5, {"task_name": "x"}, None, None),
+        (6, {"task_name": "y"}, 2, None),
+    ])
+
+    mock_repo.update_tasks_fields_db.assert_called_once_with([
+        (1, {"status": "completed", "user_id": 2}, None), (5, {"task_name": "x"}, None), (6, {"task_name": "y"}, 2),
+    ])
+    assert [(result["success"], result.get("reason")) for result in results] == [
+        (True, None), (False, "invalid"), (False, "invalid"), (False, "invalid"), (False, "invalid"),
+        (False, "not_found"), (False, "conflict"),
+    ]
+    assert results[0]["version"] == 4
+
+
+def test_update_task_fields_rejects_non_string_task_name(service, mock_repo):
+    with pytest.raises(ValueError, match="Task name must be a string"):
+        service.update_task_fields(1, {"task_name": {"a": 1}})
+    mock_repo.update_task_fields_db.assert_not_called()
+
+
+def test_update_tasks_fields_turns_a_race_into_a_conflict(service, mock_repo, mock_user_repo):
+    from sqlalchemy.orm.exc import StaleDataError
+    from services.task_service import TaskVersionConflictError
+
+    mock_user_repo.existing_user_ids_db.return_value = set()
+    mock_repo.update_tasks_fields_db.side_effect = StaleDataError("raced")
+
+    with pytest.raises(TaskVersionConflictError):
+        service.update_tasks_fields([(1, {"task_name": "x"}, None, None)])
@@ -0,0 +1,139 @@
+import pytest
+from datetime import date
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from models import Base, Task, TaskStats, User
+from repository.task_repository import TaskRepository
+from repository.task_stats_repository import TaskStatsRepository, task_stats_upsert
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine, expire_on_commit=False) as session:
+        session.add_all([User(username="john", role="user"), User(username="jane", role="user")])
+        session.commit()
+        yield session
+
+
+@pytest.fixture
+def stats_repo(session):
+    return TaskStatsRepository(session)
+
+
+@pytest.fixture
+def repo(session, stats_repo):
+    return TaskRepository(session, stats_repo)
+
+
+def stored_counts(session):
+    rows = session.execute(select(TaskStats.user_id, TaskStats.status, TaskStats.priority, TaskStats.count)).all()
+    return {tuple(row[:3]): row[3] for row in rows if row[3]}
+
+
+def test_writes_keep_summary_in_step_with_rebuild(session, repo, stats_repo):
+    repo.create_task_db(Task(task_name="a", user_id=1, status="pending", priority="high", due_date=date(2026, 1, 1)))
+    repo.create_tasks_bulk([
+        {"task_name": "b", "user_id": 1, "status": "pending", "priority": "low", "due_date": date(2026, 1, 1)},
+        {"task_name": "c", "user_id": 1, "status": "completed", "priority": "low", "due_date": date(2026, 1, 1)},
+    ])
+    repo.update_task_fields_db(1, {"status": "completed"})
+    repo.update_task_fields_db(2, {"user_id": 2})
+    repo.update_task_fields_db(3, {"task_name": "renamed"})
+    task = repo.get_task_by_id_db(3)
+    task.priority = "medium"
+    repo.update_task_db(task)
+    repo.delete_task_by_id_db(2, 2)
+    session.commit()
+
+    incremental = stored_counts(session)
+    stats_repo.rebuild_db()
+    session.commit()
+
+    assert incremental == stored_counts(session) == {(1, "completed", "high"): 1, (1, "completed", "medium"): 1}
+
+
+def test_delete_task_db_decrements_summary(session, repo):
+    task = repo.create_task_db(Task(task_name="a", user_id=1, status="pending", priority="low"))
+    repo.delete_task_db(task)
+    assert stored_counts(session) == {}
+
+
+def test_get_user_stats_db_counts_overdue_open_tasks(session, repo, stats_repo):
+    repo.create_tasks_bulk([
+        {"task_name": "late", "user_id": 1, "status": "pending", "priority": "low", "due_date": date(2026, 1, 1)},
+        {"task_name": "done", "user_id": 1, "status": "completed", "priority": "low", "due_date": date(2026, 1, 1)},
+        {"task_name": "later", "user_id": 1, "status": "in-progress", "priority": "high", "due_date": date(2027, 1, 1)},
+    ])
+
+    stats = stats_repo.get_user_stats_db(1, today=date(2026, 6, 1))
+
+    assert stats["total"] == 3
+    assert stats["by_status"] == {"pending": 1, "completed": 1, "in-progress": 1}
+    assert stats["by_priority"] == {"low": 2, "high": 1}
+    assert stats["overdue"] == 1
+
+
+def test_get_user_stats_db_returns_empty_stats_for_user_without_tasks(stats_repo):
+    assert stats_repo.get_user_stats_db(2, today=date(2026, 6, 1))["total"] == 0
+
+
+def test_get_user_stats_db_returns_none_for_missing_user(stats_repo):
+    assert stats_repo.get_user_stats_db(99, today=date(2026, 6, 1)) is None
+
+
+def test_rebuild_db_for_one_user_leaves_others_untouched(session, repo, stats_repo):
+    repo.create_task_db(Task(task_name="a", user_id=1, status="pending", priority="low"))
+    repo.create_task_db(Task(task_name="b", user_id=2, status="pending", priority="low"))
+    session.execute(TaskStats.__table__.update().values(count=5))
+
+    stats_repo.rebuild_db(user_id=1)
+
+    assert stored_counts(session) == {(1, "pending", "low"): 1, (2, "pending", "low"): 5}
+
+
+def test_upsert_adds_to_existing_count_on_postgresql():
+    sql = str(task_stats_upsert("postgresql").compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (user_id, status, priority) DO UPDATE SET count = (task_stats.count + excluded.count)" in sql
+
+
+def test_upsert_on_unsupported_dialect_is_a_value_error():
+    with pytest.raises(ValueError, match="not supported on mysql"):
+        task_stats_upsert("mysql")
+
+
+def test_batch_update_moves_counts_and_versions(session, repo, stats_repo):
+    repo.create_tasks_bulk([
+        {"task_name": name, "user_id": 1, "status": "pending", "priority": "low"} for name in ("a", "b", "c")
+    ])
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    results = repo.update_tasks_fields_db([
+        (1, {"status": "completed"}, None),
+        (2, {"status": "completed"}, 1),
+        (3, {"user_id": 2, "priority": "high"}, None),
+        (4, {"status": "completed"}, None),
+    ])
+    session.commit()
+
+    assert [(result.outcome, result.version) for result in results] == [
+        ("updated", 2), ("updated", 2), ("updated", 2), ("not_found", None)
+    ]
+    # one locking SELECT, one UPDATE per set of changed columns with or without a version, one stats upsert
+    assert len(statements) == 5
+    assert session.get(Task, 3).user_id == 2
+    after_writes = stored_counts(session)
+    stats_repo.rebuild_db()
+    session.commit()
+    assert after_writes == stored_counts(session)
+
+
+def test_batch_update_reports_stale_versions(session, repo):
+    repo.create_tasks_bulk([{"task_name": "a", "user_id": 1}])
+
+    results = repo.update_tasks_fields_db([(1, {"task_name": "b"}, 5)])
+
+    assert [(result.outcome, result.version) for result in results] == [("conflict", 1)]
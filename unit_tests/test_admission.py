@@ -0,0 +1,132 @@
+import threading
+
+from admission import ADMITTED, QUEUED, REJECTED, AdmissionGate, TokenBucketLimiter
+from app import create_app
+from models import Base
+from settings import Settings
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_gate_admits_up_to_limit_then_rejects_when_queue_is_full():
+    gate = AdmissionGate(limit=1, max_queue=0, queue_timeout=0.01)
+
+    assert gate.acquire() == ADMITTED
+    assert gate.acquire() == REJECTED
+    gate.release()
+    assert gate.acquire() == ADMITTED
+
+
+def test_gate_queues_until_a_slot_frees():
+    gate = AdmissionGate(limit=1, max_queue=1, queue_timeout=5.0)
+    gate.acquire()
+    outcomes = []
+    waiter = threading.Thread(target=lambda: outcomes.append(gate.acquire()))
+    waiter.start()
+    while gate.stats()["waiting"] == 0:
+        pass
+
+    gate.release()
+    waiter.join()
+
+    assert outcomes == [QUEUED]
+    assert gate.stats()["in_flight"] == 1
+
+
+def test_gate_rejects_after_queue_timeout():
+    gate = AdmissionGate(limit=1, max_queue=1, queue_timeout=0.01)
+    gate.acquire()
+
+    assert gate.acquire() == REJECTED
+    assert gate.stats()["waiting"] == 0
+
+
+def test_token_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rate=2.0, burst=2, clock=clock)
+
+    assert limiter.allow(1) == (True, 0)
+    assert limiter.allow(1) == (True, 0)
+    assert limiter.allow(1) == (False, 1)
+    assert limiter.allow(2) == (True, 0)
+    clock.now += 0.5
+    assert limiter.allow(1) == (True, 0)
+
+
+def test_token_bucket_forgets_idle_keys_beyond_max_keys():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rate=1.0, burst=1, max_keys=2, clock=clock)
+    limiter.allow(1)
+    limiter.allow(2)
+    clock.now += 5
+
+    limiter.allow(3)
+
+    assert limiter.stats()["tracked_keys"] == 1
+
+
+def test_token_bucket_drops_least_recently_used_busy_keys_beyond_max_keys():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rate=1.0, burst=1, max_keys=2, clock=clock)
+    limiter.allow(1)
+    limiter.allow(2)
+    limiter.allow(1)
+
+    limiter.allow(3)
+
+    assert limiter.stats()["tracked_keys"] == 2
+    assert limiter.allow(1) == (False, 1)
+    assert limiter.allow(2) == (True, 0)
+
+
+def test_app_returns_429_with_retry_after_per_user():
+    app = create_app(Settings(DATABASE_URL="sqlite://", RATE_LIMIT_PER_SECOND=0.001, RATE_LIMIT_BURST=1))
+    Base.metadata.create_all(app.engine)
+    client = app.test_client()
+
+    assert client.get("/users/1/stats").status_code == 404
+    response = client.get("/users/1/stats")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # other users and monitoring are unaffected
+    assert client.get("/users/2/stats").status_code == 404
+    assert client.get("/metrics").status_code == 200
+    assert 'http_admission_total{outcome="rejected",reason="rate_limit"} 1' in client.get("/metrics").text
+
+
+def test_app_returns_503_when_gate_is_full():
+    app = create_app(Settings(DATABASE_URL="sqlite://", MAX_CONCURRENT_REQUESTS=1, ADMISSION_QUEUE_DEPTH=0))
+    Base.metadata.create_all(app.engine)
+    client = app.test_client()
+    app.gate.acquire()
+
+    response = client.get("/users/1/stats")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/admission/stats").get_json()["gate"]["in_flight"] == 1
+    app.gate.release()
+    client.get("/users/1/stats")
+    assert app.gate.stats()["in_flight"] == 0
+
+
+def test_rate_limited_app_leaves_the_import_stream_to_the_view():
+    app = create_app(Settings(DATABASE_URL="sqlite://", RATE_LIMIT_PER_SECOND=100))
+    Base.metadata.create_all(app.engine)
+    client = app.test_client()
+    client.post("/user", json={"username": "john", "role": "user"})
+
+    response = client.post(
+        "/tasks/import",
+        data=b'{"task_name": "a", "user_id": 1}\n{"task_name": "b", "user_id": 1}\n',
+        content_type="application/json",
+    )
+
+    assert response.get_json()["imported"] == 2
+    app.engine.dispose()
@@ -1,15 +1,20 @@
 import pytest
+from datetime import date, datetime
 from unittest.mock import MagicMock
-from app import app
+from app import Settings, app
+from repository.task_repository import TaskRecord
+from serializers import tasks_etag
+from services.task_service import TaskNotFoundError, TaskVersionConflictError
 
 
 @pytest.fixture
 def client(monkeypatch):
     mock_user_service = MagicMock()
     mock_task_service = MagicMock()
+    mock_task_service.get_tasks_version.return_value = (0, None)
 
-    monkeypatch.setattr("app.user_service", mock_user_service)
-    monkeypatch.setattr("app.task_service", mock_task_service)
+    monkeypatch.setattr(app, "user_service", mock_user_service)
+    monkeypatch.setattr(app, "task_service", mock_task_service)
 
     app.testing = True
     with app.test_client() as client:
@@ -73,46 +78,253 @@ def test_create_task_returns_400_if_user_not_found(client):
     assert response.status_code == 400
 
 
+def test_create_tasks_bulk_returns_201(client):
+    app.task_service.create_tasks_bulk.return_value = [1, 2]
+    response = client.post("/tasks/bulk", json={
+        "user_id": 1,
+        "tasks": [
+            {"task_name": "T1", "due_date": "2025-12-12"},
+            {"task_name": "T2", "due_date": {"year": 2025, "month": 12, "day": 13}},
+        ]
+    })
+    assert response.status_code == 201
+    assert response.get_json()["task_ids"] == [1, 2]
+
+
+def test_create_tasks_bulk_returns_400_if_user_not_found(client):
+    app.task_service.create_tasks_bulk.side_effect = ValueError("User with id=1 does not exist.")
+    response = client.post("/tasks/bulk", json={
+        "user_id": 1,
+        "tasks": [{"task_name": "T1", "due_date": "2025-12-12"}]
+    })
+    assert response.status_code == 400
+
+
 def test_get_all_tasks_returns_200(client):
-    app.task_service.get_tasks_for_user.return_value = []
+    app.task_service.iter_task_record_pages.return_value = []
+    response = client.get("/tasks/1")
+    assert response.status_code == 200
+
+
+def test_get_all_tasks_streams_json_array(client):
+    record = TaskRecord(1, "T1", "pending", date(2026, 1, 2), "low", 1)
+    app.task_service.iter_task_record_pages.return_value = [[record, record], [record._replace(task_id=2)]]
     response = client.get("/tasks/1")
+    assert [task["task_id"] for task in response.get_json()] == [1, 1, 2]
+    assert response.get_json()[0]["due_date"] == "2026-01-02"
+
+
+def test_get_all_tasks_sets_etag(client):
+    app.task_service.get_tasks_version.return_value = (2, datetime(2026, 1, 2, 3, 4, 5))
+    app.task_service.iter_task_record_pages.return_value = []
+    response = client.get("/tasks/1")
+    etag = response.headers["ETag"]
+    response.close()
+    assert etag == f'"{tasks_etag((2, datetime(2026, 1, 2, 3, 4, 5)), b"")}"'
+    assert client.get("/tasks/1?limit=5").headers["ETag"] != etag
+
+
+def test_get_all_tasks_returns_304_without_loading_tasks(client):
+    app.task_service.get_tasks_version.return_value = (2, datetime(2026, 1, 2, 3, 4, 5))
+    etag = client.get("/tasks/1?limit=5").headers["ETag"]
+    app.task_service.get_task_records_page.reset_mock()
+
+    response = client.get("/tasks/1?limit=5", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    app.task_service.get_task_records_page.assert_not_called()
+
+
+def test_get_all_tasks_returns_200_once_version_changes(client):
+    app.task_service.get_tasks_version.return_value = (2, datetime(2026, 1, 2, 3, 4, 5))
+    app.task_service.get_task_records_page.return_value = []
+    etag = client.get("/tasks/1?limit=5").headers["ETag"]
+    app.task_service.get_tasks_version.return_value = (1, datetime(2026, 1, 2, 3, 4, 5))
+
+    response = client.get("/tasks/1?limit=5", headers={"If-None-Match": etag})
+
     assert response.status_code == 200
 
 
+def test_search_tasks_returns_ranked_page_with_cursor(client):
+    records = [TaskRecord(i, "milk", "pending", None, "low", 1) for i in (3, 4)]
+    app.task_service.search_tasks.return_value = [(records[0], 0.5), (records[1], 0.25)]
+    response = client.get("/tasks/1/search?q=milk&limit=2&after=0.75:9")
+    app.task_service.search_tasks.assert_called_once_with(1, "milk", 2, (0.75, 9))
+    assert [task["task_id"] for task in response.get_json()["tasks"]] == [3, 4]
+    assert response.get_json()["next_after"] == "0.25:4"
+
+
+def test_search_tasks_returns_400_on_invalid_query(client):
+    app.task_service.search_tasks.side_effect = ValueError("Search query must contain at least one word.")
+    assert client.get("/tasks/1/search?q=").status_code == 400
+    assert client.get("/tasks/1/search?q=milk&after=nonsense").status_code == 400
+
+
+def test_batch_update_parses_items_and_returns_results(client):
+    app.task_service.update_tasks_fields.return_value = [
+        {"task_id": 1, "success": True, "version": 2},
+        {"task_id": None, "success": False, "reason": "invalid", "error": "x"},
+    ]
+    response = client.patch("/tasks", json={"tasks": [
+        {"task_id": 1, "status": "completed", "due_date": "2026-01-02", "version": 1}, {"status": "pending"},
+    ]})
+    assert response.status_code == 202
+    assert response.get_json()["success"] is False
+    items = app.task_service.update_tasks_fields.call_args.args[0]
+    assert items[0] == (1, {"status": "completed", "due_date": date(2026, 1, 2)}, 1, None)
+    assert items[1][3] is not None
+
+
+def test_batch_update_rejects_bad_body_and_races(client):
+    assert client.patch("/tasks", json={"tasks": []}).status_code == 400
+    assert client.patch("/tasks", json=[{"task_id": 1}]).status_code == 400
+    app.task_service.update_tasks_fields.side_effect = TaskVersionConflictError("raced")
+    assert client.patch("/tasks", json={"tasks": [{"task_id": 1, "task_name": "x"}]}).status_code == 409
+
+
 def test_get_all_tasks_returns_400_if_user_missing(client):
-    app.task_service.get_tasks_for_user.side_effect = ValueError("User missing")
+    app.task_service.iter_task_record_pages.side_effect = ValueError("User missing")
     response = client.get("/tasks/1")
     assert response.status_code == 400
 
 
+def test_get_all_tasks_paginated_passes_cursor(client):
+    app.task_service.get_task_records_page.return_value = []
+    client.get("/tasks/1?limit=10&after=5")
+    app.task_service.get_task_records_page.assert_called_once_with(user_id=1, limit=10, after=5)
+
+
+def test_get_all_tasks_paginated_returns_next_cursor(client):
+    records = [TaskRecord(i, "T", "pending", None, "low", 1) for i in (3, 4)]
+    app.task_service.get_task_records_page.return_value = records
+    response = client.get("/tasks/1?limit=2")
+    assert response.get_json()["next_after"] == 4
+
+
+def test_get_all_tasks_paginated_last_page_has_no_cursor(client):
+    records = [TaskRecord(3, "T", "pending", None, "low", 1)]
+    app.task_service.get_task_records_page.return_value = records
+    response = client.get("/tasks/1?limit=2")
+    assert response.get_json()["next_after"] is None
+
+
+def test_get_all_tasks_passes_filters(client):
+    app.task_service.get_task_records_page.return_value = []
+    client.get("/tasks/1?limit=10&status=pending&priority=high&due_before=2026-11-01")
+    app.task_service.get_task_records_page.assert_called_once_with(
+        user_id=1, limit=10, after=None, status="pending", priority="high", due_before=date(2026, 11, 1)
+    )
+
+
+def test_get_all_tasks_includes_archive_only_when_asked(client):
+    app.task_service.get_task_records_page.return_value = []
+    first = client.get("/tasks/1?limit=10&include_archived=true")
+    app.task_service.get_task_records_page.assert_called_once_with(
+        user_id=1, limit=10, after=None, include_archived=True
+    )
+    second = client.get("/tasks/1?limit=10&include_archived=no")
+    assert app.task_service.get_task_records_page.call_args.kwargs == {"user_id": 1, "limit": 10, "after": None}
+    assert first.headers["ETag"] != second.headers["ETag"]
+
+
+def test_get_all_tasks_returns_400_on_invalid_date_filter(client):
+    response = client.get("/tasks/1?due_before=tomorrow")
+    assert response.status_code == 400
+
+
+def test_create_tasks_bulk_returns_400_for_item_without_name(client):
+    response = client.post("/tasks/bulk", json={"user_id": 1, "tasks": [{"due_date": "2026-01-01"}]})
+    assert response.status_code == 400
+    app.task_service.create_tasks_bulk.assert_not_called()
+
+
+@pytest.mark.parametrize("body", [{"user_id": 1}, {"user_id": 1, "tasks": 5}, ["tasks"]])
+def test_create_tasks_bulk_returns_400_without_tasks_list(client, body):
+    response = client.post("/tasks/bulk", json=body)
+    assert response.status_code == 400
+    app.task_service.create_tasks_bulk.assert_not_called()
+
+
 def test_update_task_returns_202(client):
-    mock_task = MagicMock(
-        task_name="old", user_id=1, status="pending",
-        due_date="2025-10-10", priority="medium"
+    app.task_service.update_task_fields.return_value = MagicMock(
+        task_id=1, task_name="new", status="pending", due_date=date(2025, 10, 11), priority="high", version=2
     )
-    app.task_service.get_task_by_id.return_value = mock_task
     response = client.patch("/tasks/1", json={
         "task_name": "new",
-        "user_id": 1,
-        "status": "done",
         "due_date": "2025-10-11",
         "priority": "high"
     })
     assert response.status_code == 202
+    assert response.get_json()["task"]["version"] == 2
+
+
+def test_update_task_sends_only_changed_fields(client):
+    app.task_service.update_task_fields.return_value = MagicMock(
+        task_id=1, task_name="new", status="pending", due_date=None, priority="low", version=4
+    )
+    client.patch("/tasks/1", json={"status": "completed", "version": 3})
+    app.task_service.update_task_fields.assert_called_once_with(1, {"status": "completed"}, 3)
+
+
+def test_update_task_reads_version_from_if_match(client):
+    app.task_service.update_task_fields.return_value = MagicMock(
+        task_id=1, task_name="new", status="pending", due_date=None, priority="low", version=6
+    )
+    client.patch("/tasks/1", json={"status": "completed"}, headers={"If-Match": '"5"'})
+    app.task_service.update_task_fields.assert_called_once_with(1, {"status": "completed"}, 5)
+
+
+def test_update_task_with_if_match_star_is_unguarded(client):
+    app.task_service.update_task_fields.return_value = MagicMock(
+        task_id=1, task_name="new", status="pending", due_date=None, priority="low", version=6
+    )
+    response = client.patch("/tasks/1", json={"status": "completed"}, headers={"If-Match": "*"})
+    assert response.status_code == 202
+    app.task_service.update_task_fields.assert_called_once_with(1, {"status": "completed"}, None)
+
+
+def test_update_task_clears_due_date(client):
+    app.task_service.update_task_fields.return_value = MagicMock(
+        task_id=1, task_name="new", status="pending", due_date=None, priority="low", version=2
+    )
+    response = client.patch("/tasks/1", json={"due_date": None})
+    assert response.status_code == 202
+    app.task_service.update_task_fields.assert_called_once_with(1, {"due_date": None}, None)
+
+
+@pytest.mark.parametrize("body, headers", [
+    (["not", "an", "object"], {}),
+    ({"due_date": "tomorrow"}, {}),
+    ({"due_date": {"year": 2026}}, {}),
+    ({"status": "completed"}, {"If-Match": '"abc"'}),
+    ({"status": "completed", "version": "1"}, {}),
+])
+def test_update_task_returns_400_on_invalid_input(client, body, headers):
+    response = client.patch("/tasks/1", json=body, headers=headers)
+    assert response.status_code == 400
+    app.task_service.update_task_fields.assert_not_called()
 
 
 def test_update_task_returns_404_if_not_found(client):
-    app.task_service.get_task_by_id.side_effect = ValueError("not found")
-    response = client.patch("/tasks/1", json={
-        "task_name": "new",
-        "user_id": 1,
-        "status": "done",
-        "due_date": "2025-10-11",
-        "priority": "high"
-    })
+    app.task_service.update_task_fields.side_effect = TaskNotFoundError("not found")
+    response = client.patch("/tasks/1", json={"task_name": "new"})
     assert response.status_code == 404
 
 
+def test_update_task_returns_409_on_version_conflict(client):
+    app.task_service.update_task_fields.side_effect = TaskVersionConflictError("conflict")
+    response = client.patch("/tasks/1", json={"task_name": "new", "version": 1})
+    assert response.status_code == 409
+
+
+def test_update_task_returns_400_on_invalid_field(client):
+    app.task_service.update_task_fields.side_effect = ValueError("Unknown task status: done.")
+    response = client.patch("/tasks/1", json={"status": "done"})
+    assert response.status_code == 400
+
+
 def test_delete_task_returns_202(client):
     response = client.delete("/tasks/1?user_id=1")
     assert response.status_code == 202
@@ -122,3 +334,167 @@ def test_delete_task_returns_400_if_user_missing(client):
     app.task_service.delete_task.side_effect = ValueError("User missing")
     response = client.delete("/tasks/1?user_id=1")
     assert response.status_code == 400
+
+
+def test_request_commits_session_once_on_success(client, monkeypatch):
+    session = MagicMock()
+    monkeypatch.setattr(app, "_session", MagicMock(return_value=session))
+    client.delete("/user/1")
+    session.commit.assert_called_once()
+    session.rollback.assert_not_called()
+
+
+def test_request_rolls_back_session_on_error(client, monkeypatch):
+    session = MagicMock()
+    monkeypatch.setattr(app, "_session", MagicMock(return_value=session))
+    app.user_service.delete_user.side_effect = ValueError("not found")
+    client.delete("/user/1")
+    session.rollback.assert_called_once()
+    session.commit.assert_not_called()
+
+
+def test_request_removes_scoped_session_on_teardown(client, monkeypatch):
+    scoped = MagicMock()
+    monkeypatch.setattr(app, "_session", scoped)
+    client.delete("/user/1")
+    scoped.remove.assert_called_once()
+
+
+def test_pool_stats_returns_200(client):
+    response = client.get("/pool/stats")
+    assert response.status_code == 200
+    assert "checked_out" in response.get_json()
+
+
+def test_settings_from_env_reads_pool_settings(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    monkeypatch.setenv("POOL_SIZE", "20")
+    monkeypatch.setenv("POOL_PRE_PING", "false")
+    settings = Settings.from_env()
+    assert settings.DATABASE_URL == "sqlite://"
+    assert settings.POOL_SIZE == 20
+    assert settings.POOL_PRE_PING is False
+
+
+def test_get_task_returns_task_with_version_etag(client):
+    app.task_service.get_task_by_id.return_value = MagicMock(
+        task_id=5, task_name="T", status="pending", due_date=None, priority="low", version=3
+    )
+
+    response = client.get("/tasks/1/5")
+
+    assert response.get_json()["task"]["task_name"] == "T"
+    assert response.headers["ETag"] == '"3"'
+    app.task_service.get_task_by_id.assert_called_once_with(5, 1)
+    assert client.get("/tasks/1/5", headers={"If-None-Match": '"3"'}).status_code == 304
+
+
+def test_get_task_returns_404_if_not_found(client):
+    app.task_service.get_task_by_id.side_effect = TaskNotFoundError("Task with id=5 does not exist.")
+    assert client.get("/tasks/1/5").status_code == 404
+
+
+def test_get_task_reads_through_task_cache_and_sees_committed_updates():
+    from app import create_app
+    from models import Base
+
+    cached = create_app(Settings(DATABASE_URL="sqlite://", TASK_CACHE_SIZE=10))
+    Base.metadata.create_all(cached.engine)
+    client = cached.test_client()
+    client.post("/user", json={"username": "john", "role": "user"})
+    client.post("/tasks", json={"task_name": "T", "user_id": 1, "due_date": "2026-01-01"})
+
+    client.get("/tasks/1/1")
+    assert client.get("/tasks/1/1").get_json()["task"]["task_name"] == "T"
+    client.patch("/tasks/1", json={"task_name": "renamed"})
+
+    assert client.get("/tasks/1/1").get_json()["task"]["task_name"] == "renamed"
+    assert client.get("/tasks/2/1").status_code == 404
+    assert client.get("/cache/stats").get_json()["hits"] >= 1
+    cached.shutdown()
+
+
+def test_cache_stats_reports_disabled_cache(client):
+    response = client.get("/cache/stats")
+    assert response.get_json() == {"enabled": False}
+
+
+def test_sweeper_stats_returns_200(client):
+    response = client.get("/sweeper/stats")
+    assert response.status_code == 200
+    assert response.get_json()["running"] is False
+
+
+def test_responses_carry_server_timing_header(client):
+    response = client.get("/pool/stats")
+    assert response.headers["Server-Timing"].startswith('db;desc="')
+
+
+def test_metrics_endpoint_reports_routes(client):
+    client.get("/pool/stats")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'http_requests_total{route="/pool/stats",method="GET",status="200"}' in response.get_data(as_text=True)
+
+
+def test_get_task_stats_returns_200(client):
+    app.task_service.get_task_stats.return_value = {"total": 2, "by_status": {"pending": 2}}
+    response = client.get("/users/1/stats")
+    assert response.status_code == 200
+    assert response.get_json()["total"] == 2
+
+
+def test_get_task_stats_returns_404_on_missing_user(client):
+    app.task_service.get_task_stats.side_effect = ValueError("User with id=1 does not exist.")
+    response = client.get("/users/1/stats")
+    assert response.status_code == 404
+
+
+def test_export_tasks_streams_ndjson(client):
+    app.task_service.export_task_records.return_value = iter([[TaskRecord(1, "T", "pending", None, "low", 1)]])
+    with client.get("/tasks/1/export") as response:
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        assert response.get_data().count(b"\n") == 1
+
+
+def test_export_tasks_streams_csv_with_attachment_name(client):
+    app.task_service.export_task_records.return_value = iter([])
+    with client.get("/tasks/1/export?format=csv") as response:
+        assert response.mimetype == "text/csv"
+        assert response.headers["Content-Disposition"] == "attachment; filename=tasks-1.csv"
+
+
+def test_export_tasks_rejects_unknown_format(client):
+    response = client.get("/tasks/1/export?format=xml")
+    assert response.status_code == 400
+
+
+def test_export_tasks_returns_400_if_user_missing(client):
+    app.task_service.export_task_records.side_effect = ValueError("User with id=1 does not exist.")
+    response = client.get("/tasks/1/export")
+    assert response.status_code == 400
+
+
+def test_import_tasks_returns_report(client):
+    app.task_service.import_tasks.return_value = {"imported": 2, "rejected": 0, "rejects": []}
+    response = client.post("/tasks/import", data=b'{"task_name": "a", "user_id": 1}\n')
+    assert response.status_code == 200
+    assert response.get_json()["imported"] == 2
+
+
+def test_import_tasks_rejects_unknown_format(client):
+    response = client.post("/tasks/import?format=xml", data=b"")
+    assert response.status_code == 400
+
+
+def test_known_user_cache_is_off_unless_configured():
+    from app import create_app
+
+    default = create_app(Settings(DATABASE_URL="sqlite://"))
+    configured = create_app(Settings(DATABASE_URL="sqlite://", KNOWN_USER_CACHE_SIZE=10, KNOWN_USER_CACHE_TTL=5.0))
+
+    assert default.user_cache is None
+    assert (configured.user_cache.maxsize, configured.user_cache.ttl) == (10, 5.0)
+    default.shutdown()
+    configured.shutdown()
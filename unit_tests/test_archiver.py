@@ -0,0 +1,127 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from archiver import TaskArchiver
+from models import Base, Task, TaskArchive, TaskStats, User, task_partitioning_statements
+from repository.task_cache import CachedTaskRepository, LRUTTLCache
+from repository.task_repository import TASK_RECORD_COLUMNS, TaskRepository
+from repository.task_stats_repository import TaskStatsRepository
+
+NOW = datetime(2026, 6, 1)
+OLD = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = scoped_session(sessionmaker(engine, expire_on_commit=False))
+    session.add(User(username="john", role="user"))
+    session.flush()
+    TaskRepository(session, TaskStatsRepository(session)).create_tasks_bulk(
+        [{"task_name": f"old {i}", "user_id": 1, "status": "completed", "due_date": date(2026, 1, 1)}
+         for i in range(5)]
+        + [
+            {"task_name": "recent", "user_id": 1, "status": "completed"},
+            {"task_name": "open", "user_id": 1, "status": "pending"},
+        ]
+    )
+    # stale, except for "recent"
+    session.execute(text("UPDATE tasks SET updated_at = :old WHERE task_name <> 'recent'"), {"old": OLD})
+    session.commit()
+    session.remove()
+    yield session
+    engine.dispose()
+
+
+def archiver(session, **kwargs):
+    return TaskArchiver(session, older_than_days=30, clock=lambda: NOW, **kwargs)
+
+
+def test_run_once_moves_old_completed_tasks_in_batches(session):
+    run = archiver(session, batch_size=2).run_once()
+
+    assert (run.batches, run.tasks, run.error) == (3, 5, None)
+    assert session.scalars(select(Task.task_name).order_by(Task.task_id)).all() == ["recent", "open"]
+    archived = session.execute(select(TaskArchive).order_by(TaskArchive.task_id)).scalars().all()
+    assert [task.task_name for task in archived] == [f"old {i}" for i in range(5)]
+    assert all(task.updated_at == OLD and task.archived_at is not None for task in archived)
+    assert archiver(session).run_once().tasks == 0
+
+
+def test_run_once_stops_after_max_batches(session):
+    run = archiver(session, batch_size=2, max_batches=1).run_once()
+
+    assert (run.batches, run.tasks) == (1, 2)
+
+
+def test_reads_include_archive_only_when_asked(session):
+    archiver(session).run_once()
+    repo = TaskRepository(session)
+
+    assert [record.task_name for record in repo.get_task_records_page_db(1, 10)] == ["recent", "open"]
+    page = repo.get_task_records_page_db(1, 3, include_archived=True)
+    assert [record.task_id for record in page] == [1, 2, 3]
+    rest = repo.get_task_records_page_db(1, 10, after=3, status="completed", include_archived=True)
+    assert [record.task_name for record in rest] == ["old 3", "old 4", "recent"]
+    assert repo.get_task_records_page_db(99, 10, include_archived=True) is None
+    exported = [record for page in repo.stream_task_records_db(1, include_archived=True) for record in page]
+    assert len(exported) == 7
+    assert len(repo.get_all_tasks_db(1)) == 2
+    assert len(repo.get_all_tasks_db(1, include_archived=True)) == 7
+    assert not repo.search_tasks_db(1, "old", 10)
+
+
+def test_stats_keep_counting_archived_tasks(session):
+    archiver(session).run_once()
+    counts = lambda: sorted(session.execute(select(TaskStats.status, TaskStats.count)).all())
+    incremental = counts()
+
+    TaskStatsRepository(session).rebuild_db()
+
+    assert incremental == counts() == [("completed", 6), ("pending", 1)]
+
+
+def test_archiving_drops_cached_tasks(session):
+    cache = LRUTTLCache()
+    repo = CachedTaskRepository(session, cache)
+    assert repo.get_task_by_id_db(1) is not None
+    session.remove()
+
+    archiver(session, repository=repo).run_once()
+
+    assert repo.get_task_by_id_db(1) is None
+
+
+def test_archive_query_uses_partial_index(session):
+    plan = session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT task_id FROM tasks "
+        "WHERE status = 'completed' AND updated_at < '2026-05-01' ORDER BY updated_at"
+    )).all()
+    session.remove()
+
+    assert any("ix_tasks_completed_updated_at" in row[-1] for row in plan)
+
+
+def test_task_archive_has_every_task_column():
+    assert {column.key for column in TASK_RECORD_COLUMNS} <= set(TaskArchive.__table__.columns.keys())
+    assert set(Task.__table__.columns.keys()) < set(TaskArchive.__table__.columns.keys())
+
+
+def test_partitioning_moves_rows_and_recreates_indexes():
+    statements = task_partitioning_statements()
+
+    assert "PARTITION BY LIST (status)" in statements[2]
+    assert "INSERT INTO tasks SELECT * FROM tasks_unpartitioned" in statements
+    created = [statement for statement in statements if statement.startswith("CREATE INDEX")]
+    assert len(created) == len(Task.__table__.indexes)
+    assert statements.index("DROP TABLE tasks_unpartitioned") < statements.index(created[0])
+
+
+def test_entity_pages_reject_include_archived(session):
+    with pytest.raises(ValueError, match="only be listed as records"):
+        TaskRepository(session).get_tasks_page_db(1, 10, include_archived=True)
+    session.remove()
@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from asgi_app import app, create_asgi_app
+from settings import Settings
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, "user_service", AsyncMock())
+    monkeypatch.setattr(app, "task_service", AsyncMock())
+    session = AsyncMock(in_transaction=MagicMock(return_value=False))
+    monkeypatch.setattr(app, "_session", MagicMock(return_value=session, remove=AsyncMock()))
+    app.testing = True
+    return app.test_client()
+
+
+def test_create_user_returns_201(client):
+    app.user_service.create_user.return_value = MagicMock(id=1)
+    response = asyncio.run(client.post("/user", json={"username": "john", "role": "admin"}))
+    assert response.status_code == 201
+
+
+def test_create_task_returns_400_if_user_not_found(client):
+    app.task_service.create_task.side_effect = ValueError("User with id=1 does not exist.")
+    response = asyncio.run(client.post("/tasks", json={"task_name": "T", "user_id": 1, "due_date": "2025-12-12"}))
+    assert response.status_code == 400
+
+
+def test_get_all_tasks_streams_json_array(client):
+    async def tasks():
+        yield MagicMock(task_id=1, task_name="T1", status="pending", due_date=None, priority="low", version=1)
+
+    app.task_service.iter_tasks_for_user.return_value = tasks()
+
+    async def call():
+        response = await client.get("/tasks/1")
+        return await response.get_json()
+
+    assert [task["task_id"] for task in asyncio.run(call())] == [1]
+
+
+def test_get_all_tasks_paginated_returns_next_cursor(client):
+    tasks = [MagicMock(task_id=i, task_name="T", status="pending", due_date=None, priority="low", version=1) for i in (3, 4)]
+    app.task_service.get_tasks_page.return_value = tasks
+
+    async def call():
+        response = await client.get("/tasks/1?limit=2")
+        return await response.get_json()
+
+    assert asyncio.run(call())["next_after"] == 4
+
+
+def test_delete_task_returns_400_if_user_missing(client):
+    app.task_service.delete_task.side_effect = ValueError("User missing")
+    response = asyncio.run(client.delete("/tasks/1?user_id=1"))
+    assert response.status_code == 400
+
+
+def test_request_commits_session_once_on_success(client):
+    session = app._session.return_value
+    session.in_transaction.return_value = True
+    asyncio.run(client.delete("/user/1"))
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.parametrize("body, headers", [
+    (["not", "an", "object"], {}),
+    ({"due_date": "tomorrow"}, {}),
+    ({"status": "completed"}, {"If-Match": '"abc"'}),
+])
+def test_update_task_returns_400_on_invalid_input(client, body, headers):
+    response = asyncio.run(client.patch("/tasks/1", json=body, headers=headers))
+    assert response.status_code == 400
+    app.task_service.update_task_fields.assert_not_called()
+
+
+def test_update_task_with_if_match_star_is_unguarded(client):
+    app.task_service.update_task_fields.return_value = MagicMock(
+        task_id=1, task_name="T", status="completed", due_date=None, priority="low", version=2
+    )
+    response = asyncio.run(client.patch("/tasks/1", json={"status": "completed"}, headers={"If-Match": "*"}))
+    assert response.status_code == 202
+    app.task_service.update_task_fields.assert_called_once_with(1, {"status": "completed"}, None)
+
+
+@pytest.mark.parametrize("body", [{"user_id": 1}, {"user_id": 1, "tasks": 5}])
+def test_create_tasks_bulk_returns_400_without_tasks_list(client, body):
+    response = asyncio.run(client.post("/tasks/bulk", json=body))
+    assert response.status_code == 400
+    app.task_service.create_tasks_bulk.assert_not_called()
+
+
+def test_asgi_app_refuses_backend_without_search():
+    with pytest.raises(ValueError, match="statistics and search need postgresql or sqlite"):
+        create_asgi_app(Settings(DATABASE_URL="mssql://u:p@localhost/db"))
@@ -0,0 +1,40 @@
+from benchmarks.compare import compare
+from benchmarks.run_benchmarks import measure, percentile, summarize
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_summarize_reports_milliseconds_and_throughput():
+    summary = summarize([0.001, 0.002, 0.003, 0.004], wall_seconds=2.0, errors=1)
+
+    assert summary["ops"] == 4
+    assert summary["errors"] == 1
+    assert summary["throughput_ops_s"] == 2.0
+    assert summary["mean_ms"] == 2.5
+    assert summary["p50_ms"] == 2.0
+    assert summary["p99_ms"] == 4.0
+
+
+def test_measure_counts_failures_as_errors():
+    summary = measure(lambda index: index % 2 == 0, requests=10, concurrency=2)
+
+    assert summary["ops"] == 5
+    assert summary["errors"] == 5
+
+
+def test_compare_flags_p95_regression():
+    result = {"backend": "sqlite", "tasks_per_user": 1000, "concurrency": 1, "name": "GET /tasks/<user_id>"}
+    baseline = {"results": [{**result, "p95_ms": 10.0, "throughput_ops_s": 100.0}]}
+    candidate = {"results": [{**result, "p95_ms": 12.0, "throughput_ops_s": 100.0}]}
+
+    rows = compare(baseline, candidate, threshold=0.10)
+
+    assert rows[0]["regression"] is True
+    assert compare(baseline, baseline, threshold=0.10)[0]["regression"] is False
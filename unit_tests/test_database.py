@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import SingletonThreadPool
+from app import Settings
+from database import MonitoredQueuePool, build_engine, pool_stats
+from models import Base, User
+
+
+def test_build_engine_uses_monitored_pool_with_settings(tmp_path):
+    settings = Settings(DATABASE_URL=f"sqlite:///{tmp_path / 'db.sqlite'}", POOL_SIZE=3, MAX_OVERFLOW=2)
+    engine = build_engine(settings)
+    assert isinstance(engine.pool, MonitoredQueuePool)
+    assert engine.pool.size() == 3
+    assert engine.pool._max_overflow == 2
+
+
+def test_build_engine_keeps_default_pool_for_memory_sqlite():
+    engine = build_engine(Settings(DATABASE_URL="sqlite://"))
+    assert isinstance(engine.pool, SingletonThreadPool)
+
+
+def test_build_engine_enables_sqlite_foreign_keys():
+    engine = build_engine(Settings(DATABASE_URL="sqlite://"))
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA foreign_keys")).scalar() == 1
+
+
+def test_build_engine_sets_postgres_statement_timeout(monkeypatch):
+    create_engine = MagicMock()
+    monkeypatch.setattr("database.create_engine", create_engine)
+    build_engine(Settings(DATABASE_URL="postgresql://u:p@localhost/db", STATEMENT_TIMEOUT_MS=500))
+    assert create_engine.call_args.kwargs["connect_args"] == {"options": "-c statement_timeout=500"}
+
+
+def test_sqlite_savepoints_stay_inside_the_transaction(tmp_path):
+    engine = build_engine(Settings(DATABASE_URL=f"sqlite:///{tmp_path / 'db.sqlite'}"))
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        with session.begin_nested():
+            session.add(User(username="john", role="user"))
+        session.rollback()
+        assert session.scalar(select(func.count()).select_from(User)) == 0
+    engine.dispose()
+
+
+def test_build_engine_refuses_unsupported_backend():
+    with pytest.raises(ValueError, match="Unsupported database backend mysql"):
+        build_engine(Settings(DATABASE_URL="mysql://u:p@localhost/db"))
+
+
+def test_pool_stats_reports_checkouts_and_wait_time(tmp_path):
+    engine = build_engine(Settings(DATABASE_URL=f"sqlite:///{tmp_path / 'db.sqlite'}"))
+    with engine.connect():
+        stats = pool_stats(engine)
+        assert stats["checked_out"] == 1
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 1
+    assert stats["wait_seconds_max"] >= 0.0
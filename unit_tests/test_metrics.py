@@ -0,0 +1,55 @@
+from sqlalchemy import create_engine, text
+
+from metrics import Histogram, QueryStats, RequestMetrics, instrument_engine, stop_tracking_queries, track_queries
+
+
+def test_instrumented_engine_counts_statements_and_commits():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    stats = track_queries()
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+    finally:
+        stop_tracking_queries()
+
+    assert stats.statements == 2
+    assert stats.commits == 1
+    assert stats.seconds > 0
+
+
+def test_statements_outside_tracking_are_not_counted():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    stats = track_queries()
+    stop_tracking_queries()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    assert stats.statements == 0
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "Latency.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(("/a",), 0.05)
+    histogram.observe(("/a",), 0.5)
+    histogram.observe(("/a",), 5.0)
+
+    lines = histogram.render()
+
+    assert 'latency_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'latency_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_count{route="/a"} 3' in lines
+
+
+def test_request_metrics_render_prometheus_text():
+    metrics = RequestMetrics()
+    metrics.observe("/tasks/<int:user_id>", "GET", 200, 0.02, QueryStats(statements=3, seconds=0.01))
+
+    body = metrics.render()
+
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_requests_total{route="/tasks/<int:user_id>",method="GET",status="200"} 1' in body
+    assert 'db_statements_per_request_sum{route="/tasks/<int:user_id>",method="GET"} 3' in body
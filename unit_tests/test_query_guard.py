@@ -0,0 +1,81 @@
+import pytest
+from datetime import date
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import sessionmaker
+
+from metrics import instrument_engine, stop_tracking_queries, track_queries
+from models import Base, Task, User
+from query_guard import QueryBudgetExceededError, enforce_query_budget, install_strict_loading
+from repository.task_repository import TaskRepository
+from repository.user_repository import UserRepository
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(engine, expire_on_commit=False)
+    install_strict_loading(factory)
+    with factory() as session:
+        user = User(username="john", role="user")
+        session.add(user)
+        session.flush()
+        session.add_all([Task(task_name=f"t{n}", user_id=user.id, due_date=date(2026, 1, 1)) for n in range(3)])
+        session.commit()
+    return factory
+
+
+def test_strict_loading_raises_on_lazy_relationship(session_factory):
+    with session_factory() as session:
+        task = TaskRepository(session).get_task_by_id_db(1)
+        with pytest.raises(InvalidRequestError):
+            task.user
+
+
+def test_with_user_eager_loads_task_owner(session_factory):
+    with session_factory() as session:
+        tasks = TaskRepository(session).get_all_tasks_db(1, with_user=True)
+        assert {task.user.username for task in tasks} == {"john"}
+
+
+def test_page_with_user_eager_loads_task_owner(session_factory):
+    with session_factory() as session:
+        tasks = TaskRepository(session).get_tasks_page_db(1, 10, with_user=True)
+        assert [task.user.username for task in tasks] == ["john"] * 3
+
+
+def test_with_tasks_eager_loads_user_tasks(session_factory):
+    with session_factory() as session:
+        user = UserRepository(session).get_user_by_id_db(1, with_tasks=True)
+        assert len(user.tasks) == 3
+
+
+def test_query_budget_flags_request_over_budget():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    enforce_query_budget(engine, budget=1)
+    stats = track_queries()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            assert stats.over_budget is False
+            connection.execute(text("SELECT 2"))
+    finally:
+        stop_tracking_queries()
+
+    assert stats.over_budget is True
+
+
+def test_strict_query_budget_raises():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    enforce_query_budget(engine, budget=1, strict=True)
+    track_queries()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            with pytest.raises(QueryBudgetExceededError):
+                connection.execute(text("SELECT 2"))
+    finally:
+        stop_tracking_queries()
@@ -0,0 +1,138 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import create_app
+from models import Base, User
+from read_routing import ReadRouter
+from settings import Settings
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def database_urls(tmp_path):
+    urls = [f"sqlite:///{tmp_path / name}" for name in ("primary.db", "replica.db")]
+    for url in urls:
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(User(username="john", role="user"))
+            session.commit()
+        engine.dispose()
+    return urls
+
+
+def routed(urls, clock=None):
+    app = create_app(Settings(
+        DATABASE_URL=urls[0], REPLICA_URLS=(urls[1],), READ_YOUR_WRITES_SECONDS=5.0, SECRET_KEY="test"
+    ))
+    app.router.clock = clock or FakeClock()
+    app.testing = True
+    return app
+
+
+@pytest.fixture
+def routed_app(database_urls):
+    app = routed(database_urls)
+    yield app
+    app.shutdown()
+
+
+def task_names(client, user_id=1):
+    return [task["task_name"] for task in client.get(f"/tasks/{user_id}?limit=10").get_json()["tasks"]]
+
+
+def test_reads_go_to_replica_until_the_user_writes(routed_app):
+    client = routed_app.test_client()
+    assert task_names(client) == []
+
+    response = client.post("/tasks", json={"task_name": "fresh", "user_id": 1, "due_date": "2026-06-01"})
+    assert response.status_code == 201
+
+    # pinned: the write is visible although the replica never got it
+    assert task_names(client) == ["fresh"]
+
+    routed_app.router.clock.now += 6
+    assert task_names(client) == []
+    assert routed_app.router.stats()["replica_reads"] >= 2
+
+
+def test_pins_follow_the_client_to_another_worker(database_urls):
+    # two workers: separate routers, one shared clock and secret
+    clock = FakeClock()
+    worker_a, worker_b = routed(database_urls, clock), routed(database_urls, clock)
+    client = worker_a.test_client()
+    client.post("/tasks", json={"task_name": "fresh", "user_id": 1, "due_date": "2026-06-01"})
+    cookie = client.get_cookie("recent_writes")
+    assert cookie is not None
+
+    other_client = worker_b.test_client()
+    assert task_names(other_client) == []
+    other_client.set_cookie("recent_writes", cookie.value)
+    assert not worker_b.router.is_pinned(1)
+    assert task_names(other_client) == ["fresh"]
+
+    clock.now += 6
+    assert task_names(other_client) == []
+    other_client.set_cookie("recent_writes", "tampered" + cookie.value)
+    assert task_names(other_client) == []
+    worker_a.shutdown()
+    worker_b.shutdown()
+
+
+def test_write_requests_read_from_primary(routed_app):
+    client = routed_app.test_client()
+    client.post("/tasks", json={"task_name": "fresh", "user_id": 1, "due_date": "2026-06-01"})
+    routed_app.router.clock.now += 6
+
+    response = client.patch("/tasks/1", json={"task_name": "renamed"})
+
+    assert response.status_code == 202
+
+
+def test_failed_write_does_not_pin(routed_app):
+    client = routed_app.test_client()
+
+    client.post("/tasks", json={"task_name": "x", "user_id": 1, "due_date": "not a date"})
+
+    assert not routed_app.router.is_pinned(1)
+
+
+def test_replica_stats_endpoint(routed_app):
+    response = routed_app.test_client().get("/replicas/stats")
+
+    assert response.get_json()["replicas"] == 1
+    assert len(response.get_json()["pools"]) == 1
+
+
+def test_router_without_request_reads_primary():
+    primary, replica = MagicMock(), MagicMock()
+    router = ReadRouter(primary, [replica])
+
+    assert router.read_session(1) is primary
+    router.note_write(1)
+    router.pin_request_writes()
+    assert not router.is_pinned(1)
+
+
+def test_router_rotates_replicas_per_read_only_request():
+    primary, replicas = MagicMock(), [MagicMock(), MagicMock()]
+    router = ReadRouter(primary, replicas)
+
+    chosen = []
+    for _ in range(3):
+        router.begin_request(read_only=True)
+        chosen.append(router.read_session(1))
+    router.begin_request(read_only=False)
+
+    assert chosen == [replicas[0], replicas[1], replicas[0]]
+    assert router.read_session(1) is primary
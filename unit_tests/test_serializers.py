@@ -0,0 +1,78 @@
+import io
+import json
+from datetime import date
+
+import serializers
+from repository.task_repository import TaskRecord
+from serializers import dumps, stream_json_record_pages, task_records_to_list
+
+
+def test_task_records_to_list_uses_task_to_dict_keys():
+    record = TaskRecord(1, "T", "pending", date(2026, 1, 2), "low", 3)
+    task = serializers.task_to_dict(record)
+    assert json.loads(dumps(task_records_to_list([record]))) == [task]
+
+
+def test_stream_json_record_pages_joins_pages_into_one_array():
+    pages = [[TaskRecord(1, "a", "pending", None, "low", 1)], [TaskRecord(2, "b", "pending", None, "low", 1)]]
+    body = b"".join(stream_json_record_pages(pages))
+    assert [task["task_id"] for task in json.loads(body)] == [1, 2]
+    assert b"".join(stream_json_record_pages([])) == b"[]"
+
+
+def test_dumps_falls_back_to_json_without_orjson(monkeypatch):
+    monkeypatch.setattr(serializers, "orjson", None)
+    assert json.loads(dumps({"due_date": date(2026, 1, 2)})) == {"due_date": "2026-01-02"}
+
+
+def test_stream_ndjson_record_pages_writes_one_object_per_line():
+    pages = [[TaskRecord(1, "a", "pending", None, "low", 1), TaskRecord(2, "b", "pending", None, "low", 1)]]
+    lines = b"".join(serializers.stream_ndjson_record_pages(pages)).splitlines()
+    assert [json.loads(line)["task_id"] for line in lines] == [1, 2]
+
+
+def test_stream_csv_record_pages_writes_header_then_rows():
+    pages = [[TaskRecord(1, "a,b", "pending", date(2026, 1, 2), "low", 1)]]
+    body = b"".join(serializers.stream_csv_record_pages(pages)).decode()
+    assert body.splitlines() == [
+        "task_id,task_name,task_status,due_date,priority,version",
+        '1,"a,b",pending,2026-01-02,low,1',
+    ]
+
+
+def test_read_task_import_parses_ndjson_and_reports_bad_lines():
+    body = io.BytesIO(
+        b'{"task_name": "a", "user_id": 1, "due_date": "2026-01-02"}\n'
+        b"\n"
+        b"not json\n"
+        b'{"task_name": "b", "user_id": "x"}\n'
+    )
+    records = list(serializers.read_task_import(body, "ndjson"))
+    assert records[0] == (1, {
+        "task_name": "a", "user_id": 1, "status": "pending", "due_date": date(2026, 1, 2), "priority": "medium",
+    }, None)
+    assert [(line, row) for line, row, _ in records[1:]] == [(3, None), (4, None)]
+    assert records[2][2] == "user_id must be an integer."
+
+
+def test_read_task_import_parses_csv_with_header():
+    body = io.BytesIO(b'task_name,user_id,status,due_date,priority\n"a, b",2,completed,,high\n')
+    [(line, row, error)] = serializers.read_task_import(body, "csv")
+    assert (line, error) == (2, None)
+    assert row == {"task_name": "a, b", "user_id": 2, "status": "completed", "due_date": None, "priority": "high"}
+
+
+def test_search_cursor_round_trips_scores_exactly():
+    cursor = serializers.search_cursor(1.0731707317073174e-06, 12)
+    assert serializers.parse_search_cursor(cursor) == (1.0731707317073174e-06, 12)
+    assert serializers.parse_search_cursor(None) is None
+
+
+def test_task_update_from_json_rejects_non_integer_versions():
+    for version in ("abc", "1", 1.5, True):
+        task_id, changes, parsed, error = serializers.task_update_from_json(
+            {"task_id": 1, "status": "completed", "version": version}
+        )
+        assert (task_id, changes, parsed) == (1, {}, None)
+        assert "version must be an integer" in error
+    assert serializers.task_update_from_json({"task_id": 1, "status": "completed", "version": 2})[2] == 2
@@ -0,0 +1,104 @@
+import logging
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from models import Base, Task, User
+from sweeper import OverdueSweeper, sweeper_handler
+
+TODAY = date(2026, 3, 1)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = scoped_session(sessionmaker(engine, expire_on_commit=False))
+    session.add(User(username="john", role="user"))
+    session.add_all([
+        Task(task_name=f"t{i}", user_id=1, status="pending", due_date=date(2026, 1, 1 + i % 5)) for i in range(7)
+    ])
+    session.add_all([
+        Task(task_name="done", user_id=1, status="completed", due_date=date(2026, 1, 1)),
+        Task(task_name="future", user_id=1, status="pending", due_date=date(2026, 6, 1)),
+    ])
+    session.commit()
+    session.remove()
+    yield session
+    engine.dispose()
+
+
+def test_run_once_pages_through_open_overdue_tasks(session):
+    seen = []
+    sweeper = OverdueSweeper(session, handler=lambda records: seen.append(records), batch_size=3,
+                             clock=lambda: TODAY)
+
+    run = sweeper.run_once()
+
+    assert [len(batch) for batch in seen] == [3, 3, 1]
+    ordered = [(record.due_date, record.task_id) for batch in seen for record in batch]
+    assert ordered == sorted(ordered)
+    assert {record.task_name for batch in seen for record in batch} == {f"t{i}" for i in range(7)}
+    assert (run.batches, run.tasks, run.error) == (3, 7, None)
+    assert sweeper.stats()["runs"] == 1
+    assert sweeper.stats()["last_run"]["tasks"] == 7
+
+
+def test_run_once_stops_after_max_batches(session):
+    sweeper = OverdueSweeper(session, batch_size=2, max_batches=2, clock=lambda: TODAY)
+
+    run = sweeper.run_once()
+
+    assert (run.batches, run.tasks) == (2, 4)
+
+
+def test_failed_run_is_recorded(session):
+    def handler(records):
+        raise RuntimeError("boom")
+
+    sweeper = OverdueSweeper(session, handler=handler, clock=lambda: TODAY)
+
+    run = sweeper.run_once()
+
+    assert run.error == "RuntimeError: boom"
+    assert sweeper.stats()["failures"] == 1
+
+
+def test_overdue_query_uses_partial_index(session):
+    plan = session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT task_id FROM tasks "
+        "WHERE status <> 'completed' AND due_date < '2026-03-01' ORDER BY due_date, task_id"
+    )).all()
+    session.remove()
+
+    assert any("ix_tasks_open_due_date" in row[-1] for row in plan)
+
+
+def test_log_action_reports_each_overdue_task(session, caplog):
+    sweeper = OverdueSweeper(session, handler=sweeper_handler("log"), clock=lambda: TODAY)
+
+    with caplog.at_level(logging.WARNING, logger="sweeper"):
+        sweeper.run_once()
+
+    assert sum("is overdue" in message for message in caplog.messages) == 7
+
+
+def test_sweeper_handler_rejects_unknown_action():
+    assert sweeper_handler("") is None
+    with pytest.raises(ValueError, match="Unknown sweeper action: mail."):
+        sweeper_handler("mail")
+
+
+@pytest.mark.parametrize("action, running", [("", False), ("log", True)])
+def test_app_schedules_sweeps_only_with_an_action(tmp_path, action, running):
+    from app import create_app
+    from settings import Settings
+
+    app = create_app(Settings(
+        DATABASE_URL=f"sqlite:///{tmp_path / 'app.db'}", SWEEPER_INTERVAL=3600.0, SWEEPER_ACTION=action
+    ))
+
+    assert app.sweeper.stats()["running"] is running
+    app.shutdown()
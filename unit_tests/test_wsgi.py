@@ -0,0 +1,63 @@
+import importlib.util
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from wsgi import application
+
+
+@pytest.fixture
+def gunicorn_conf():
+    spec = importlib.util.spec_from_file_location(
+        "gunicorn_conf", Path(__file__).resolve().parent.parent / "gunicorn.conf.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_wsgi_serves_the_flask_app():
+    assert application.test_client().get("/pool/stats").status_code == 200
+
+
+def test_post_fork_drops_inherited_pool_without_closing(gunicorn_conf, monkeypatch):
+    engine = MagicMock()
+    monkeypatch.setattr(application, "engine", engine)
+
+    gunicorn_conf.post_fork(MagicMock(), MagicMock())
+
+    engine.dispose.assert_called_once_with(close=False)
+
+
+def test_worker_exit_stops_sweeper_and_closes_pool(gunicorn_conf, monkeypatch):
+    engine = MagicMock()
+    sweeper = MagicMock()
+    monkeypatch.setattr(application, "engine", engine)
+    monkeypatch.setattr(application, "sweeper", sweeper)
+
+    gunicorn_conf.worker_exit(MagicMock(), MagicMock())
+
+    sweeper.stop.assert_called_once()
+    engine.dispose.assert_called_once_with()
+
+
+def test_on_starting_warns_when_pool_is_smaller_than_threads(gunicorn_conf, monkeypatch):
+    monkeypatch.setenv("POOL_SIZE", "1")
+    monkeypatch.setenv("MAX_OVERFLOW", "0")
+    server = MagicMock()
+
+    gunicorn_conf.on_starting(server)
+
+    server.log.warning.assert_called_once()
+
+
+def test_shutdown_of_app_built_without_factory_skips_sweeper():
+    from app import AppFlask
+    from settings import Settings
+
+    app = AppFlask(__name__, settings=Settings(DATABASE_URL="sqlite://"))
+
+    app.shutdown()
+
+    assert app.sweeper is None
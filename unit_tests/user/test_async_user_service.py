@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from models import User
+from services.async_user_service import AsyncUserService
+from services.user_cache import KnownUserCache
+
+
+@pytest.fixture
+def mock_repository():
+    return AsyncMock()
+
+
+@pytest.fixture
+def service(mock_repository):
+    return AsyncUserService(repository=mock_repository)
+
+
+def test_create_user_passes_user_object(service, mock_repository):
+    asyncio.run(service.create_user("john", "admin"))
+    assert isinstance(mock_repository.create_user_db.call_args[0][0], User)
+
+
+def test_get_user_raises_error_if_not_found(service, mock_repository):
+    mock_repository.get_user_by_id_db.return_value = None
+    with pytest.raises(ValueError, match="User with id=5 does not exist."):
+        asyncio.run(service.get_user(5))
+
+
+def test_update_user_sets_updated_user_id(service, mock_repository):
+    mock_repository.get_user_by_id_db.return_value = User(username="old", role="user")
+    updated_user = User(username="new", role="admin")
+    asyncio.run(service.update_user(10, updated_user))
+    assert updated_user.id == 10
+
+
+def test_delete_user_invalidates_user_cache(mock_repository):
+    cache = KnownUserCache()
+    cache.add(3)
+    service = AsyncUserService(repository=mock_repository, user_cache=cache)
+    mock_repository.delete_user_by_id_db.return_value = 1
+    asyncio.run(service.delete_user(3))
+    assert cache.contains(3) is False
+
+
+def test_delete_user_raises_error_if_not_found(service, mock_repository):
+    mock_repository.delete_user_by_id_db.return_value = 0
+    with pytest.raises(ValueError, match="User with id=7 does not exist."):
+        asyncio.run(service.delete_user(7))
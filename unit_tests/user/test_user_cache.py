@@ -0,0 +1,37 @@
+from unittest.mock import patch
+from services.user_cache import KnownUserCache
+
+
+def test_contains_returns_false_for_unknown_user():
+    assert KnownUserCache().contains(1) is False
+
+
+def test_add_makes_user_known():
+    cache = KnownUserCache()
+    cache.add(1)
+    assert cache.contains(1) is True
+
+
+def test_invalidate_forgets_user():
+    cache = KnownUserCache()
+    cache.add(1)
+    cache.invalidate(1)
+    assert cache.contains(1) is False
+
+
+def test_entries_expire_after_ttl():
+    cache = KnownUserCache(ttl=10)
+    with patch("services.user_cache.time.monotonic", return_value=100.0):
+        cache.add(1)
+    with patch("services.user_cache.time.monotonic", return_value=111.0):
+        assert cache.contains(1) is False
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = KnownUserCache(maxsize=2)
+    cache.add(1)
+    cache.add(2)
+    cache.contains(1)
+    cache.add(3)
+    assert cache.contains(2) is False
+    assert cache.contains(1) is True
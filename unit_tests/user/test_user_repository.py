@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import MagicMock
-from models import User
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+from models import Base, Task, User
 from repository.user_repository import UserRepository
 
 
@@ -20,10 +22,11 @@ def test_create_user_db_adds_user(repo, mock_session):
     mock_session.add.assert_called_once_with(user)
 
 
-def test_create_user_db_commits(repo, mock_session):
+def test_create_user_db_flushes_without_commit(repo, mock_session):
     user = User(username="test", role="admin")
     repo.create_user_db(user)
-    mock_session.commit.assert_called_once()
+    mock_session.flush.assert_called_once()
+    mock_session.commit.assert_not_called()
 
 
 def test_create_user_db_returns_user(repo, mock_session):
@@ -38,10 +41,11 @@ def test_update_user_db_merges_user(repo, mock_session):
     mock_session.merge.assert_called_once_with(user)
 
 
-def test_update_user_db_commits(repo, mock_session):
+def test_update_user_db_flushes_without_commit(repo, mock_session):
     user = User(username="old", role="user")
     repo.update_user_db(user)
-    mock_session.commit.assert_called()
+    mock_session.flush.assert_called_once()
+    mock_session.commit.assert_not_called()
 
 
 def test_get_user_by_id_db_queries_user(repo, mock_session):
@@ -62,13 +66,60 @@ def test_get_user_by_id_db_returns_first_result(repo, mock_session):
     assert result == "user_obj"
 
 
+def test_user_exists_db_returns_scalar(repo, mock_session):
+    mock_session.scalar.return_value = True
+    assert repo.user_exists_db(5) is True
+    mock_session.scalar.assert_called_once()
+
+
 def test_delete_user_db_deletes_user(repo, mock_session):
     user = User(username="to_delete", role="guest")
     repo.delete_user_db(user)
     mock_session.delete.assert_called_once_with(user)
 
 
-def test_delete_user_db_commits(repo, mock_session):
+def test_delete_user_db_flushes_without_commit(repo, mock_session):
     user = User(username="to_delete", role="guest")
     repo.delete_user_db(user)
-    mock_session.commit.assert_called_once()
+    mock_session.flush.assert_called_once()
+    mock_session.commit.assert_not_called()
+
+
+def test_delete_user_by_id_db_issues_single_delete(repo, mock_session):
+    mock_session.execute.return_value.rowcount = 1
+    assert repo.delete_user_by_id_db(5) == 1
+    mock_session.execute.assert_called_once()
+    mock_session.query.assert_not_called()
+
+
+def test_delete_user_by_id_db_cascades_to_tasks():
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", lambda connection, record: connection.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(username="john", role="admin", tasks=[Task(task_name="a"), Task(task_name="b")])
+        session.add(user)
+        session.commit()
+        UserRepository(session).delete_user_by_id_db(user.id)
+        session.commit()
+        assert session.scalar(select(func.count()).select_from(Task)) == 0
+
+
+def test_existing_user_ids_db_returns_known_ids_only():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([User(username="john", role="user"), User(username="jane", role="user")])
+        session.commit()
+        assert UserRepository(session).existing_user_ids_db({1, 2, 3}) == {1, 2}
+        assert UserRepository(session).existing_user_ids_db(set()) == set()
+
+
+def test_get_user_by_id_db_reads_through_router():
+    session = MagicMock()
+    router = MagicMock()
+
+    UserRepository(session, router).get_user_by_id_db(3)
+
+    router.read_session.assert_called_once_with(3)
+    session.query.assert_not_called()
@@ -0,0 +1,2 @@
+"""Production entry point: gunicorn -c gunicorn.conf.py (serves wsgi:application)."""
+from app import app as application